@@ -0,0 +1,36 @@
+# gcp-agentic-migration/agents/anomaly_agent.py
+from autogen_agentchat import AssistantAgent
+from modelcontextprotocol.client.ws import McpWsClient
+
+def build_anomaly_agent(llm_config: dict, mcp_client: McpWsClient = None) -> AssistantAgent:
+    """
+    Builds the Anomaly Detection Agent.
+    Detection itself is done by the rule-based detector in the MCP server; this agent is
+    consulted only when it fires, to diagnose the anomalies and decide how to proceed.
+    """
+    system_prompt = """
+    You are a vigilant monitoring system for a MySQL to Cloud SQL migration. You do not watch
+    the raw tool output: a rule-based detector in the MCP server does that, flagging non-zero
+    return codes, error patterns on stderr, commands slower than their usual duration, jobs
+    whose throughput drops below their baseline and jobs that stop making progress.
+
+    You are consulted only when the detector has flagged something. Each anomaly names its
+    source (tool or job), the rule that fired, a severity and the measured value against its
+    threshold. If you need more context, use the `get_anomalies` resource.
+
+    Diagnose the problem clearly in two or three sentences, referencing the tool or job that
+    produced it, then answer on the last line with exactly the word you are asked for
+    (CONTINUE, RETRY or ABORT). In a group conversation, start your message with
+    'ANOMALY DETECTED:' instead.
+    """
+
+    anomaly_agent = AssistantAgent(
+        name="Anomaly_Detection_Agent",
+        system_message=system_prompt,
+        llm_config=llm_config,
+    )
+
+    if mcp_client is not None:
+        anomaly_agent.register_for_execution(mcp_client.resources.get_anomalies)
+
+    return anomaly_agent
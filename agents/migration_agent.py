@@ -11,17 +11,22 @@ def build_migration_agent(mcp_client: McpWsClient, llm_config: dict) -> Assistan
     You are a data migration strategist. Your primary goal is to move data from the source to the target.
     
     Your process is as follows:
-    1. First, determine the database size by calling the `get_source_db_size` resource.
-    2. Analyze the output. The size will be in GB.
-    3. Based on the user-provided volume parameter and the result from `get_source_db_size`, select the correct strategy:
-        - For volumes under 100GB, you must use the GCS Import strategy.
-        - For volumes between 100GB and 500GB, you must use the DMS strategy.
-        - For volumes over 500GB, you must use the Mydumper/Myloader strategy.
+    1. First, size the database by calling the `get_source_db_size` resource. It returns the total size in GB, a per-table breakdown (data and index bytes, estimated rows, average row length, BLOB/TEXT columns, engine) and an estimated transfer time for each strategy. Results are cached for a few minutes; pass `refresh=true` only if the data has changed substantially since.
+    2. Analyze the output: which tables dominate the volume, and whether BLOB/TEXT-heavy tables will inflate the dump.
+    3. Select the strategy named in `recommended_strategy`: it is the eligible strategy with the lowest `estimated_seconds`. The strategies are:
+        - GCS Import, only considered below 100GB.
+        - DMS, only considered up to 500GB and when a DMS job is configured.
+        - Mydumper/Myloader, always available.
+       If `get_source_db_size` fails, fall back to the user-provided volume: GCS Import under 100GB, DMS between 100GB and 500GB, Mydumper/Myloader above 500GB. State the estimates of all strategies in your report.
     4. Execute the corresponding tool for your chosen strategy:
-        - GCS Import: First, use `run_mydumper` to create a dump file in a temporary directory (e.g., '/tmp/dump'). Then, upload this to GCS (this step is assumed to be part of the tool or a future tool). Finally, call `run_gcs_import` with the correct GCS bucket URI.
+        - GCS Import: Call `run_pipelined_migration` with a temporary output directory (e.g., '/tmp/dump'). It dumps with mydumper, uploads each finished file to the migration bucket and imports it into Cloud SQL while the rest of the dump is still running. Poll `get_pipeline_status` until its status is 'success' or 'error'. Pass `schema_preloaded=true`: the converted schema is applied separately. Use `run_gcs_import` only to re-import a single file that is already in the bucket.
         - DMS: Call `run_dms_job` with the appropriate job ID.
-        - Mydumper/Myloader: First, call `run_mydumper` to create the dump in a directory (e.g., '/tmp/mydumper_output'). Then, call `run_myloader` using that same directory as input.
-    5. Monitor the output of each tool call for success or failure. Report the status clearly to the team. If a step fails, report the error from stderr.
+        - Mydumper/Myloader: First, call `run_mydumper` with `no_schemas=true` to create the dump in a directory (e.g., '/tmp/mydumper_output'). Then, call `run_myloader` using that same directory as input.
+       Do not start a GCS Import or Myloader load before the Schema_Conversion_Agent has applied the converted schema with `apply_schema`: the load tools refuse to run until it has. DMS copies the source DDL as it is, so only choose it when `convert_schema` changed no object and flagged none for review.
+    5. Do not pass `threads` to `run_mydumper` or `run_myloader` unless the user asks for it: the dump planner sizes threads, rows per chunk and chunk file size from the source table sizes and the available CPU, source and network headroom, and `run_myloader` reuses the plan saved with the dump. Include the returned `plan` (threads, rows, chunks, estimated_dump_seconds) in your status report. You can preview it with the `plan_dump` resource.
+    6. `run_mydumper` and `run_myloader` run as background jobs and return a `job_id` immediately. Poll `get_job_status` (or `get_job_events` with `wait_seconds` to long-poll) until the job status is 'success' or 'error' before starting the next step. Do not start `run_myloader` until the dump job has succeeded.
+    7. After a GCS Import or Mydumper/Myloader load has succeeded, call `start_binlog_catchup` (no arguments needed) to replay the changes made on the source since the dump. Poll `get_catchup_status` until `caught_up` is true and report `lag_seconds` and `row_changes`. Leave it running: at cutover, once writes to the source have stopped, call `stop_binlog_catchup` with `drain=true`. If it reports the source is unsupported (binary logging or row format), say so and continue without it.
+    8. Monitor the output of each tool call for success or failure. Report the status clearly to the team, including the progress figures (tables done, throughput, ETA). If a step fails, report the error from the job's stderr tail; fetch more of the job log with `get_job_log` (use `grep`, e.g. "ERROR|CRITICAL") or of a tool's raw output with `get_artifact` only if the tail is not enough.
     """
 
     migration_agent = AssistantAgent(
@@ -33,8 +38,20 @@ def build_migration_agent(mcp_client: McpWsClient, llm_config: dict) -> Assistan
     # Register MCP tools and resources with the agent
     migration_agent.register_for_execution(mcp_client.resources.get_source_db_size)
     migration_agent.register_for_execution(mcp_client.tools.run_gcs_import)
+    migration_agent.register_for_execution(mcp_client.tools.run_pipelined_migration)
+    migration_agent.register_for_execution(mcp_client.tools.cancel_pipeline)
+    migration_agent.register_for_execution(mcp_client.resources.get_pipeline_status)
     migration_agent.register_for_execution(mcp_client.tools.run_dms_job)
     migration_agent.register_for_execution(mcp_client.tools.run_mydumper)
     migration_agent.register_for_execution(mcp_client.tools.run_myloader)
+    migration_agent.register_for_execution(mcp_client.tools.cancel_job)
+    migration_agent.register_for_execution(mcp_client.resources.get_job_status)
+    migration_agent.register_for_execution(mcp_client.resources.get_job_events)
+    migration_agent.register_for_execution(mcp_client.resources.get_job_log)
+    migration_agent.register_for_execution(mcp_client.resources.get_artifact)
+    migration_agent.register_for_execution(mcp_client.resources.plan_dump)
+    migration_agent.register_for_execution(mcp_client.tools.start_binlog_catchup)
+    migration_agent.register_for_execution(mcp_client.tools.stop_binlog_catchup)
+    migration_agent.register_for_execution(mcp_client.resources.get_catchup_status)
 
     return migration_agent
\ No newline at end of file
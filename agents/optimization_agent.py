@@ -1,7 +1,8 @@
 # gcp-agentic-migration/agents/optimization_agent.py
 from autogen_agentchat import AssistantAgent
+from modelcontextprotocol.client.ws import McpWsClient
 
-def build_optimization_agent(llm_config: dict) -> AssistantAgent:
+def build_optimization_agent(llm_config: dict, mcp_client: McpWsClient = None) -> AssistantAgent:
     """
     Builds the Performance Optimization Agent.
     This agent is an observer and provides a final report.
@@ -10,7 +11,8 @@ def build_optimization_agent(llm_config: dict) -> AssistantAgent:
     You are a GCP cost and performance optimization specialist. Your task is to act at the very end of the migration process.
     
     After the Data_Validation_Agent confirms a successful migration and the chat concludes with 'MIGRATION COMPLETE', you will review the entire process log.
-    Analyze the full conversation history, including tool execution times (if available in logs), resource configurations chosen (e.g., Cloud SQL tier), and the migration strategy used.
+    Analyze the measured performance of the run, the resource configurations chosen (e.g., Cloud SQL tier), and the migration strategy used.
+    The measurements come from the MCP server's telemetry, available through the `get_performance_summary` resource: for each phase the elapsed seconds, bytes and rows moved, throughput (bytes_per_second, rows_per_second), subprocess CPU seconds and peak RSS, plus the slowest tables. Base your findings on these numbers and quote them; do not estimate durations from the conversation.
     
     Produce a final optimization report in markdown format with actionable recommendations for future migrations.
     Your suggestions MUST include:
@@ -27,4 +29,7 @@ def build_optimization_agent(llm_config: dict) -> AssistantAgent:
         llm_config=llm_config,
     )
 
+    if mcp_client is not None:
+        optimization_agent.register_for_execution(mcp_client.resources.get_performance_summary)
+
     return optimization_agent
\ No newline at end of file
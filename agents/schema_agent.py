@@ -12,14 +12,16 @@ def build_schema_agent(mcp_client: McpWsClient, llm_config: dict) -> AssistantAg
     Your task is to retrieve the source schema, analyze it for common incompatibilities, and generate a new, fully compatible DDL script.
 
     Your process is as follows:
-    1. Use the `get_source_schema` resource to fetch all `CREATE TABLE` statements from the source database.
-    2. Carefully analyze each statement for the following specific issues:
-        - **Storage Engine**: Identify any tables using `ENGINE=MyISAM`. You must change them to `ENGINE=InnoDB`.
-        - **DEFINER Clauses**: Search for any `DEFINER=` clauses in the DDL. These can cause permission errors on Cloud SQL. You must remove them entirely or replace them with `DEFINER=CURRENT_USER`.
-        - **Character Set/Collation**: Ensure character set and collation settings are consistent and compatible with Cloud SQL defaults (e.g., `utf8mb4` and `utf8mb4_unicode_ci`).
-    3. Generate a complete, corrected DDL script that can be executed on the target Cloud SQL instance.
-    4. Produce a brief report in markdown format that explains every change you made, listing the table and the specific modification (e.g., "Table 'users': Changed engine from MyISAM to InnoDB.").
-    5. Present both the final DDL script and the summary report to the team.
+    1. Call the `convert_schema` tool. It extracts the whole source schema and applies the mechanical rewrites locally in a single pass:
+        - **Storage Engine**: `ENGINE=MyISAM` is changed to `ENGINE=InnoDB`.
+        - **DEFINER Clauses**: `DEFINER=` clauses are removed from views, routines and triggers.
+        - **Character Set/Collation**: legacy character sets are normalised to `utf8mb4` / `utf8mb4_unicode_ci`.
+       It writes the converted DDL script to `script_path` and the per-object change report to `report_path`, and returns a `summary` plus the `needs_review` list.
+    2. Do not rewrite objects that are not in `needs_review`; their conversion is already complete and recorded in the report.
+    3. For every object in `needs_review`, read its `reasons` and `ddl` and produce a corrected, Cloud SQL compatible statement. Use the `get_source_schema` resource with `tables=[...]` only if you need the original DDL of a specific table.
+    4. Call the `apply_schema` tool with `reviewed` set to a list of {"object_type": ..., "name": ..., "ddl": ...}, one corrected statement (without a trailing delimiter) per `needs_review` object. The objects in `needs_review` are not in the converted script; `apply_schema` merges your statements into it and applies the result to Cloud SQL. It refuses to run while any object has no statement, and lists those in `unresolved`: correct them and call it again, or report TASK FAILED if you cannot.
+    5. Produce a brief report in markdown format: summarise the automatic changes by rule (from `summary.changes_by_rule`), then list every reviewed object and the specific modification you made (e.g., "Table 'sessions': Changed engine from MEMORY to InnoDB.").
+    6. Present the `script_path`, your corrected statements for the reviewed objects, and the summary report to the team.
     """
 
     schema_agent = AssistantAgent(
@@ -28,7 +30,9 @@ def build_schema_agent(mcp_client: McpWsClient, llm_config: dict) -> AssistantAg
         llm_config=llm_config,
     )
 
-    # Register the MCP resource with the agent
+    # Register the MCP tool and resource with the agent
+    schema_agent.register_for_execution(mcp_client.tools.convert_schema)
+    schema_agent.register_for_execution(mcp_client.tools.apply_schema)
     schema_agent.register_for_execution(mcp_client.resources.get_source_schema)
 
     return schema_agent
\ No newline at end of file
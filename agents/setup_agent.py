@@ -11,11 +11,11 @@ def build_setup_agent(mcp_client: McpWsClient, llm_config: dict) -> AssistantAge
     You are an expert Google Cloud infrastructure engineer specializing in Terraform. 
     Your sole responsibility is to provision and de-provision the required cloud environment.
     
-    - To create the infrastructure, you must use the `provision_infra` tool.
+    - To create the infrastructure, you must use the `provision_infra` tool. It is idempotent: when nothing changed since the last apply it returns "changes": false within seconds, so do not call it again just to confirm. To change only the Cloud SQL instance or only the orchestrator VM and bucket, pass `targets=["cloud_sql"]` or `targets=["orchestrator"]`.
     - To clean up resources after the migration, you must use the `destroy_infra` tool.
     - To check the current status of resources, you can use the `get_gcp_project_state` resource.
     
-    Confirm the status of all operations by analyzing the tool's output. If a tool call returns a non-zero exit code or has content in stderr, you must report it as a failure.
+    Confirm the status of all operations by analyzing the tool's output. Tools return a summary (status, returncode, key_counts such as terraform's added/changed/destroyed, last_error_lines) plus an `artifact_id` for the raw output. If a tool call returns a non-zero exit code or error lines, you must report it as a failure. Use the `get_artifact` resource (with `grep` or `offset`/`limit`) only when the summary is not enough to explain a failure.
     """
 
     setup_agent = AssistantAgent(
@@ -28,5 +28,6 @@ def build_setup_agent(mcp_client: McpWsClient, llm_config: dict) -> AssistantAge
     setup_agent.register_for_execution(mcp_client.tools.provision_infra)
     setup_agent.register_for_execution(mcp_client.tools.destroy_infra)
     setup_agent.register_for_execution(mcp_client.resources.get_gcp_project_state)
+    setup_agent.register_for_execution(mcp_client.resources.get_artifact)
 
     return setup_agent
\ No newline at end of file
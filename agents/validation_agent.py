@@ -12,12 +12,10 @@ def build_validation_agent(mcp_client: McpWsClient, llm_config: dict) -> Assista
     
     Your process is as follows:
     1. After the Data_Migration_Agent reports that the data transfer is complete, you must take action.
-    2. Generate Python scripts to perform validation. You will execute these scripts using the `run_validation_script` tool.
-    3. Your validation scripts MUST perform robust checks. Do not rely on simple row counts alone. You must implement both:
-        - **Row Count Comparison**: A script that connects to both the source and target databases, queries `SELECT COUNT(*) FROM table_name` for every single table, and compares the results.
-        - **Checksum/Hash Comparison**: For at least three critical tables (or all tables if fewer than three), generate a script that calculates a checksum. A good approach is to use `CHECKSUM TABLE table_name;` or a more complex hash like `SELECT MD5(GROUP_CONCAT(CONCAT_WS('#', col1, col2,...))) FROM (SELECT * FROM table_name ORDER BY id) AS sorted_table;`. This ensures data content is identical.
-    4. Execute these scripts via the `run_validation_script` tool.
-    5. Compare the results from the source and target databases.
+    2. Call the `validate_data` tool. It compares every table on the source and the target Cloud SQL instance in parallel, using chunks paged through the primary key with row counts and order-independent checksums, and drills down into mismatched chunks to the individual primary keys.
+    3. Do not write your own checksum scripts for full-table comparisons. Only use `run_validation_script` for targeted follow-up checks that `validate_data` cannot express (e.g., business-rule checks on a specific table). With `language="sql"`, each statement (queries only) runs on both databases and the result says whether they match. With `language="python"`, the script gets ready-made `source` and `target` connections (pymysql, dict rows) and reports by assigning a JSON-serializable value to `result`; do not open connections or read credentials yourself. Both connections are read-only; do not change that. Scripts are limited in time and CPU. Use `run_validation_scripts` to run several checks in parallel.
+    4. Review the per-table results returned by `validate_data` (`status`, `source_rows`, `target_rows`, `mismatched_chunks`, `missing_in_target`, `extra_in_target`, `changed`).
+    5. Tables without a primary key are compared as a single chunk; mention these in the report since row-level differences cannot be listed for them.
     6. Produce a final validation report in markdown format. The report must clearly state 'VALIDATION SUCCESS' or 'VALIDATION FAILURE'. If it fails, you must list every table and the specific discrepancy found (e.g., "Table 'orders': Source row count is 1052, Target row count is 1050.").
     """
 
@@ -27,7 +25,9 @@ def build_validation_agent(mcp_client: McpWsClient, llm_config: dict) -> Assista
         llm_config=llm_config,
     )
 
-    # Register the MCP tool with the agent
+    # Register the MCP tools with the agent
+    validation_agent.register_for_execution(mcp_client.tools.validate_data)
     validation_agent.register_for_execution(mcp_client.tools.run_validation_script)
+    validation_agent.register_for_execution(mcp_client.tools.run_validation_scripts)
 
     return validation_agent
\ No newline at end of file
@@ -0,0 +1,146 @@
+# gcp-agentic-migration/benchmarks/datagen.py
+
+import time
+
+# Column definitions and the SELECT expressions that fill them, per table profile. Values are
+# derived from the row number and the seed on the server, so generation is deterministic and
+# does not ship rows through Python.
+PROFILES = {
+    # Typical OLTP table: few short columns and a secondary index.
+    "narrow": {
+        "columns": """
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            account_id INT NOT NULL,
+            status ENUM('new', 'paid', 'shipped', 'cancelled') NOT NULL,
+            amount DECIMAL(12, 2) NOT NULL,
+            created_at DATETIME NOT NULL,
+            KEY idx_account (account_id)
+        """,
+        "insert": "account_id, status, amount, created_at",
+        "update": "amount = amount + 1, status = 'paid'",
+        "select": """
+            CRC32(CONCAT({seed}, '-', n)) % 100000,
+            ELT(1 + n % 4, 'new', 'paid', 'shipped', 'cancelled'),
+            (CRC32(CONCAT(n, '-', {seed})) % 10000000) / 100,
+            TIMESTAMP('2020-01-01') + INTERVAL (n * 37) % 157680000 SECOND
+        """,
+    },
+    # Reporting/denormalised table: many text and numeric columns per row.
+    "wide": {
+        "columns": ",\n".join(
+            ["id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY"]
+            + [f"label_{i} VARCHAR(64) NOT NULL" for i in range(8)]
+            + [f"metric_{i} INT NOT NULL" for i in range(6)]
+            + ["ratio DOUBLE NOT NULL", "updated_at DATETIME NOT NULL"]),
+        "insert": ", ".join([f"label_{i}" for i in range(8)] + [f"metric_{i}" for i in range(6)] + ["ratio", "updated_at"]),
+        "update": "metric_0 = metric_0 + 1, updated_at = updated_at + INTERVAL 1 DAY",
+        "select": ", ".join(
+            [f"MD5(CONCAT({{seed}}, '-', n, '-', {i}))" for i in range(8)]
+            + [f"CRC32(CONCAT(n, '-', {i}, '-', {{seed}})) % 1000000" for i in range(6)]
+            + ["(CRC32(CONCAT({seed}, n)) % 100000) / 1000.0", "TIMESTAMP('2021-01-01') + INTERVAL n MINUTE"]),
+    },
+    # Document/attachment table: one large value per row dominates the bytes moved.
+    "blob": {
+        "columns": """
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(64) NOT NULL,
+            payload MEDIUMBLOB NOT NULL,
+            note TEXT
+        """,
+        "insert": "name, payload, note",
+        "update": "note = CONCAT(COALESCE(note, ''), '+')",
+        "select": """
+            MD5(CONCAT({seed}, '-', n)),
+            REPEAT(UNHEX(SHA2(CONCAT({seed}, '-', n), 512)), GREATEST(1, {blob_bytes} DIV 64)),
+            IF(n % 3 = 0, NULL, REPEAT(MD5(n), 4))
+        """,
+    },
+}
+
+MIXED_ORDER = ("narrow", "wide", "blob")
+
+
+def table_profiles(tables, profile):
+    """Table name -> profile; "mixed" cycles through narrow, wide and blob."""
+    return {f"t{index:03d}_{kind}": kind for index, kind in
+            ((index, MIXED_ORDER[index % len(MIXED_ORDER)] if profile == "mixed" else profile) for index in range(tables))}
+
+
+def _insert_rows(cursor, table, spec, start, end, seed, blob_bytes):
+    select = spec["select"].format(seed=seed, blob_bytes=blob_bytes)
+    cursor.execute(f"""
+        INSERT INTO `{table}` ({spec['insert']})
+        WITH RECURSIVE seq (n) AS (SELECT {start} UNION ALL SELECT n + 1 FROM seq WHERE n < {end})
+        SELECT {select} FROM seq
+    """)
+    return cursor.rowcount
+
+
+def generate(connection, database, tables=8, rows=100000, profile="mixed", blob_rows=None, blob_bytes=16384,
+             seed=42, batch_rows=50000, with_view=True):
+    """
+    (Re)creates `database` and fills it with synthetic tables. Blob tables get `blob_rows`
+    rows (default: a tenth of `rows`) of roughly `blob_bytes` each. Returns per-table row
+    counts and sizes as reported by information_schema, and the time generation took.
+    """
+    started = time.monotonic()
+    blob_rows = rows // 10 if blob_rows is None else blob_rows
+    layout = table_profiles(tables, profile)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+        cursor.execute(f"CREATE DATABASE `{database}` CHARACTER SET utf8mb4")
+        cursor.execute(f"USE `{database}`")
+        cursor.execute("SET SESSION cte_max_recursion_depth = %s", (batch_rows + 1,))
+        for table, kind in layout.items():
+            spec = PROFILES[kind]
+            cursor.execute(f"CREATE TABLE `{table}` ({spec['columns']}) ENGINE=InnoDB")
+            target_rows = blob_rows if kind == "blob" else rows
+            for start in range(1, target_rows + 1, batch_rows):
+                _insert_rows(cursor, table, spec, start, min(start + batch_rows - 1, target_rows), seed, blob_bytes)
+        narrow = [table for table, kind in layout.items() if kind == "narrow"]
+        if with_view and narrow:
+            # A DEFINER-qualified view gives the DDL converter something to rewrite.
+            cursor.execute(f"""
+                CREATE DEFINER = CURRENT_USER VIEW `v_{narrow[0]}_by_account` AS
+                SELECT account_id, COUNT(*) AS orders, SUM(amount) AS total FROM `{narrow[0]}` GROUP BY account_id
+            """)
+        cursor.execute(f"ANALYZE TABLE {', '.join(f'`{table}`' for table in layout)}")
+        cursor.fetchall()
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+        """, (database,))
+        sizes = {name: {"profile": layout[name], "rows": table_rows, "bytes": size} for name, table_rows, size in cursor.fetchall()}
+    return {
+        "tables": sizes,
+        "rows": sum(table["rows"] or 0 for table in sizes.values()),
+        "bytes": sum(table["bytes"] or 0 for table in sizes.values()),
+        "seconds": round(time.monotonic() - started, 2),
+    }
+
+
+def mutate(connection, database, changes=10000, seed=42, blob_bytes=16384):
+    """
+    Writes to the source after it was dumped, for the binlog catch-up to replay: about
+    `changes` row changes spread evenly over inserts, updates and deletes in every generated
+    table. Returns the number of rows each operation touched.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT TABLE_NAME FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE' ORDER BY TABLE_NAME
+        """, (database,))
+        tables = {name: name.rsplit("_", 1)[-1] for (name,) in cursor.fetchall()}
+        tables = {name: kind for name, kind in tables.items() if kind in PROFILES}
+        per_table = max(1, changes // (3 * max(1, len(tables))))
+        cursor.execute(f"USE `{database}`")
+        cursor.execute("SET SESSION cte_max_recursion_depth = %s", (per_table + 1,))
+        counts = {"inserted": 0, "updated": 0, "deleted": 0}
+        for table, kind in tables.items():
+            spec = PROFILES[kind]
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM `{table}`")
+            last = cursor.fetchone()[0]
+            counts["updated"] += cursor.execute(f"UPDATE `{table}` SET {spec['update']} WHERE id % 7 = {seed % 7} LIMIT {per_table}")
+            counts["deleted"] += cursor.execute(f"DELETE FROM `{table}` WHERE id % 11 = {seed % 11} LIMIT {per_table}")
+            counts["inserted"] += _insert_rows(cursor, table, spec, last + 1, last + per_table, seed + 1, blob_bytes)
+    return counts
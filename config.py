@@ -1,3 +1,5 @@
+import os
+
 # --- GCP Configuration ---
 GCP_PROJECT_ID = "your-gcp-project-id"
 GCP_REGION = "us-central1"
@@ -9,6 +11,7 @@ LEGACY_DB_HOST_SECRET = "legacy-db-host"
 LEGACY_DB_USER_SECRET = "legacy-db-user"
 LEGACY_DB_PASSWORD_SECRET = "legacy-db-password"
 LEGACY_DB_NAME_SECRET = "legacy-db-name"
+LEGACY_DB_PORT = int(os.getenv("MIGRATION_LEGACY_DB_PORT", "3306"))
 
 # --- Cloud SQL Configuration (for Terraform & Agents) ---
 CLOUD_SQL_INSTANCE_NAME = "migrated-mysql-instance"
@@ -16,6 +19,8 @@ CLOUD_SQL_DB_VERSION = "MYSQL_8_0"
 CLOUD_SQL_TIER = "db-n2-standard-2" # Adjust based on scale
 CLOUD_SQL_ROOT_PASSWORD_SECRET = "cloud-sql-root-password"
 CLOUD_SQL_BACKUP_START_TIME = "04:00"
+CLOUD_SQL_PORT = int(os.getenv("MIGRATION_CLOUD_SQL_PORT", "3306")) # Only differs for local stand-ins (benchmarks/)
+CLOUD_SQL_ADDITIONAL_INSTANCES = [] # Further instances, same version and tier, that batch runs spread databases over
 
 # --- GCS Configuration ---
 GCS_BUCKET_NAME_SUFFIX = "-migration-bucket"
@@ -28,4 +33,157 @@ GEMINI_API_KEY_SECRET = "gemini-api-key" # Secret name in GCP Secret Manager
 
 # --- Autogen Configuration ---
 AUTOGEN_AGENT_TIMEOUT = 600 # Seconds
-AUTOGEN_MAX_CONSECUTIVE_AUTO_REPLY = 15
\ No newline at end of file
+AUTOGEN_MAX_CONSECUTIVE_AUTO_REPLY = 15
+
+# --- MCP Server Execution ---
+MCP_COMMAND_TIMEOUT = AUTOGEN_AGENT_TIMEOUT # Seconds, for short CLI calls (gcloud describe, etc.)
+MCP_LONG_COMMAND_TIMEOUT = 12 * 60 * 60 # Seconds, for terraform, mydumper, myloader and imports
+MCP_DB_EXECUTOR_WORKERS = 8 # Threads available for blocking database calls
+MCP_MAX_CONCURRENT_TOOLS = 4 # Upper bound for run_tools_concurrently
+
+# --- MCP Background Jobs (mydumper / myloader) ---
+JOB_LOG_DIR = "/tmp/mcp_jobs" # Spooled stdout/stderr for each job
+JOB_LOG_MAX_BYTES = 50 * 1024 * 1024 # Rotate a job log past this size
+JOB_LOG_BACKUP_COUNT = 3 # Rotated logs kept per job
+JOB_STDERR_TAIL_LINES = 50 # stderr lines returned with a job status
+JOB_EVENT_BUFFER = 500 # Progress/status events retained per job
+JOB_PROGRESS_INTERVAL = 15 # Seconds between progress samples
+JOB_MAX_LINE_BYTES = 64 * 1024 # Longer output lines are truncated
+
+# --- Data Validation ---
+VALIDATION_CHUNK_SIZE = 100000 # Rows compared per chunk, paged through the primary key
+VALIDATION_WORKERS = 8 # Concurrent checksum queries per side
+VALIDATION_DRILLDOWN_ROWS = 1000 # Mismatched chunks at or below this size are diffed row by row
+VALIDATION_MAX_DIFF_ROWS = 100 # Primary keys listed per discrepancy type and table
+VALIDATION_LIVE_PASSES = 3 # With a binlog catch-up running, tables that differ are compared again at a later source position, up to this many passes
+VALIDATION_SCRIPT_WORKERS = 4 # Pre-warmed run_validation_script workers, each with a source and a target connection
+VALIDATION_SCRIPT_DIR = "/tmp/mcp_validation" # Per-script workspaces, removed once the script finishes
+VALIDATION_SCRIPT_TIMEOUT = 300 # Wall-clock seconds per script
+VALIDATION_SCRIPT_CPU_SECONDS = 120 # CPU seconds per script (RLIMIT_CPU)
+VALIDATION_SCRIPT_MEMORY_MB = 1024 # Address space per script (RLIMIT_AS)
+VALIDATION_SCRIPT_MAX_JOBS = 100 # Scripts a worker runs before it is replaced
+VALIDATION_SCRIPT_MAX_ROWS = 100 # Rows returned per database and statement for SQL scripts
+
+# --- Database Connection Pools (MCP Server) ---
+DB_POOL_MIN_SIZE = 1 # Connections kept warm per database
+DB_POOL_MAX_SIZE = 16 # Upper bound on open connections per database
+DB_POOL_IDLE_TIMEOUT = 300 # Seconds before surplus idle connections are closed
+DB_POOL_HEALTH_CHECK_INTERVAL = 30 # Ping connections idle for longer than this before reuse
+DB_POOL_ACQUIRE_TIMEOUT = 60 # Seconds to wait for a free connection
+DB_QUERY_TIMEOUT = 300 # Seconds; socket read/write timeout per query
+CLOUD_SQL_ENDPOINT_CACHE_TTL = 3600 # Seconds to cache the resolved Cloud SQL IP
+
+# --- Secrets ---
+SECRETS_BACKEND = os.environ.get("MIGRATION_SECRETS_BACKEND", "gcp") # "gcp" (Secret Manager) or "local" (env/file)
+SECRETS_LOCAL_FILE = os.environ.get("MIGRATION_SECRETS_FILE", "secrets.local.json") # Used by the "local" backend
+SECRETS_CACHE_TTL = 300 # Seconds a fetched secret is reused before re-reading it
+SECRETS_FETCH_WORKERS = 8 # Concurrent fetches for bulk secret loading
+
+# --- Schema Extraction ---
+SCHEMA_CACHE_DIR = ".schema_cache" # Per-database cache of extracted DDL, keyed by CREATE_TIME/UPDATE_TIME
+SCHEMA_PAGE_SIZE = 500 # Tables returned per get_source_schema call
+
+# --- Schema Conversion ---
+TARGET_COLLATION = "utf8mb4_unicode_ci" # Collation used when normalising legacy character sets
+DDL_EXTRA_RULES = [] # Additional DdlRule implementations, as "package.module:attribute"
+CONVERTED_SCHEMA_DIR = "converted_schema" # Where convert_schema writes the DDL script and change report
+
+# --- Dump Planning (mydumper / myloader) ---
+DUMP_TARGET_CHUNK_MB = 256 # Approximate uncompressed size of one primary-key row chunk
+DUMP_MIN_CHUNK_ROWS = 10000 # Lower bound for mydumper --rows
+DUMP_CHUNK_FILESIZE_MB = 128 # mydumper --chunk-filesize
+DUMP_THREADS_PER_CPU = 2 # Dump/load threads per orchestrator vCPU (e2-medium has 2)
+DUMP_THREAD_MBPS = 40 # Expected throughput of one dump thread, MB/s
+ORCHESTRATOR_NETWORK_MBPS = 250 # Usable network bandwidth of the orchestrator VM, MB/s
+SOURCE_MAX_DUMP_THREADS = 8 # Most dump threads the legacy source may serve at once
+SOURCE_RESERVED_CONNECTIONS = 10 # Source connections left free for applications
+TARGET_MAX_LOAD_THREADS = 4 # myloader threads for the Cloud SQL tier (about 2 per vCPU)
+
+# --- Source Sizing and Strategy Estimates ---
+SOURCE_SIZE_CACHE_TTL = 600 # Seconds a get_source_db_size result is reused before the source is queried again
+SOURCE_SIZE_TABLE_LIMIT = 100 # Largest tables listed by get_source_db_size (all are used for the estimates)
+BLOB_DUMP_EXPANSION = 2.0 # Growth of BLOB/TEXT-heavy tables when written out as escaped SQL
+LOAD_THREAD_MBPS = 15 # Expected throughput of one myloader thread, MB/s, including index builds
+GCS_IMPORT_MBPS = 30 # Cloud SQL import throughput; an instance runs one import at a time
+GCS_IMPORT_FILE_OVERHEAD_SECONDS = 20 # Per-file operation setup of gcloud sql import
+DMS_MBPS = 60 # DMS full-dump throughput
+DMS_SETUP_SECONDS = 900 # DMS job start, connectivity checks and snapshot setup
+
+# --- Dump -> GCS -> Cloud SQL Pipeline ---
+GCLOUD_BIN = os.environ.get("MIGRATION_GCLOUD_BIN", "gcloud") # Point at a fake gcloud for offline runs
+PIPELINE_STORAGE_URI = os.environ.get("MIGRATION_STORAGE_URI") # Defaults to gs://<project><suffix>; "file:///path" for a local stand-in
+PIPELINE_UPLOAD_WORKERS = 4 # Concurrent uploads to the migration bucket
+PIPELINE_UPLOAD_RETRIES = 3 # Attempts per file
+PIPELINE_FILE_SETTLE_SECONDS = 10 # A dump file is treated as finished once unchanged for this long
+PIPELINE_POLL_INTERVAL = 5 # Seconds between scans of the dump directory
+ZSTD_BIN = os.environ.get("MIGRATION_ZSTD_BIN", "zstd") # Decompresses mydumper --compress=ZSTD output before the upload
+
+# --- Binlog Catch-up (after a mydumper-based load) ---
+BINLOG_CATCHUP_ENABLED = True # Replay source changes made since the dump until the target has caught up
+BINLOG_CATCHUP_SERVER_ID = int(os.getenv("MIGRATION_BINLOG_SERVER_ID", "4242")) # Replica server id; concurrent catch-ups of a batch use the ids after it. Must not clash with the source's replicas
+BINLOG_CATCHUP_BATCH_ROWS = 5000 # Row changes per applied batch; batches end on transaction boundaries
+BINLOG_CATCHUP_BATCH_SECONDS = 2 # A batch is applied after this long even if it is not full
+BINLOG_CATCHUP_WORKERS = 4 # Tables of one batch applied concurrently
+BINLOG_CATCHUP_POLL_SECONDS = 1 # Wait at the end of the binlog before reading again
+BINLOG_CATCHUP_MAX_LAG_SECONDS = 5 # At or below this lag the target counts as caught up
+
+# --- Run State (checkpoint / resume) ---
+RUN_STATE_DB = os.getenv("MIGRATION_RUN_STATE_DB", ".run_state/runs.sqlite")
+
+# --- Orchestration ---
+ORCHESTRATION_MODE = "phases" # "phases" (deterministic state machine) or "groupchat" (RoundRobinGroupChat)
+ORCHESTRATOR_POLL_SECONDS = 30
+ORCHESTRATOR_MAX_RETRIES = 1 # Per phase, only when the anomaly agent judges the failure transient
+GCS_IMPORT_MAX_GB = 100 # GCS Import is only considered below this size
+DMS_MAX_GB = 500 # DMS is only considered up to this size; the fastest estimated strategy is chosen
+DMS_JOB_ID = None # Database Migration Service job to start for the DMS strategy
+DUMP_OUTPUT_DIR = "/tmp/mydumper_output"
+
+# --- Batch Migrations (several databases per run) ---
+BATCH_MAX_SOURCE_JOBS = 2 # Databases dumped or validated at the same time; they split the source's dump threads and validation workers
+BATCH_MAX_LOADS_PER_INSTANCE = 1 # Databases loading into one Cloud SQL instance at a time; they split its load threads
+BATCH_MAX_ACTIVE_DATABASES = 4 # Databases migrating at the same time; each holds a source connection pool (up to DB_POOL_MAX_SIZE) and a binlog stream until it finishes
+
+# --- Terraform ---
+TERRAFORM_BIN = os.getenv("MIGRATION_TERRAFORM_BIN", "terraform")
+TERRAFORM_CACHE_DIR = ".terraform_cache" # Saved plans and fingerprints of the last init/apply
+TERRAFORM_PLUGIN_CACHE_DIR = os.path.expanduser("~/.terraform.d/plugin-cache")
+TERRAFORM_PARALLELISM = 10 # terraform's own default
+
+# --- Tool Output Artifacts ---
+ARTIFACT_DIR = "/tmp/mcp_artifacts"
+ARTIFACT_RETENTION_SECONDS = 7 * 24 * 60 * 60
+ARTIFACT_INLINE_BYTES = 2048 # Smaller outputs are returned inline as well as stored
+ARTIFACT_TAIL_LINES = 10
+ARTIFACT_SLICE_LINES = 200
+
+# --- Anomaly Detection ---
+ANOMALY_BASELINE_FILE = ".anomaly_baselines.json" # Rolling per-tool baselines carried across runs
+ANOMALY_BASELINE_ALPHA = 0.2 # Weight of the newest run in the rolling mean/variance
+ANOMALY_BASELINE_SAVE_SECONDS = 30 # Baselines learned from commands are saved at most this often; finished jobs save at once
+ANOMALY_MIN_SAMPLES = 3 # Baseline checks start after this many successful runs
+ANOMALY_STDDEV_FACTOR = 3.0
+ANOMALY_EVENT_BUFFER = 500
+ANOMALY_WARMUP_SECONDS = 120 # Ignore throughput of a job before it has been running this long
+ANOMALY_STALL_SECONDS = 600 # No progress in bytes for this long flags a stalled job
+ANOMALY_MIN_THROUGHPUT_BPS = 1024 * 1024
+# Hard upper limits per tool, in seconds, regardless of baseline
+ANOMALY_DURATION_LIMITS = {
+    "provision_infra": 45 * 60,
+    "apply_schema": 15 * 60,
+    "get_gcp_project_state": 60,
+}
+# stderr patterns per tool family; a match is reported once per command/job with a running count
+ANOMALY_STDERR_PATTERNS = {
+    "mydumper": r"\b(CRITICAL|ERROR)\b|Lock wait timeout|Lost connection",
+    "myloader": r"\b(CRITICAL|ERROR)\b|Deadlock found|Lock wait timeout|Lost connection",
+    "gcloud": r"^ERROR:|PERMISSION_DENIED|RESOURCE_EXHAUSTED|quota",
+    "terraform": r"^(│ )?Error:",
+    "default": r"\b(ERROR|FATAL)\b|Traceback",
+}
+
+# --- Telemetry ---
+TELEMETRY_DIR = os.getenv("MIGRATION_TELEMETRY_DIR", ".telemetry") # <run_id>/spans.jsonl and <run_id>/summary.json
+TELEMETRY_SAMPLE_SECONDS = 1.0 # How often subprocess RSS and CPU are sampled from /proc
+TELEMETRY_SPAN_BUFFER = 1000 # Recent spans kept in memory
+TELEMETRY_METRICS_MAX_TABLES = 200 # Per-table series on /metrics, slowest tables first
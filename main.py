@@ -1,6 +1,7 @@
 # gcp-agentic-migration/main.py
 import argparse
 import asyncio
+import json
 import autogen_agentchat as ag
 from modelcontextprotocol.client.ws import McpWsClient
 
@@ -11,9 +12,11 @@ from agents.validation_agent import build_validation_agent
 from agents.anomaly_agent import build_anomaly_agent
 from agents.optimization_agent import build_optimization_agent
 from utils.gcp_secrets import get_secret
+from orchestrator import BatchOrchestrator, MigrationOrchestrator
 import config
 
-async def main(volume: int, encryption: str):
+async def main(volume: int, encryption: str, resume_run_id: str = None, mode: str = config.ORCHESTRATION_MODE,
+               databases: list = None, instances: list = None):
     # 1. Configure LLM
     if "openai" in config.LLM_PROVIDER:
         api_key = get_secret(config.OPENAI_API_KEY_SECRET)
@@ -32,7 +35,54 @@ async def main(volume: int, encryption: str):
     mcp_client = McpWsClient(url="ws://localhost:8000/mcp")
     await mcp_client.connect()
 
+    if not databases and resume_run_id:
+        previous = await mcp_client.resources.get_run_state(run_id=resume_run_id)
+        batch = previous.get("status") == "success" and "batch" in previous["data"]["params"]
+    else:
+        batch = bool(databases)
+    if batch and mode != "phases":
+        raise ValueError("Batch runs (--databases) are only supported with --mode phases")
+
+    # Start (or resume) the durable run record; the MCP server checkpoints every phase against it.
+    if batch:
+        run = await mcp_client.tools.start_batch_run(databases=databases, instances=instances, run_id=resume_run_id,
+                                                     params={"encryption": encryption})
+    else:
+        run = await mcp_client.tools.start_run(run_id=resume_run_id, params={"volume": volume, "encryption": encryption})
+    if run.get("status") != "success":
+        raise ValueError(run.get("message", f"Could not start run {resume_run_id}"))
+    run_state = run["data"]
+    run_id = run_state["run_id"]
+    volume = volume if volume is not None else run_state["params"].get("volume")
+    encryption = encryption or run_state["params"].get("encryption")
+    print(f"Migration run {run_id} (resume with --resume {run_id})")
+
     # 3. Build the Agent Team
+    setup_agent = build_setup_agent(mcp_client, llm_config)
+    schema_agent = build_schema_agent(mcp_client, llm_config)
+    migration_agent = build_migration_agent(mcp_client, llm_config)
+    validation_agent = build_validation_agent(mcp_client, llm_config)
+    anomaly_agent = build_anomaly_agent(llm_config, mcp_client)
+    optimization_agent = build_optimization_agent(llm_config, mcp_client)
+
+    if mode == "phases":
+        # Deterministic phase graph: tools are called directly, agents only at decision points.
+        agents = {agent.name: agent for agent in [setup_agent, schema_agent, migration_agent, validation_agent, anomaly_agent, optimization_agent]}
+        if batch:
+            orchestrator = BatchOrchestrator(mcp_client, agents, encryption, run_state)
+            keys = ("databases", "phase_seconds", "wall_seconds", "llm_calls", "llm_prompt_chars")
+        else:
+            orchestrator = MigrationOrchestrator(mcp_client, agents, volume, encryption, run_state)
+            keys = ("phase_seconds", "wall_seconds", "critical_path", "llm_calls", "llm_prompt_chars")
+        outcome = await orchestrator.run()
+        if outcome["succeeded"] and outcome["results"].get("report"):
+            print(outcome["results"]["report"])
+        print(json.dumps({key: outcome[key] for key in keys}))
+        print(outcome["message"])
+        await mcp_client.tools.finish_run(status="done" if outcome["succeeded"] else "failed")
+        await mcp_client.close()
+        return
+
     user_proxy = ag.UserProxyAgent(
         name="User_Proxy",
         human_input_mode="NEVER",
@@ -41,13 +91,6 @@ async def main(volume: int, encryption: str):
         code_execution_config=False,
     )
 
-    setup_agent = build_setup_agent(mcp_client, llm_config)
-    schema_agent = build_schema_agent(mcp_client, llm_config)
-    migration_agent = build_migration_agent(mcp_client, llm_config)
-    validation_agent = build_validation_agent(mcp_client, llm_config)
-    anomaly_agent = build_anomaly_agent(llm_config)
-    optimization_agent = build_optimization_agent(llm_config)
-
     # 4. Define the Group Chat
     groupchat = ag.RoundRobinGroupChat(
         agents=[user_proxy, setup_agent, schema_agent, migration_agent, validation_agent, anomaly_agent, optimization_agent],
@@ -67,21 +110,43 @@ async def main(volume: int, encryption: str):
     3. The Data_Migration_Agent must select the correct strategy based on the volume ({volume} GB) and migrate the data.
     4. The Data_Validation_Agent must verify the integrity of the migrated data.
     5. The Performance_Optimization_Agent must provide a final report after the migration is complete.
-    6. The Anomaly_Detection_Agent must monitor the entire process for errors.
+    6. The Anomaly_Detection_Agent must check the `get_anomalies` resource after each step and diagnose anything it reports.
     7. If all steps are successful, the final message must include the phrase 'MIGRATION COMPLETE'. If any step fails critically, end with 'TASK FAILED'.
     """
+    if resume_run_id:
+        initial_task += f"""
+    This is a resumed run ({run_id}). Do not start over: tools skip phases that are already done (their result has
+    "skipped": true) and only redo the tables or files that did not complete. Continue from the first phase
+    that is not 'done'.
+    Phase status: {json.dumps({phase: state["status"] for phase, state in run_state["phases"].items()})}
+    Incomplete units: {json.dumps(run_state["incomplete_units"])}
+    """
 
-    await user_proxy.a_initiate_chat(
+    chat_result = await user_proxy.a_initiate_chat(
         manager,
         message=initial_task,
     )
 
+    # An interrupted run is left 'running' so it can be resumed; a finished one is closed either way.
+    last_message = (chat_result.chat_history or [{}])[-1].get("content", "").upper()
+    await mcp_client.tools.finish_run(status="done" if "MIGRATION COMPLETE" in last_message else "failed")
+
     await mcp_client.close()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run Agentic MySQL to Cloud SQL Migration.")
-    parser.add_argument("--volume", type=int, required=True, help="Estimated volume of the database in GB.")
-    parser.add_argument("--encryption", type=str, required=True, choices=['legacy', 'gcp-recommended'], help="Encryption strategy to use.")
+    parser.add_argument("--volume", type=int, help="Estimated volume of the database in GB.")
+    parser.add_argument("--encryption", type=str, choices=['legacy', 'gcp-recommended'], help="Encryption strategy to use.")
+    parser.add_argument("--resume", type=str, metavar="RUN_ID", help="Resume a previous run, skipping completed phases, tables and files.")
+    parser.add_argument("--mode", type=str, default=config.ORCHESTRATION_MODE, choices=['phases', 'groupchat'], help="'phases' runs a deterministic phase orchestrator that consults agents only at decision points; 'groupchat' runs all agents in a round-robin chat.")
+    parser.add_argument("--databases", type=lambda value: value.split(","), metavar="DB1,DB2", help="Migrate several databases of the legacy host in one batch run (phases mode only); the volume of each is measured.")
+    parser.add_argument("--instances", type=lambda value: value.split(","), metavar="INSTANCE1,INSTANCE2", help="Cloud SQL instances to spread a batch over (default: config.CLOUD_SQL_INSTANCE_NAME and config.CLOUD_SQL_ADDITIONAL_INSTANCES).")
     args = parser.parse_args()
-    
-    asyncio.run(main(args.volume, args.encryption))
\ No newline at end of file
+    if args.databases and args.mode != "phases":
+        parser.error("--databases requires --mode phases")
+    if not args.resume and args.encryption is None:
+        parser.error("--encryption is required unless --resume is given")
+    if not args.resume and not args.databases and args.volume is None:
+        parser.error("--volume is required unless --resume or --databases is given")
+
+    asyncio.run(main(args.volume, args.encryption, args.resume, args.mode, args.databases, args.instances))
\ No newline at end of file
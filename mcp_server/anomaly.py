@@ -0,0 +1,229 @@
+# gcp-agentic-migration/mcp_server/anomaly.py
+
+import collections
+import json
+import math
+import os
+import re
+import time
+from.. import config
+from.telemetry import FileWriter
+
+TOOL_FAMILIES = {
+    "provision_infra": "terraform",
+    "destroy_infra": "terraform",
+    "get_gcp_project_state": "gcloud",
+    "run_gcs_import": "gcloud",
+    "run_dms_job": "gcloud",
+    "pipeline_upload": "gcloud",
+    "pipeline_import": "gcloud",
+    "mydumper": "mydumper",
+    "myloader": "myloader",
+}
+
+
+class RollingBaseline:
+    """Exponentially weighted mean and variance, so recent runs count more than old ones."""
+
+    def __init__(self, count=0, mean=0.0, variance=0.0):
+        self.count = count
+        self.mean = mean
+        self.variance = variance
+
+    def add(self, value, alpha=config.ANOMALY_BASELINE_ALPHA):
+        if self.count == 0:
+            self.mean, self.variance = value, 0.0
+        else:
+            delta = value - self.mean
+            self.mean += alpha * delta
+            self.variance = (1 - alpha) * (self.variance + alpha * delta * delta)
+        self.count += 1
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "variance": self.variance}
+
+
+class AnomalyDetector:
+    """
+    Rule-based detector fed with structured events from the handlers and background jobs.
+
+    Rules: non-zero return codes, stderr patterns per tool family, hard duration limits,
+    durations above (or throughput below) the rolling baseline by ANOMALY_STDDEV_FACTOR
+    standard deviations, throughput below ANOMALY_MIN_THROUGHPUT_BPS, and jobs whose
+    byte counter stops moving. Baselines learn from successful runs only and are saved
+    to ANOMALY_BASELINE_FILE, by a background writer, so the next run starts with them. Anomalies of a job or command
+    that works on one migrated database carry it as `database`.
+    """
+
+    def __init__(self, baseline_path=config.ANOMALY_BASELINE_FILE):
+        self.baseline_path = baseline_path
+        self.baselines = self._load_baselines()
+        self.anomalies = collections.deque(maxlen=config.ANOMALY_EVENT_BUFFER)
+        self.patterns = {family: re.compile(pattern) for family, pattern in config.ANOMALY_STDERR_PATTERNS.items()}
+        self._seq = 0
+        self._commands = 0
+        self._open = {}  # (source, rule) -> anomaly, for repeat counting while the job or command runs
+        self._progress = {}  # job id -> (bytes_done, time it last changed)
+        self.writer = FileWriter()
+        self._baselines_saved = 0.0  # monotonic time of the last save
+
+    # --- Baselines ---
+    def _load_baselines(self):
+        if not self.baseline_path or not os.path.exists(self.baseline_path):
+            return {}
+        try:
+            with open(self.baseline_path) as f:
+                return {key: RollingBaseline(**value) for key, value in json.load(f).items()}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            # A damaged file must not keep the server from starting; the baselines are relearned.
+            print(f"Ignoring unreadable anomaly baselines in {self.baseline_path}: {e}")
+            return {}
+
+    def save_baselines(self):
+        """Queues the baselines for the writer thread; call writer.wait() to have them on disk."""
+        if not self.baseline_path:
+            return
+        # The writer renames a temporary file over the old one, so a crash mid-write leaves the previous baselines.
+        self.writer.submit(os.path.abspath(self.baseline_path), "w",
+                           json.dumps({key: baseline.to_dict() for key, baseline in self.baselines.items()}, indent=2))
+        self._baselines_saved = time.monotonic()
+
+    def _learn(self, key, value):
+        self.baselines.setdefault(key, RollingBaseline()).add(value)
+
+    def _deviates(self, key, value, higher_is_worse=True):
+        """Returns the threshold `value` crossed, or None. Needs ANOMALY_MIN_SAMPLES observations."""
+        baseline = self.baselines.get(key)
+        if baseline is None or baseline.count < config.ANOMALY_MIN_SAMPLES:
+            return None
+        # Floor the spread at 10% of the mean so a very stable baseline does not flag noise.
+        spread = config.ANOMALY_STDDEV_FACTOR * max(baseline.stddev, 0.1 * abs(baseline.mean))
+        if higher_is_worse and value > baseline.mean + spread:
+            return baseline.mean + spread
+        if not higher_is_worse and value < baseline.mean - spread:
+            return baseline.mean - spread
+        return None
+
+    # --- Anomalies ---
+    # Conditions of a running job: flagged once while they last (repeats only count), and again
+    # only after they have cleared.
+    ONGOING_RULES = ("stalled", "low_throughput", "throughput_below_baseline")
+
+    def _fire(self, source, rule, severity, message, **data):
+        key = (source, rule)
+        if key in self._open and (rule.startswith("stderr") or rule in self.ONGOING_RULES):
+            anomaly = self._open[key]
+            anomaly["count"] += 1
+            anomaly["last_seen"] = time.time()
+            anomaly.update(data)
+            return anomaly
+        self._seq += 1
+        anomaly = {"seq": self._seq, "time": time.time(), "last_seen": time.time(), "source": source, "rule": rule,
+                   "severity": severity, "message": message, "count": 1, **data}
+        self.anomalies.append(anomaly)
+        self._open[key] = anomaly
+        return anomaly
+
+    def _clear(self, source, rule):
+        self._open.pop((source, rule), None)
+
+    def _close_source(self, source):
+        """Forgets the open anomalies of a finished job or command; nothing repeats them any more."""
+        for key in [key for key in self._open if key[0] == source]:
+            del self._open[key]
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def since(self, seq=0, min_severity=None):
+        levels = {"info": 0, "warning": 1, "error": 2}
+        floor = levels.get(min_severity, 0)
+        return [dict(anomaly) for anomaly in self.anomalies
+                if anomaly["seq"] > seq and levels[anomaly["severity"]] >= floor]
+
+    def _check_stderr(self, source, family, lines, database=None):
+        pattern = self.patterns.get(family) or self.patterns.get("default")
+        if pattern is None:
+            return
+        for line in lines:
+            if pattern.search(line):
+                self._fire(source, f"stderr:{family}", "warning", f"{family} reported an error on stderr.", last_line=line[:500],
+                           database=database)
+
+    # --- Event sources ---
+    def observe_command(self, tool, result, database=None):
+        """A finished synchronous command (run_command result), of `database` if it works on one."""
+        self._commands += 1
+        source = f"{tool}:{self._commands}"
+        family = TOOL_FAMILIES.get(tool, "default")
+        duration = result.get("duration_seconds")
+        if result.get("returncode") not in (0, None) or result.get("status") == "error":
+            self._fire(source, "nonzero_returncode", "error", f"{tool} exited with return code {result.get('returncode')}.",
+                       tool=tool, returncode=result.get("returncode"), stderr_tail=(result.get("stderr") or "")[-500:], database=database)
+        self._check_stderr(source, family, (result.get("stderr") or "").splitlines(), database)
+        if duration is not None:
+            limit = config.ANOMALY_DURATION_LIMITS.get(tool)
+            if limit and duration > limit:
+                self._fire(source, "duration_limit", "warning", f"{tool} took {duration:.0f}s, over its {limit}s limit.",
+                           tool=tool, value=duration, threshold=limit, database=database)
+            threshold = self._deviates(f"{tool}.duration", duration)
+            if threshold is not None:
+                self._fire(source, "slow", "warning", f"{tool} took {duration:.0f}s; its baseline allows up to {threshold:.0f}s.",
+                           tool=tool, value=duration, threshold=round(threshold, 1), database=database)
+            if result.get("status") == "success":
+                self._learn(f"{tool}.duration", duration)
+                # Commands are frequent; the next save (or a finished job's) carries what is skipped here.
+                if time.monotonic() - self._baselines_saved >= config.ANOMALY_BASELINE_SAVE_SECONDS:
+                    self.save_baselines()
+        self._close_source(source)
+
+    def job_line(self, job, stream, line):
+        if stream == "stderr":
+            self._check_stderr(f"{job.name}:{job.id}", TOOL_FAMILIES.get(job.name, "default"), [line], job.database)
+
+    def job_progress(self, job, sample):
+        source = f"{job.name}:{job.id}"
+        now = time.time()
+        bytes_done = sample.get("bytes_done") or 0
+        last_bytes, last_change = self._progress.get(job.id, (None, now))
+        if bytes_done != last_bytes:
+            self._progress[job.id] = (bytes_done, now)
+            self._clear(source, "stalled")
+        elif now - last_change >= config.ANOMALY_STALL_SECONDS:
+            self._fire(source, "stalled", "warning", f"{job.name} has made no progress for {now - last_change:.0f}s.",
+                       job_id=job.id, bytes_done=bytes_done, database=job.database)
+        rate = sample.get("bytes_per_second")
+        if rate is None or (sample.get("elapsed_seconds") or 0) < config.ANOMALY_WARMUP_SECONDS:
+            return
+        if rate < config.ANOMALY_MIN_THROUGHPUT_BPS:
+            self._fire(source, "low_throughput", "warning", f"{job.name} throughput is {rate / 1048576:.2f} MB/s.",
+                       job_id=job.id, value=rate, threshold=config.ANOMALY_MIN_THROUGHPUT_BPS, database=job.database)
+        else:
+            self._clear(source, "low_throughput")
+        threshold = self._deviates(f"{job.name}.bytes_per_second", rate, higher_is_worse=False)
+        if threshold is None:
+            self._clear(source, "throughput_below_baseline")
+        else:
+            self._fire(source, "throughput_below_baseline", "warning",
+                       f"{job.name} throughput {rate / 1048576:.2f} MB/s is below its baseline floor of {threshold / 1048576:.2f} MB/s.",
+                       job_id=job.id, value=rate, threshold=round(threshold), database=job.database)
+
+    def job_finished(self, job):
+        source = f"{job.name}:{job.id}"
+        self._progress.pop(job.id, None)
+        self._close_source(source)
+        if job.status != "success":
+            self._fire(source, "nonzero_returncode", "error" if job.status == "error" else "info",
+                       f"{job.name} job ended with status '{job.status}' (return code {job.returncode}).",
+                       job_id=job.id, returncode=job.returncode, stderr_tail=list(job.stderr_tail)[-5:], database=job.database)
+            return
+        rate = (job.last_progress or {}).get("bytes_per_second")
+        if rate:
+            self._learn(f"{job.name}.bytes_per_second", rate)
+        self._learn(f"{job.name}.duration", job.finished_at - job.started_at)
+        self.save_baselines()
@@ -0,0 +1,136 @@
+# gcp-agentic-migration/mcp_server/artifacts.py
+
+import json
+import os
+import re
+import time
+import uuid
+from.. import config
+
+ERROR_RE = re.compile(r"\b(error|fatal|critical|exception|traceback|denied|failed)\b", re.IGNORECASE)
+WARNING_RE = re.compile(r"\bwarn(ing)?\b", re.IGNORECASE)
+
+TERRAFORM_COUNTS = [
+    (re.compile(r"Plan: (\d+) to add, (\d+) to change, (\d+) to destroy"), ("to_add", "to_change", "to_destroy")),
+    (re.compile(r"Apply complete! Resources: (\d+) added, (\d+) changed, (\d+) destroyed"), ("added", "changed", "destroyed")),
+    (re.compile(r"Destroy complete! Resources: (\d+) destroyed"), ("destroyed",)),
+]
+
+# Fields worth keeping from `gcloud ... --format=json` output; everything else stays in the artifact.
+GCLOUD_FIELDS = ["name", "state", "databaseVersion", "settings.tier", "ipAddresses", "region", "status", "error"]
+
+
+class ArtifactStore:
+    """
+    Keeps raw tool output on disk under an id so that only a summary travels back to the agents.
+    Each artifact is <id>.stdout, <id>.stderr and <id>.meta.json; artifacts older than
+    ARTIFACT_RETENTION_SECONDS are pruned when the store is opened.
+    """
+
+    STREAMS = ("stdout", "stderr")
+
+    def __init__(self, root=config.ARTIFACT_DIR, retention=config.ARTIFACT_RETENTION_SECONDS):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._prune(retention)
+
+    def _prune(self, retention):
+        cutoff = time.time() - retention
+        for entry in os.scandir(self.root):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+    def _path(self, artifact_id, suffix):
+        if not re.fullmatch(r"[0-9a-f]{12}", artifact_id):
+            raise KeyError(f"Unknown artifact: {artifact_id}")
+        return os.path.join(self.root, f"{artifact_id}.{suffix}")
+
+    def put(self, tool, streams: dict, meta: dict = None):
+        artifact_id = uuid.uuid4().hex[:12]
+        for stream in self.STREAMS:
+            with open(self._path(artifact_id, stream), "w") as f:
+                f.write(streams.get(stream) or "")
+        with open(self._path(artifact_id, "meta.json"), "w") as f:
+            json.dump({"tool": tool, "created_at": time.time(), **(meta or {})}, f)
+        return artifact_id
+
+    def read(self, artifact_id, stream="stdout", offset=0, limit=config.ARTIFACT_SLICE_LINES, grep=None):
+        """Returns lines [offset, offset+limit) of a stream, optionally only those matching `grep`."""
+        if stream not in self.STREAMS:
+            raise ValueError(f"Unknown stream: {stream}")
+        path = self._path(artifact_id, stream)
+        if not os.path.exists(path):
+            raise KeyError(f"Unknown artifact: {artifact_id}")
+        with open(self._path(artifact_id, "meta.json")) as f:
+            meta = json.load(f)
+        return {"artifact_id": artifact_id, "tool": meta["tool"], "stream": stream, **read_lines(path, offset, limit, grep)}
+
+
+def read_lines(path, offset=0, limit=config.ARTIFACT_SLICE_LINES, grep=None):
+    """A window of a text file's lines (after filtering by the `grep` regex), with 1-based line numbers."""
+    pattern = re.compile(grep) if grep else None
+    lines, total = [], 0
+    with open(path, errors="replace") as f:
+        for number, line in enumerate(f):
+            if pattern and not pattern.search(line):
+                continue
+            if offset <= total < offset + limit:
+                lines.append({"line": number + 1, "text": line.rstrip("\n")})
+            total += 1
+    next_offset = offset + len(lines) if offset + len(lines) < total else None
+    return {"total_lines": total, "offset": offset, "next_offset": next_offset, "lines": lines}
+
+
+def _pick(document, dotted):
+    for part in dotted.split("."):
+        if not isinstance(document, dict) or part not in document:
+            return None
+        document = document[part]
+    return document
+
+
+def key_counts(tool, stdout, stderr):
+    """Tool-specific figures pulled out of raw output (terraform resource counts, gcloud JSON fields)."""
+    counts = {}
+    text = f"{stdout}\n{stderr}"
+    if tool in ("provision_infra", "destroy_infra"):
+        for pattern, names in TERRAFORM_COUNTS:
+            match = pattern.search(text)
+            if match:
+                counts.update({name: int(value) for name, value in zip(names, match.groups())})
+    stripped = stdout.strip()
+    if stripped.startswith("{"):
+        try:
+            document = json.loads(stripped)
+        except ValueError:
+            document = None
+        if isinstance(document, dict):
+            counts.update({field: value for field in GCLOUD_FIELDS if (value := _pick(document, field)) is not None})
+    lines = text.splitlines()
+    counts["error_lines"] = sum(1 for line in lines if ERROR_RE.search(line))
+    counts["warning_lines"] = sum(1 for line in lines if WARNING_RE.search(line))
+    return counts
+
+
+def summarize_result(store, tool, result, tail_lines=config.ARTIFACT_TAIL_LINES):
+    """
+    Replaces stdout/stderr in a command result with a compact summary and an artifact id.
+    Outputs under ARTIFACT_INLINE_BYTES are kept inline as well, since fetching them would cost more.
+    """
+    if not isinstance(result, dict) or ("stdout" not in result and "stderr" not in result):
+        return result
+    stdout, stderr = result.get("stdout") or "", result.get("stderr") or ""
+    summary = {key: value for key, value in result.items() if key not in ("stdout", "stderr")}
+    summary["artifact_id"] = store.put(tool, {"stdout": stdout, "stderr": stderr},
+                                       {"status": result.get("status"), "returncode": result.get("returncode")})
+    summary["stdout_lines"] = stdout.count("\n") + bool(stdout and not stdout.endswith("\n"))
+    summary["stderr_lines"] = stderr.count("\n") + bool(stderr and not stderr.endswith("\n"))
+    summary["key_counts"] = key_counts(tool, stdout, stderr)
+    if len(stdout) + len(stderr) <= config.ARTIFACT_INLINE_BYTES:
+        summary["stdout"], summary["stderr"] = stdout, stderr
+        return summary
+    error_lines = [line for line in (stderr + "\n" + stdout).splitlines() if ERROR_RE.search(line)]
+    summary["last_error_lines"] = error_lines[-tail_lines:]
+    summary["stderr_tail"] = stderr.splitlines()[-tail_lines:]
+    summary["stdout_tail"] = stdout.splitlines()[-tail_lines:]
+    return summary
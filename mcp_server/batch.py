@@ -0,0 +1,43 @@
+# gcp-agentic-migration/mcp_server/batch.py
+
+import heapq
+from.. import config
+
+
+class DatabaseScope:
+    """
+    What the per-database tools work against: the source database, the Cloud SQL instance
+    it moves to, the run checkpoint its phases and units are recorded in, and a source
+    connection pool opened on that database.
+
+    A single-database run has one implicit scope (LEGACY_DB_NAME_SECRET onto
+    CLOUD_SQL_INSTANCE_NAME, checkpointed in the active run). A batch run has one scope
+    per database, each with its own child run, so every database resumes on its own.
+    """
+
+    def __init__(self, database, instance, checkpoint, source_pool):
+        self.database = database
+        self.instance = instance
+        self.checkpoint = checkpoint
+        self.source_pool = source_pool
+
+
+def batch_instances():
+    """Every Cloud SQL instance provision_infra manages: the primary one, then CLOUD_SQL_ADDITIONAL_INSTANCES."""
+    return [config.CLOUD_SQL_INSTANCE_NAME, *config.CLOUD_SQL_ADDITIONAL_INSTANCES]
+
+
+def assign_instances(sizes, instances):
+    """
+    Spreads databases over target instances by size: largest database first onto the
+    instance with the fewest bytes so far, so the serial per-instance loads finish at
+    roughly the same time. `sizes` maps database -> bytes; returns database -> instance.
+    """
+    heap = [(0, index, instance) for index, instance in enumerate(instances)]
+    heapq.heapify(heap)
+    assignment = {}
+    for database in sorted(sizes, key=lambda name: (-sizes[name], name)):
+        assigned, index, instance = heapq.heappop(heap)
+        assignment[database] = instance
+        heapq.heappush(heap, (assigned + sizes[database], index, instance))
+    return assignment
@@ -0,0 +1,536 @@
+# gcp-agentic-migration/mcp_server/binlog_catchup.py
+
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import re
+import time
+import uuid
+from pymysqlreplication import BinLogStreamReader
+from pymysqlreplication.event import QueryEvent, RotateEvent, XidEvent
+from pymysqlreplication.row_event import DeleteRowsEvent, UpdateRowsEvent, WriteRowsEvent
+from.. import config
+from.executor import run_blocking
+from.telemetry import Tracer
+from..utils.run_state import RunCheckpoint, RUNNING, DONE, FAILED
+
+# mydumper < 0.13 writes "SHOW MASTER STATUS:\n\tLog: binlog.000002\n\tPos: 157"; later versions an
+# ini-style "[master]" (or "[source]") section with "File = binlog.000002" and "Position = 157".
+_LEGACY_POSITION = re.compile(r"SHOW (?:MASTER|BINARY LOG) STATUS:\s*\n\s*Log:\s*(\S+)\s*\n\s*Pos:\s*(\d+)")
+_INI_POSITION = re.compile(r"^\[(?:master|source)\][^\[]*?^\s*File\s*=\s*['\"]?([^'\"\s]+)['\"]?\s*$"
+                           r"[^\[]*?^\s*Position\s*=\s*['\"]?(\d+)", re.MULTILINE)
+_DDL = re.compile(r"^\s*(ALTER|CREATE|DROP|RENAME|TRUNCATE)\b", re.IGNORECASE)
+_GENERATED = re.compile(r"\b(VIRTUAL|STORED) GENERATED\b", re.IGNORECASE)
+MAX_CASCADE_DEPTH = 15  # InnoDB's own limit on nested foreign key cascades
+
+
+def read_dump_position(dump_dir):
+    """The binlog position mydumper recorded for its snapshot, as {"log_file", "log_pos"}, or None."""
+    path = os.path.join(dump_dir, "metadata")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        text = f.read()
+    match = _LEGACY_POSITION.search(text) or _INI_POSITION.search(text)
+    if not match:
+        return None
+    return {"log_file": match.group(1), "log_pos": int(match.group(2))}
+
+
+def earliest_position(*positions):
+    """Binlog file names sort by their sequence number, so (file, pos) tuples order positions."""
+    positions = [position for position in positions if position]
+    return min(positions, key=lambda position: (position["log_file"], position["log_pos"]), default=None)
+
+
+def source_position(pool):
+    """The source's current binlog position, as {"log_file", "log_pos"}, or None without REPLICATION CLIENT."""
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            for statement in ("SHOW BINARY LOG STATUS", "SHOW MASTER STATUS"):  # MySQL 8.2+ renamed it
+                try:
+                    cursor.execute(statement)
+                except Exception:
+                    continue
+                row = cursor.fetchone()
+                return {"log_file": row["File"], "log_pos": int(row["Position"])} if row else None
+    return None
+
+
+def _reached(position, target):
+    return (position["log_file"], position["log_pos"]) >= (target["log_file"], target["log_pos"])
+
+
+def source_problems(pool):
+    """Reasons the source cannot feed a row-based catch-up; empty when it can."""
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW GLOBAL VARIABLES WHERE Variable_name IN "
+                           "('log_bin', 'binlog_format', 'binlog_row_image', 'binlog_row_metadata')")
+            variables = {row["Variable_name"]: row["Value"].upper() for row in cursor.fetchall()}
+    problems = []
+    if variables.get("log_bin") != "ON":
+        problems.append("Binary logging is disabled on the source (log_bin=OFF).")
+    if variables.get("binlog_format") != "ROW":
+        problems.append(f"binlog_format is {variables.get('binlog_format')}; row events need ROW.")
+    if variables.get("binlog_row_image", "FULL") != "FULL":
+        problems.append(f"binlog_row_image is {variables['binlog_row_image']}; applying full rows needs FULL.")
+    # MySQL 8.0.14+ only names columns in row events with binlog_row_metadata=FULL.
+    if variables.get("binlog_row_metadata", "FULL") != "FULL":
+        problems.append(f"binlog_row_metadata is {variables['binlog_row_metadata']}; decoding row events needs FULL.")
+    return problems
+
+
+def _db_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)  # JSON columns arrive decoded.
+    if isinstance(value, (set, frozenset)):
+        return ",".join(sorted(value))  # SET columns arrive as a set of members.
+    return value
+
+
+class BinlogCatchup:
+    """
+    Replays the source's row events on Cloud SQL from the binlog position of the bulk dump
+    until the target has caught up, then keeps following the source until it is stopped.
+
+    Events are read in batches that end on transaction boundaries (BINLOG_CATCHUP_BATCH_ROWS
+    or BINLOG_CATCHUP_BATCH_SECONDS, whichever comes first). A batch is split into groups of
+    tables linked by foreign keys, and each group's changes are applied in source order in
+    one target transaction, with up to `workers` groups at a time. Rows are matched by primary
+    key: inserts become upserts, updates upsert (or move the row when the key changed) and
+    deletes are by key, so replaying events the dump already contained (or a batch interrupted
+    by a crash) converges on the source's rows; the position is checkpointed once a whole
+    batch has committed. Tables without a primary key cannot be matched that way and are
+    refused (see unkeyed_tables).
+
+    Foreign key checks are off while applying, as replays may briefly reorder parents and
+    children. The row events only carry the parent's change, though, as InnoDB applied the
+    ON DELETE / ON UPDATE actions itself, so CASCADE and SET NULL are replayed explicitly.
+    Generated columns are left to the target to compute.
+
+    hold() stops applying at a source position, so the target can be compared with what the
+    source looked like there, and resume() continues.
+
+    DDL on the migrated database while catching up is not replayed: it stops the catch-up
+    with an error. Triggers on the target fire for replayed rows as they would for any write.
+    """
+
+    def __init__(self, source_settings, source_pool, target_pool, database, position, tables=None,
+                 batch_rows=config.BINLOG_CATCHUP_BATCH_ROWS, workers=config.BINLOG_CATCHUP_WORKERS,
+                 server_id=config.BINLOG_CATCHUP_SERVER_ID, checkpoint=None, tracer=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.source_settings = source_settings  # pymysql.connect() keyword arguments for the replication connection
+        self.source_pool = source_pool
+        self.target_pool = target_pool
+        self.database = database
+        self.start_position = dict(position)
+        self.position = dict(position)  # Applied through this position.
+        self.tables = set(tables) if tables else None
+        self.batch_rows = max(1, batch_rows)
+        self.workers = max(1, workers)
+        self.server_id = server_id  # Each concurrent reader needs its own replica id on the source.
+        self.checkpoint = checkpoint or RunCheckpoint()
+        self.tracer = tracer or Tracer(root=None)
+        self.status = "running"
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self.batches = 0
+        self.transactions = 0
+        self.row_changes = 0
+        self.table_changes = {}
+        self.apply_seconds = 0.0
+        self.last_event_timestamp = None
+        self.at_end = False
+        self.bytes_behind = None
+        self._layouts = {}  # table -> (columns, key columns, indexes of the columns that are not generated)
+        self._references = None  # parent table -> foreign keys referencing it, loaded on first use
+        self._groups = {}  # table -> the tables it is linked to by foreign keys, as a sorted tuple
+        self.held = False  # Applied through _hold_at and waiting for resume()
+        self._hold_at = None
+        self._stream = None
+        self._drain = False
+        self._task = None
+
+    # --- Reading ---
+    def _open_stream(self):
+        return BinLogStreamReader(
+            connection_settings=self.source_settings,
+            server_id=self.server_id,
+            log_file=self.position["log_file"],
+            log_pos=self.position["log_pos"],
+            resume_stream=True,
+            blocking=False,
+            only_schemas=[self.database],
+            only_events=[WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent, XidEvent, RotateEvent, QueryEvent],
+        )
+
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _read_batch(self):
+        """
+        Reads committed transactions until the batch is full or the end of the binlog is reached.
+        Returns (changes per table, transactions, position after the last one, its timestamp, at_end).
+        """
+        if self._stream is None:
+            self._stream = self._open_stream()
+        batch, pending = {}, []
+        transactions, rows = 0, 0
+        position, timestamp = dict(self.position), None
+        deadline = time.monotonic() + config.BINLOG_CATCHUP_BATCH_SECONDS
+        while True:
+            event = self._stream.fetchone()
+            if event is None:
+                # A non-blocking stream closes itself at the end of the binlog; the next read reopens it at `position`.
+                self._stream = None
+                return batch, transactions, position, timestamp, True
+            if isinstance(event, (WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent)):
+                if self.tables is None or event.table in self.tables:
+                    pending += [(event.table, event, row) for row in event.rows]
+                continue
+            if isinstance(event, QueryEvent):
+                query = event.query.decode() if isinstance(event.query, bytes) else event.query
+                schema = event.schema.decode() if isinstance(event.schema, bytes) else event.schema
+                if _DDL.match(query) and (schema == self.database or f"`{self.database}`." in query):
+                    raise RuntimeError(f"DDL on {self.database} during binlog catch-up is not replayed; "
+                                       f"apply it to the target and restart the catch-up: {query[:300]}")
+                if query.strip().upper() != "COMMIT":
+                    continue  # BEGIN, or statements on other databases.
+            elif not isinstance(event, XidEvent):
+                continue  # Rotations are tracked by the stream itself.
+            for table, row_event, row in pending:
+                batch.setdefault(self._group(table), []).append((table, self._change(table, row_event, row)))
+            rows += len(pending)
+            pending = []
+            transactions += 1
+            position = {"log_file": self._stream.log_file, "log_pos": self._stream.log_pos}
+            timestamp = event.timestamp
+            hold = self._hold_at
+            if rows >= self.batch_rows or time.monotonic() >= deadline or (hold is not None and _reached(position, hold)):
+                return batch, transactions, position, timestamp, False
+
+    # --- Applying ---
+    def _query(self, sql, args=None):
+        with self.source_pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, args)
+                return cursor.fetchall()
+
+    def unkeyed_tables(self):
+        """Base tables of the database (or of `tables`) without a primary key; their changes cannot be replayed by key."""
+        rows = self._query("""
+            SELECT t.TABLE_NAME FROM information_schema.TABLES t
+            LEFT JOIN information_schema.TABLE_CONSTRAINTS c
+                ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME AND c.CONSTRAINT_TYPE = 'PRIMARY KEY'
+            WHERE t.TABLE_SCHEMA = %s AND t.TABLE_TYPE = 'BASE TABLE' AND c.CONSTRAINT_NAME IS NULL
+            ORDER BY t.TABLE_NAME
+        """, (self.database,))
+        return [row["TABLE_NAME"] for row in rows if self.tables is None or row["TABLE_NAME"] in self.tables]
+
+    def _layout(self, table):
+        """Source column order, primary key columns and the indexes of the columns that are not generated."""
+        if table not in self._layouts:
+            rows = self._query("""
+                SELECT COLUMN_NAME, COLUMN_KEY, EXTRA FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION
+            """, (self.database, table))
+            columns = [row["COLUMN_NAME"] for row in rows]
+            keys = [row["COLUMN_NAME"] for row in rows if row["COLUMN_KEY"] == "PRI"]
+            if not keys:
+                raise RuntimeError(f"{self.database}.{table} has no primary key, so its changes cannot be replayed idempotently.")
+            writable = [index for index, row in enumerate(rows) if not _GENERATED.search(row["EXTRA"] or "")]
+            self._layouts[table] = (columns, keys, writable)
+        return self._layouts[table]
+
+    def _foreign_keys(self):
+        """parent table -> [{"table", "columns", "referenced", "on_delete", "on_update"}] for the foreign keys referencing it."""
+        if self._references is None:
+            rows = self._query("""
+                SELECT k.CONSTRAINT_NAME, k.TABLE_NAME, k.COLUMN_NAME, k.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME,
+                       r.UPDATE_RULE, r.DELETE_RULE
+                FROM information_schema.KEY_COLUMN_USAGE k
+                JOIN information_schema.REFERENTIAL_CONSTRAINTS r
+                    ON r.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA AND r.CONSTRAINT_NAME = k.CONSTRAINT_NAME AND r.TABLE_NAME = k.TABLE_NAME
+                WHERE k.CONSTRAINT_SCHEMA = %s AND k.REFERENCED_TABLE_SCHEMA = %s
+                ORDER BY k.TABLE_NAME, k.CONSTRAINT_NAME, k.ORDINAL_POSITION
+            """, (self.database, self.database))
+            constraints = {}
+            for row in rows:
+                constraint = constraints.setdefault((row["TABLE_NAME"], row["CONSTRAINT_NAME"]), {
+                    "parent": row["REFERENCED_TABLE_NAME"], "table": row["TABLE_NAME"], "columns": [], "referenced": [],
+                    "on_delete": row["DELETE_RULE"], "on_update": row["UPDATE_RULE"]})
+                constraint["columns"].append(row["COLUMN_NAME"])
+                constraint["referenced"].append(row["REFERENCED_COLUMN_NAME"])
+            self._references = {}
+            for constraint in constraints.values():
+                self._references.setdefault(constraint.pop("parent"), []).append(constraint)
+        return self._references
+
+    def _group(self, table):
+        """The tables linked to `table` by foreign keys in either direction; their changes are applied together, in order."""
+        if table not in self._groups:
+            links = {}
+            for parent, references in self._foreign_keys().items():
+                for reference in references:
+                    links.setdefault(parent, set()).add(reference["table"])
+                    links.setdefault(reference["table"], set()).add(parent)
+            group, pending = {table}, [table]
+            while pending:
+                for linked in links.get(pending.pop(), ()):
+                    if linked not in group:
+                        group.add(linked)
+                        pending.append(linked)
+            group = tuple(sorted(group))
+            for member in group:
+                self._groups[member] = group
+        return self._groups[table]
+
+    def _change(self, table, event, row):
+        """The row operation as ("upsert", after), ("delete", before) or ("update", before, after), values in source column order."""
+        columns = self._layout(table)[0]
+
+        def values(image):
+            values = [_db_value(value) for value in image.values()]
+            if len(values) != len(columns):
+                raise RuntimeError(f"Row event for {table} has {len(values)} columns, the source table {len(columns)}; "
+                                   "its definition changed during the catch-up.")
+            return values
+
+        if isinstance(event, WriteRowsEvent):
+            return ("upsert", values(row["values"]))
+        if isinstance(event, DeleteRowsEvent):
+            return ("delete", values(row["values"]))
+        return ("update", values(row["before_values"]), values(row["after_values"]))
+
+    def _statements(self, table):
+        columns, keys, writable = self._layout(table)
+        assigned = [columns[index] for index in writable]
+        quoted = ", ".join(f"`{column}`" for column in assigned)
+        match = " AND ".join(f"`{key}` = %s" for key in keys)
+        return {
+            "upsert": (f"INSERT INTO `{table}` ({quoted}) VALUES ({', '.join(['%s'] * len(assigned))}) "
+                       f"ON DUPLICATE KEY UPDATE {', '.join(f'`{column}` = VALUES(`{column}`)' for column in assigned)}"),
+            "delete": f"DELETE FROM `{table}` WHERE {match}",
+            "move": f"UPDATE `{table}` SET {', '.join(f'`{column}` = %s' for column in assigned)} WHERE {match}",
+        }
+
+    def _cascade(self, cursor, table, before, after=None, depth=0):
+        """
+        Replays the ON DELETE (no `after`) or ON UPDATE actions of the foreign keys referencing one
+        row of `table`: CASCADE deletes or re-points the child rows, SET NULL clears their keys.
+        RESTRICT and NO ACTION need nothing, the source already enforced them.
+        """
+        if depth > MAX_CASCADE_DEPTH:
+            raise RuntimeError(f"Foreign key cascade from {table} is nested deeper than {MAX_CASCADE_DEPTH} levels.")
+        columns = self._layout(table)[0]
+        for reference in self._foreign_keys().get(table, ()):
+            old = [before[columns.index(column)] for column in reference["referenced"]]
+            new = None if after is None else [after[columns.index(column)] for column in reference["referenced"]]
+            rule = reference["on_delete"] if after is None else reference["on_update"]
+            if new == old or any(value is None for value in old) or rule not in ("CASCADE", "SET NULL"):
+                continue
+            child = reference["table"]
+            if rule == "SET NULL":
+                new = [None] * len(old)
+            match = " AND ".join(f"`{column}` = %s" for column in reference["columns"])
+            if child in self._foreign_keys():
+                # The child rows may be parents themselves.
+                child_columns = self._layout(child)[0]
+                cursor.execute(f"SELECT {', '.join(f'`{column}`' for column in child_columns)} FROM `{child}` WHERE {match}", old)
+                for child_row in cursor.fetchall():
+                    child_before = [child_row[column] for column in child_columns]
+                    child_after = None
+                    if new is not None:
+                        child_after = list(child_before)
+                        for column, value in zip(reference["columns"], new):
+                            child_after[child_columns.index(column)] = value
+                    self._cascade(cursor, child, child_before, child_after, depth + 1)
+            if new is None:
+                cursor.execute(f"DELETE FROM `{child}` WHERE {match}", old)
+            else:
+                cursor.execute(f"UPDATE `{child}` SET {', '.join(f'`{column}` = %s' for column in reference['columns'])} WHERE {match}",
+                               new + old)
+
+    def _apply_group(self, changes):
+        """Applies one group's (table, operation) changes in source order, in one transaction."""
+        references = self._foreign_keys()
+        with self.target_pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SET SESSION foreign_key_checks = 0")
+                cursor.execute("START TRANSACTION")
+                for (table, kind), run in itertools.groupby(changes, key=lambda change: (change[0], change[1][0])):
+                    operations = [operation for _, operation in run]
+                    columns, keys, writable = self._layout(table)
+                    key_index = [columns.index(key) for key in keys]
+                    statements = self._statements(table)
+                    if kind == "upsert":
+                        cursor.executemany(statements["upsert"], [[values[i] for i in writable] for _, values in operations])
+                    elif kind == "delete" and table not in references:
+                        cursor.executemany(statements["delete"], [[values[i] for i in key_index] for _, values in operations])
+                    elif kind == "delete":
+                        for _, before in operations:
+                            self._cascade(cursor, table, before)
+                            cursor.execute(statements["delete"], [before[i] for i in key_index])
+                    else:
+                        for _, before, after in operations:
+                            if table in references:
+                                self._cascade(cursor, table, before, after)
+                            old_key, new_key = [before[i] for i in key_index], [after[i] for i in key_index]
+                            moved = 0
+                            if old_key != new_key:
+                                moved = cursor.execute(statements["move"], [after[i] for i in writable] + old_key)
+                            if not moved:
+                                # Same key, or the row is not there under its old key (a replay): upsert it.
+                                cursor.execute(statements["upsert"], [after[i] for i in writable])
+                cursor.execute("COMMIT")
+                cursor.execute("SET SESSION foreign_key_checks = 1")
+        return len(changes)
+
+    async def _apply(self, batch):
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def apply(group, changes):
+            async with semaphore:
+                with self.tracer.span("binlog_apply", table=",".join(group)) as span:
+                    await run_blocking(self._apply_group, changes)
+                    span.add(rows=len(changes))
+            for table, _ in changes:
+                self.table_changes[table] = self.table_changes.get(table, 0) + 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(apply(group, changes) for group, changes in batch.items()))
+        self.apply_seconds += time.monotonic() - started
+
+    # --- Lag ---
+    def _measure_bytes_behind(self):
+        """Binlog bytes written on the source past the applied position, or None without REPLICATION CLIENT."""
+        try:
+            with self.source_pool.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("SHOW BINARY LOGS")
+                    logs = [(row["Log_name"], int(row["File_size"])) for row in cursor.fetchall()]
+        except Exception:
+            return None
+        current = self.position["log_file"]
+        sizes = dict(logs)
+        if current not in sizes:
+            return None
+        return max(0, sizes[current] - self.position["log_pos"]) + sum(size for name, size in logs if name > current)
+
+    @property
+    def lag_seconds(self):
+        if self.at_end:
+            return 0.0
+        if self.last_event_timestamp is None:
+            return None
+        return round(max(0.0, time.time() - self.last_event_timestamp), 1)
+
+    @property
+    def caught_up(self):
+        lag = self.lag_seconds
+        return self.status in ("running", "success") and lag is not None and lag <= config.BINLOG_CATCHUP_MAX_LAG_SECONDS
+
+    # --- Lifecycle ---
+    def _checkpoint_detail(self):
+        return {"catchup_id": self.id, "log_file": self.position["log_file"], "log_pos": self.position["log_pos"],
+                "start_position": self.start_position, "error": self.error}
+
+    async def run(self):
+        self.checkpoint.phase("catchup", RUNNING, self._checkpoint_detail())
+        try:
+            while True:
+                hold = self._hold_at
+                batch, transactions, position, timestamp, at_end = await run_blocking(self._read_batch)
+                if batch:
+                    await self._apply(batch)
+                    self.batches += 1
+                    self.row_changes += sum(len(changes) for changes in batch.values())
+                self.transactions += transactions
+                self.position = position
+                if timestamp is not None:
+                    self.last_event_timestamp = timestamp
+                self.at_end = at_end
+                self.bytes_behind = await run_blocking(self._measure_bytes_behind)
+                self.checkpoint.phase("catchup", RUNNING, self._checkpoint_detail())
+                # A read that started before hold() may have gone past its position; only later ones count.
+                if hold is not None and hold is self._hold_at and (at_end or _reached(position, hold)):
+                    self.held = True
+                    while self.held and not self._drain:
+                        await asyncio.sleep(config.BINLOG_CATCHUP_POLL_SECONDS)
+                    continue
+                if at_end:
+                    if self._drain:
+                        break
+                    await asyncio.sleep(config.BINLOG_CATCHUP_POLL_SECONDS)
+            self.status = "success"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+        except Exception as e:
+            self.status = "error"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+            await run_blocking(self._close_stream)
+            self.checkpoint.phase("catchup", DONE if self.status == "success" else FAILED, self._checkpoint_detail())
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+        return self
+
+    async def hold(self, position):
+        """
+        Stops applying once everything the source logged up to `position` (a transaction boundary,
+        such as source_position()) is applied, and returns then, or when the catch-up stops.
+        """
+        self.held = False
+        self._hold_at = dict(position)
+        while not self.held and self.status == "running":
+            await asyncio.sleep(config.BINLOG_CATCHUP_POLL_SECONDS)
+        return self.summary()
+
+    def resume(self):
+        self._hold_at = None
+        self.held = False
+
+    async def stop(self, drain=True):
+        """With drain, returns once everything in the binlog so far has been applied (the cutover); otherwise at once."""
+        if drain:
+            self._drain = True
+            self.resume()
+            await asyncio.shield(self._task)
+        elif not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        return self.summary()
+
+    def summary(self):
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        event_time = self.last_event_timestamp
+        return {
+            "catchup_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "database": self.database,
+            "start_position": self.start_position,
+            "position": self.position,
+            "held": self.held,
+            "caught_up": self.caught_up,
+            "lag_seconds": self.lag_seconds,
+            "bytes_behind": self.bytes_behind,
+            "last_event_at": datetime.datetime.fromtimestamp(event_time, datetime.timezone.utc).isoformat() if event_time else None,
+            "batches": self.batches,
+            "transactions": self.transactions,
+            "row_changes": self.row_changes,
+            "rows_per_second": round(self.row_changes / self.apply_seconds, 1) if self.apply_seconds else None,
+            "busiest_tables": dict(sorted(self.table_changes.items(), key=lambda item: item[1], reverse=True)[:10]),
+            "elapsed_seconds": round(elapsed, 1),
+        }
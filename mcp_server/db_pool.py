@@ -0,0 +1,138 @@
+# gcp-agentic-migration/mcp_server/db_pool.py
+
+import contextlib
+import threading
+import time
+from.. import config
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections shared by the handler threads.
+
+    Connections are created lazily up to max_size, pinged before reuse when they
+    have been idle for longer than health_check_interval, and closed once idle for
+    longer than idle_timeout (keeping at least min_size warm).
+    """
+
+    def __init__(self, connect, min_size=config.DB_POOL_MIN_SIZE, max_size=config.DB_POOL_MAX_SIZE,
+                 idle_timeout=config.DB_POOL_IDLE_TIMEOUT, health_check_interval=config.DB_POOL_HEALTH_CHECK_INTERVAL,
+                 acquire_timeout=config.DB_POOL_ACQUIRE_TIMEOUT):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self._idle = []  # (connection, last_used) pairs, most recently used last
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _is_healthy(self, connection, last_used):
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle(self):
+        """Closes connections idle past idle_timeout, keeping min_size. Caller holds the lock."""
+        now = time.monotonic()
+        stale = []
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            stale.append(self._idle.pop(0)[0])
+        self._size -= len(stale)
+        return stale
+
+    def acquire(self, timeout=None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed.")
+                stale = self._evict_idle()
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    create = False
+                elif self._size < self.max_size:
+                    self._size += 1
+                    connection, last_used, create = None, None, True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(f"No connection available within {timeout} seconds.")
+                    self._condition.wait(remaining)
+                    continue
+            for old in stale:
+                try:
+                    old.close()
+                except Exception:
+                    pass
+            if create:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            if self._is_healthy(connection, last_used):
+                return connection
+            self._discard(connection)
+
+    def release(self, connection):
+        with self._condition:
+            if self._closed:
+                self._size -= 1
+                closing = True
+            else:
+                self._idle.append((connection, time.monotonic()))
+                closing = False
+            self._condition.notify()
+        if closing:
+            connection.close()
+
+    @contextlib.contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        except Exception:
+            # Don't hand a connection in an unknown state to the next caller.
+            self._discard(connection)
+            raise
+        else:
+            self.release(connection)
+
+    def stats(self):
+        with self._condition:
+            return {"size": self._size, "idle": len(self._idle), "in_use": self._size - len(self._idle), "max_size": self.max_size}
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection, _ in idle:
+            try:
+                connection.close()
+            except Exception:
+                pass
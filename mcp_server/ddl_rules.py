@@ -0,0 +1,267 @@
+# gcp-agentic-migration/mcp_server/ddl_rules.py
+
+import importlib
+import re
+from.. import config
+
+
+class DdlRule:
+    """
+    A single mechanical DDL rewrite.
+    apply() returns the rewritten DDL, a list of change descriptions, and a list of
+    reasons the object needs human/LLM review (empty when the rewrite is unambiguous).
+    """
+    name = ""
+    description = ""
+    object_types = ("table", "view", "routine", "trigger")
+
+    def apply(self, object_type, name, ddl):
+        raise NotImplementedError
+
+
+class EngineToInnoDbRule(DdlRule):
+    name = "engine_innodb"
+    description = "Converts MyISAM tables to InnoDB; flags other non-transactional engines for review."
+    object_types = ("table",)
+    ENGINE_RE = re.compile(r"\bENGINE\s*=\s*(\w+)", re.IGNORECASE)
+    REVIEW_ENGINES = {"MEMORY", "HEAP", "ARCHIVE", "CSV", "FEDERATED", "BLACKHOLE", "MERGE", "MRG_MYISAM"}
+
+    def apply(self, object_type, name, ddl):
+        match = self.ENGINE_RE.search(ddl)
+        if not match:
+            return ddl, [], []
+        engine = match.group(1).upper()
+        if engine == "MYISAM":
+            return self.ENGINE_RE.sub("ENGINE=InnoDB", ddl, count=1), ["Changed engine from MyISAM to InnoDB."], []
+        if engine in self.REVIEW_ENGINES:
+            return ddl, [], [f"Uses the {engine} engine, which has no direct InnoDB equivalent on Cloud SQL."]
+        return ddl, [], []
+
+
+class StripDefinerRule(DdlRule):
+    name = "strip_definer"
+    description = "Removes DEFINER= clauses, which fail on Cloud SQL without SUPER."
+    object_types = ("view", "routine", "trigger")
+    DEFINER_RE = re.compile(r"\s*\bDEFINER\s*=\s*(`[^`]*`|'[^']*'|\w+)@(`[^`]*`|'[^']*'|[\w.%-]+)", re.IGNORECASE)
+
+    def apply(self, object_type, name, ddl):
+        match = self.DEFINER_RE.search(ddl)
+        if not match:
+            return ddl, [], []
+        return self.DEFINER_RE.sub("", ddl, count=1), [f"Removed DEFINER={match.group(1)}@{match.group(2)}."], []
+
+
+class Utf8mb4Rule(DdlRule):
+    name = "charset_utf8mb4"
+    description = ("Normalises utf8/utf8mb3/latin1 character sets and collations to utf8mb4 (binary collations to "
+                   "utf8mb4_bin, the others to TARGET_COLLATION); flags indexes the wider characters push over InnoDB's limits.")
+    object_types = ("table",)
+    LEGACY_CHARSETS = "utf8mb3|utf8|latin1|ucs2|utf16"
+    TABLE_CHARSET_RE = re.compile(rf"\bDEFAULT CHARSET\s*=\s*({LEGACY_CHARSETS})\b(?:\s+COLLATE\s*=\s*(\w+))?", re.IGNORECASE)
+    COLUMN_CHARSET_RE = re.compile(rf"\bCHARACTER SET ({LEGACY_CHARSETS})\b(?:\s+COLLATE (\w+))?", re.IGNORECASE)
+    COLUMN_COLLATE_RE = re.compile(rf"\bCOLLATE (({LEGACY_CHARSETS})_\w+)", re.IGNORECASE)
+    ROW_FORMAT_RE = re.compile(r"\bROW_FORMAT\s*=\s*(\w+)", re.IGNORECASE)
+    DEFAULT_CHARSET_RE = re.compile(r"\bDEFAULT CHARSET\s*=\s*(\w+)", re.IGNORECASE)
+    STRING_COLUMN_RE = re.compile(r"^\s*`([^`]+)`\s+(?:var)?char\((\d+)\)([^\n]*)", re.IGNORECASE | re.MULTILINE)
+    TEXT_COLUMN_RE = re.compile(r"^\s*`([^`]+)`\s+(?:tiny|medium|long)?text\b([^\n]*)", re.IGNORECASE | re.MULTILINE)
+    CHARSET_RE = re.compile(r"\bCHARACTER SET (\w+)", re.IGNORECASE)
+    INDEX_RE = re.compile(r"^\s*(PRIMARY KEY|(?:UNIQUE )?(?:KEY|INDEX) `([^`]+)`)\s*\((.*)\)", re.IGNORECASE | re.MULTILINE)
+    INDEX_PART_RE = re.compile(r"`([^`]+)`(?:\((\d+)\))?")
+    CHARSET_BYTES = {"utf8mb4": 4, "utf16": 4, "utf8mb3": 3, "utf8": 3, "ucs2": 2, "latin1": 1, "ascii": 1, "binary": 1}
+    # InnoDB's limit per index column: 3072 bytes with DYNAMIC (MySQL 8's default) or COMPRESSED
+    # rows, 767 with COMPACT or REDUNDANT ones; and 3072 bytes for a whole index.
+    INDEX_COLUMN_LIMITS = {"COMPACT": 767, "REDUNDANT": 767}
+    INDEX_LIMIT = 3072
+
+    @staticmethod
+    def _collation_for(collation):
+        """Binary collations stay binary (case- and accent-sensitive); the others become TARGET_COLLATION."""
+        return "utf8mb4_bin" if collation and collation.lower().endswith("_bin") else config.TARGET_COLLATION
+
+    def _index_reviews(self, ddl):
+        """The indexes whose string columns no longer fit InnoDB's key limits once converted."""
+        row_format = (self.ROW_FORMAT_RE.search(ddl) or [None, "DYNAMIC"])[1].upper()
+        column_limit = self.INDEX_COLUMN_LIMITS.get(row_format, self.INDEX_LIMIT)
+        table_charset = (self.DEFAULT_CHARSET_RE.search(ddl) or [None, "utf8mb4"])[1].lower()
+
+        def width(definition):
+            charset = self.CHARSET_RE.search(definition)
+            return self.CHARSET_BYTES.get(charset.group(1).lower() if charset else table_charset, 4)
+
+        columns = {match.group(1): (int(match.group(2)), width(match.group(3))) for match in self.STRING_COLUMN_RE.finditer(ddl)}
+        columns.update({match.group(1): (None, width(match.group(2))) for match in self.TEXT_COLUMN_RE.finditer(ddl)})
+        reviews = []
+        for index in self.INDEX_RE.finditer(ddl):
+            label = "PRIMARY KEY" if index.group(2) is None else f"index `{index.group(2)}`"
+            total = 0
+            for column, prefix in self.INDEX_PART_RE.findall(index.group(3)):
+                if column not in columns:
+                    continue
+                length, bytes_per_char = columns[column]
+                chars = int(prefix) if prefix else length
+                if chars is None:
+                    continue
+                key_bytes = chars * bytes_per_char
+                total += key_bytes
+                if column_limit < key_bytes <= self.INDEX_LIMIT:
+                    reviews.append(f"{label} on `{column}` needs {key_bytes} bytes after the utf8mb4 conversion, over the "
+                                   f"{column_limit}-byte limit of the {row_format} row format; shorten the prefix or use ROW_FORMAT=DYNAMIC.")
+            if total > self.INDEX_LIMIT:
+                reviews.append(f"{label} needs {total} bytes after the utf8mb4 conversion, over InnoDB's {self.INDEX_LIMIT}-byte index limit.")
+        return reviews
+
+    def apply(self, object_type, name, ddl):
+        changes = []
+        table_match = self.TABLE_CHARSET_RE.search(ddl)
+        if table_match:
+            collation = self._collation_for(table_match.group(2))
+            ddl = self.TABLE_CHARSET_RE.sub(f"DEFAULT CHARSET=utf8mb4 COLLATE={collation}", ddl, count=1)
+            changes.append(f"Changed default character set from {table_match.group(1)} to utf8mb4 ({collation}).")
+        column_matches = self.COLUMN_CHARSET_RE.findall(ddl)
+        if column_matches:
+            ddl = self.COLUMN_CHARSET_RE.sub(lambda match: f"CHARACTER SET utf8mb4 COLLATE {self._collation_for(match.group(2))}", ddl)
+            changes.append(f"Changed {len(column_matches)} column character set(s) to utf8mb4.")
+        ddl, collations = self.COLUMN_COLLATE_RE.subn(lambda match: f"COLLATE {self._collation_for(match.group(1))}", ddl)
+        if collations:
+            changes.append(f"Changed {collations} column collation(s) to utf8mb4 collations.")
+        reviews = self._index_reviews(ddl) if changes else []
+        return ddl, changes, reviews
+
+
+class ZeroDateRule(DdlRule):
+    name = "zero_dates"
+    description = "Flags zero-date defaults, which Cloud SQL's default sql_mode (NO_ZERO_DATE) rejects."
+    object_types = ("table",)
+    ZERO_DATE_RE = re.compile(r"DEFAULT '0000-00-00( 00:00:00)?'", re.IGNORECASE)
+
+    def apply(self, object_type, name, ddl):
+        if self.ZERO_DATE_RE.search(ddl):
+            return ddl, [], ["Has a zero-date DEFAULT ('0000-00-00'); choose a valid default or allow NULL."]
+        return ddl, [], []
+
+
+class UnreadableRoutineRule(DdlRule):
+    name = "unreadable_routine"
+    description = "Flags routines whose body could not be read from information_schema."
+    object_types = ("routine",)
+
+    def apply(self, object_type, name, ddl):
+        if ddl is None:
+            return ddl, [], ["Routine body is not visible to the migration user; grant SHOW_ROUTINE or extract it manually."]
+        return ddl, [], []
+
+
+DEFAULT_RULES = [UnreadableRoutineRule(), EngineToInnoDbRule(), StripDefinerRule(), Utf8mb4Rule(), ZeroDateRule()]
+_registry = {rule.name: rule for rule in DEFAULT_RULES}
+
+
+def register_rule(rule: DdlRule):
+    """Adds (or replaces) a rule in the process-wide registry."""
+    _registry[rule.name] = rule
+    return rule
+
+
+def _load_extra_rules():
+    # Extra rules are listed in config as "package.module:attribute" (a DdlRule instance or class).
+    for path in config.DDL_EXTRA_RULES:
+        module_name, _, attribute = path.partition(":")
+        rule = getattr(importlib.import_module(module_name), attribute)
+        register_rule(rule() if isinstance(rule, type) else rule)
+
+
+_load_extra_rules()
+
+
+def render_script(statements):
+    """The DDL script for converted statements grouped by section (tables, views, routines, triggers)."""
+    script = ["SET FOREIGN_KEY_CHECKS=0;"]
+    script += [f"{ddl};" for ddl in statements["tables"]]
+    script += [f"{ddl};" for ddl in statements["views"]]
+    if statements["routines"] or statements["triggers"]:
+        script.append("DELIMITER ;;")
+        script += [f"{ddl};;" for ddl in statements["routines"] + statements["triggers"]]
+        script.append("DELIMITER ;")
+    script.append("SET FOREIGN_KEY_CHECKS=1;")
+    return "\n\n".join(script) + "\n"
+
+
+def merge_reviewed(statements, needs_review, reviewed):
+    """
+    Adds the corrected statements for the objects DdlConverter left out for review to the
+    converted ones. `reviewed` is a list of {"object_type", "name", "ddl"}; returns the merged
+    statements and the needs_review objects that still have no corrected statement.
+    """
+    corrected = {(entry.get("object_type"), entry.get("name")): (entry.get("ddl") or "").strip().rstrip(";").strip()
+                 for entry in reviewed or []}
+    merged = {section: list(ddls) for section, ddls in statements.items()}
+    unresolved = []
+    for entry in needs_review:
+        ddl = corrected.get((entry["object_type"], entry["name"]))
+        if ddl:
+            merged[f"{entry['object_type']}s"].append(ddl)
+        else:
+            unresolved.append({"object_type": entry["object_type"], "name": entry["name"]})
+    return merged, unresolved
+
+
+class DdlConverter:
+    """Applies the rule set to an extracted schema in one pass."""
+
+    OBJECT_SECTIONS = (("table", "tables"), ("view", "views"), ("routine", "routines"), ("trigger", "triggers"))
+
+    def __init__(self, rule_names=None):
+        if rule_names:
+            unknown = [name for name in rule_names if name not in _registry]
+            if unknown:
+                raise ValueError(f"Unknown DDL rules: {', '.join(unknown)}")
+            self.rules = [_registry[name] for name in rule_names]
+        else:
+            self.rules = list(_registry.values())
+
+    def convert_object(self, object_type, name, ddl):
+        changes, reviews = [], []
+        for rule in self.rules:
+            if object_type not in rule.object_types:
+                continue
+            ddl, rule_changes, rule_reviews = rule.apply(object_type, name, ddl)
+            changes += [{"rule": rule.name, "change": change} for change in rule_changes]
+            reviews += [{"rule": rule.name, "reason": reason} for reason in rule_reviews]
+            if ddl is None:
+                break
+        return ddl, changes, reviews
+
+    def convert(self, schema):
+        """
+        Converts the output of SchemaExtractor.extract().
+        Objects that need review are left out of the script and returned in `needs_review`;
+        merge_reviewed() adds their corrected statements back to `statements`.
+        """
+        statements = {section: [] for _, section in self.OBJECT_SECTIONS}
+        report, needs_review = [], []
+        for object_type, section in self.OBJECT_SECTIONS:
+            for name, ddl in (schema.get(section) or {}).items():
+                converted, changes, reviews = self.convert_object(object_type, name, ddl)
+                if changes:
+                    report.append({"object_type": object_type, "name": name, "changes": changes})
+                if reviews:
+                    needs_review.append({"object_type": object_type, "name": name, "reasons": reviews, "ddl": converted})
+                else:
+                    statements[section].append(converted)
+
+        summary = {}
+        for entry in report:
+            for change in entry["changes"]:
+                summary[change["rule"]] = summary.get(change["rule"], 0) + 1
+        return {
+            "script": render_script(statements),
+            "statements": statements,
+            "report": report,
+            "needs_review": needs_review,
+            "summary": {
+                "objects_converted": sum(len(items) for items in statements.values()),
+                "objects_changed": len(report),
+                "objects_needing_review": len(needs_review),
+                "changes_by_rule": summary,
+                "rules_applied": [rule.name for rule in self.rules],
+            },
+        }
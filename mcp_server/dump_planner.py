@@ -0,0 +1,153 @@
+# gcp-agentic-migration/mcp_server/dump_planner.py
+
+import heapq
+import json
+import math
+import os
+import re
+from.. import config
+from.source_sizing import SourceSizer
+
+PLAN_FILE = "dump_plan.json"
+_METADATA_TABLE = re.compile(r"^\[`[^`]+`\.`(?P<table>[^`]+)`\]\s*$")
+_METADATA_ROWS = re.compile(r"^rows\s*=\s*(?P<rows>\d+)\s*$")
+
+
+class DumpPlanner:
+    """
+    Sizes a mydumper/myloader run from per-table statistics (see SourceSizer).
+
+    Tables are cut into primary-key row chunks of roughly DUMP_TARGET_CHUNK_MB and the
+    chunks are bin-packed (longest first) onto workers. The thread count is the smallest
+    of the local CPU budget, the source's spare capacity, the network budget and the
+    number of chunks, so neither the orchestrator VM nor the legacy host is oversubscribed.
+    """
+
+    def __init__(self, pool, database):
+        self.pool = pool
+        self.database = database
+
+    def _query(self, sql, args=None):
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, args)
+                return cursor.fetchall()
+
+    def _source_thread_budget(self):
+        """Dump threads the source can absorb: the configured cap minus queries already running."""
+        status = {row["Variable_name"]: int(row["Value"]) for row in self._query(
+            "SHOW GLOBAL STATUS WHERE Variable_name IN ('Threads_running', 'Threads_connected')")}
+        max_connections = int(self._query("SELECT @@max_connections AS value")[0]["value"])
+        busy = max(status.get("Threads_running", 1) - 1, 0)
+        free_connections = max_connections - status.get("Threads_connected", 0) - config.SOURCE_RESERVED_CONNECTIONS
+        return max(1, min(config.SOURCE_MAX_DUMP_THREADS - busy, free_connections)), {
+            "threads_running": status.get("Threads_running"),
+            "threads_connected": status.get("Threads_connected"),
+            "max_connections": max_connections,
+        }
+
+    @staticmethod
+    def _chunk_units(stats, chunk_bytes):
+        units = []
+        for table in stats:
+            size = table["data_bytes"]
+            pieces = max(1, math.ceil(size / chunk_bytes))
+            units += [(size / pieces, table["name"])] * pieces
+        return units
+
+    @staticmethod
+    def _bin_pack(units, workers):
+        """Longest-processing-time-first assignment of chunks to workers."""
+        heap = [(0.0, worker) for worker in range(workers)]
+        loads = [0.0] * workers
+        for size, _ in sorted(units, reverse=True):
+            load, worker = heapq.heappop(heap)
+            loads[worker] = load + size
+            heapq.heappush(heap, (loads[worker], worker))
+        return loads
+
+    def plan(self, tables=None, stats=None):
+        """`stats` are SourceSizer table stats; collected from the source when not given."""
+        if stats is None:
+            stats, _ = SourceSizer(self.pool, self.database).collect_table_stats()
+        if tables:
+            stats = [table for table in stats if table["name"] in tables]
+        chunk_bytes = config.DUMP_TARGET_CHUNK_MB * 1024 * 1024
+        units = self._chunk_units(stats, chunk_bytes)
+
+        cpu_count = os.cpu_count() or 1
+        local_threads = max(1, cpu_count * config.DUMP_THREADS_PER_CPU)
+        source_threads, source_status = self._source_thread_budget()
+        network_threads = max(1, math.ceil(config.ORCHESTRATOR_NETWORK_MBPS / config.DUMP_THREAD_MBPS))
+        threads = max(1, min(local_threads, source_threads, network_threads, len(units) or 1))
+
+        # Size row chunks on the largest table: ~DUMP_TARGET_CHUNK_MB per chunk, and at least one chunk per thread.
+        largest = max(stats, key=lambda table: table["data_bytes"], default=None)
+        rows = config.DUMP_MIN_CHUNK_ROWS
+        if largest and largest["avg_row_length"]:
+            rows = max(rows, chunk_bytes // largest["avg_row_length"])
+            if largest["row_estimate"]:
+                rows = max(config.DUMP_MIN_CHUNK_ROWS, min(rows, math.ceil(largest["row_estimate"] / threads)))
+
+        loads = self._bin_pack(units, threads)
+        total_bytes = sum(table["data_bytes"] for table in stats)
+        bytes_per_second = config.DUMP_THREAD_MBPS * 1024 * 1024
+        load_threads = max(1, min(cpu_count * config.DUMP_THREADS_PER_CPU, config.TARGET_MAX_LOAD_THREADS,
+                                  len(units) or 1))
+        return {
+            "threads": threads,
+            "rows": int(rows),
+            "chunk_filesize_mb": config.DUMP_CHUNK_FILESIZE_MB,
+            "load_threads": load_threads,
+            "tables": len(stats),
+            "chunks": len(units),
+            "total_data_bytes": total_bytes,
+            "largest_table": largest["name"] if largest else None,
+            "largest_table_bytes": largest["data_bytes"] if largest else 0,
+            "worker_bytes": [int(load) for load in loads],
+            "estimated_dump_seconds": round(max(loads, default=0) / bytes_per_second, 1),
+            "limits": {
+                "local_cpu_threads": local_threads,
+                "source_threads": source_threads,
+                "network_threads": network_threads,
+                "source_status": source_status,
+            },
+        }
+
+
+def save_plan(plan, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, PLAN_FILE), "w") as f:
+        json.dump(plan, f, indent=2)
+
+
+def load_plan(input_dir):
+    path = os.path.join(input_dir, PLAN_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def dump_table_rows(dump_dir):
+    """
+    Rows per table as recorded in the dump's metadata file ([`db`.`table`] sections with
+    `rows = N`, written by mydumper 0.13+). Tables without a count are left out.
+    """
+    path = os.path.join(dump_dir, "metadata")
+    if not os.path.exists(path):
+        return {}
+    rows, table = {}, None
+    with open(path) as f:
+        for line in f:
+            match = _METADATA_TABLE.match(line)
+            if match:
+                table = match.group("table")
+                continue
+            if line.startswith("["):
+                table = None
+                continue
+            match = _METADATA_ROWS.match(line)
+            if match and table is not None:
+                rows[table] = int(match.group("rows"))
+    return rows
@@ -0,0 +1,91 @@
+# gcp-agentic-migration/mcp_server/executor.py
+
+import asyncio
+import functools
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from.. import config
+from.telemetry import ProcessGroupSampler, record_process
+
+# Blocking DB drivers (pymysql) run here so they never stall the event loop.
+_db_executor = ThreadPoolExecutor(
+    max_workers=config.MCP_DB_EXECUTOR_WORKERS,
+    thread_name_prefix="mcp-db",
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking callable on the bounded DB executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(func, *args, **kwargs))
+
+
+def terminate_process_group(process, grace_period=5):
+    """Sends SIGTERM to the whole process group, escalating to SIGKILL."""
+    if process.returncode is not None:
+        return
+    try:
+        pgid = os.getpgid(process.pid)
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+
+    def _kill():
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    asyncio.get_running_loop().call_later(grace_period, _kill)
+
+
+async def run_command(command, cwd=None, timeout=None, env=None):
+    """
+    Runs a shell command as an asyncio subprocess and returns structured output.
+    The command runs in its own process group so that a timeout or a cancelled
+    request tears down the shell and everything it spawned; the group's peak RSS and
+    CPU time are sampled and attributed to the current telemetry span.
+    """
+    started = time.monotonic()
+    process = await asyncio.create_subprocess_shell(
+        command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        env=env,
+        start_new_session=True,
+    )
+    sampler = ProcessGroupSampler(process.pid).start()
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        terminate_process_group(process)
+        await process.wait()
+        usage = await sampler.stop()
+        record_process(usage)
+        return {
+            "status": "error",
+            "stdout": "",
+            "stderr": f"Command timed out after {timeout} seconds.",
+            "returncode": process.returncode,
+            "duration_seconds": round(time.monotonic() - started, 3),
+            **usage,
+        }
+    except asyncio.CancelledError:
+        sampler.cancel()
+        terminate_process_group(process)
+        raise
+
+    usage = await sampler.stop()
+    record_process(usage)
+    result = {
+        "status": "success" if process.returncode == 0 else "error",
+        "stdout": stdout.decode("utf-8", errors="replace"),
+        "stderr": stderr.decode("utf-8", errors="replace"),
+        "returncode": process.returncode,
+        "duration_seconds": round(time.monotonic() - started, 3),
+        **usage,
+    }
+    return result
@@ -1,157 +1,1244 @@
 # gcp-agentic-migration/mcp_server/handlers.py
 
-import subprocess
+import asyncio
+import inspect
+import itertools
 import json
 import pymysql
 import os
-from..utils.gcp_secrets import get_secret
+import re
+import time
+from..utils.gcp_secrets import get_secret, get_secrets, invalidate_secret
 from.. import config
+from.executor import run_command, run_blocking
+from.jobs import JobManager, ProgressTracker, directory_size
+from.validation import ChunkedChecksumValidator
+from.db_pool import ConnectionPool
+from.schema_extractor import SchemaExtractor
+from.ddl_rules import DdlConverter, merge_reviewed, render_script
+from.dump_planner import DumpPlanner, save_plan, load_plan, dump_table_rows
+from.source_sizing import SourceSizer, transfer_estimates
+from.script_pool import ScriptWorkerPool
+from.batch import DatabaseScope, assign_instances, batch_instances
+from.binlog_catchup import BinlogCatchup, read_dump_position, earliest_position, source_position, source_problems
+from.pipeline import DumpImportPipeline, storage_for, classify_dump_file
+from.terraform_runner import TerraformRunner, TARGETS
+from.artifacts import ArtifactStore, summarize_result, read_lines
+from.anomaly import AnomalyDetector
+from.telemetry import Tracer, record_process, _escape
+from..utils.run_state import RunStateStore, RunCheckpoint, PENDING, RUNNING, DONE, FAILED
 
 class MigrationToolHandlers:
     def __init__(self):
-        # Load secrets at initialization
+        self.anomalies = AnomalyDetector()
+        self.tracer = Tracer()
+        self.jobs = JobManager(listeners=(self.anomalies, self.tracer))
+        self.pipelines = {}
+        self.catchups = {}
+        self.script_pools = {}  # (instance, database) -> ScriptWorkerPool, so databases never restart each other's workers
+        self.artifacts = ArtifactStore()
+        self.run_state = RunStateStore()
+        self.checkpoint = RunCheckpoint()  # Inactive until start_run is called.
+        self.scopes = {}  # database -> DatabaseScope while a batch run is active
+        self.target_pools = {}  # (instance, database) -> (pool, (ip, password))
+        self._target_endpoints = {}  # instance -> (ip, password, expires_at)
+        self._source_sizes = {}  # database -> (sizing, expires_at)
+        self._import_locks = {}  # instance -> asyncio.Lock; Cloud SQL runs one import per instance at a time
+        self._load_secrets()
+        self._instrument()
+
+    def _instrument(self):
+        """Wraps every public async handler in a telemetry span; server.py registers the wrapped methods."""
+        for name, method in inspect.getmembers(self, inspect.iscoroutinefunction):
+            if not name.startswith("_"):
+                setattr(self, name, self.tracer.traced(name, method))
+
+    def render_metrics(self):
+        """Prometheus text for the /metrics endpoint: tracer series plus job, anomaly and binlog catch-up gauges."""
+        running = sum(1 for job in self.jobs.jobs.values() if job.status == "running")
+        severities = {}
+        for anomaly in self.anomalies.anomalies:
+            severities[anomaly["severity"]] = severities.get(anomaly["severity"], 0) + 1
+        lines = ["# HELP mcp_jobs_running Background jobs currently running.", "# TYPE mcp_jobs_running gauge",
+                 f"mcp_jobs_running {running}",
+                 "# HELP mcp_anomalies Anomalies currently held by the detector.", "# TYPE mcp_anomalies gauge"]
+        lines += [f'mcp_anomalies{{severity="{_escape(severity)}"}} {count}' for severity, count in sorted(severities.items())]
+        catchups = [catchup.summary() for catchup in self.catchups.values() if catchup.status == "running"]
+        labels = {c["catchup_id"]: f'catchup="{_escape(c["catchup_id"])}",database="{_escape(c["database"])}"' for c in catchups}
+        if catchups:
+            lines += ["# HELP migration_binlog_lag_seconds Age of the last applied source event; 0 at the end of the binlog.",
+                      "# TYPE migration_binlog_lag_seconds gauge"]
+            lines += [f'migration_binlog_lag_seconds{{{labels[c["catchup_id"]]}}} {c["lag_seconds"]}'
+                      for c in catchups if c["lag_seconds"] is not None]
+            lines += ["# HELP migration_binlog_bytes_behind Source binlog bytes not yet applied.",
+                      "# TYPE migration_binlog_bytes_behind gauge"]
+            lines += [f'migration_binlog_bytes_behind{{{labels[c["catchup_id"]]}}} {c["bytes_behind"]}'
+                      for c in catchups if c["bytes_behind"] is not None]
+            lines += ["# HELP migration_binlog_row_changes_total Row changes applied by the catch-up.",
+                      "# TYPE migration_binlog_row_changes_total counter"]
+            lines += [f'migration_binlog_row_changes_total{{{labels[c["catchup_id"]]}}} {c["row_changes"]}'
+                      for c in catchups]
+        return self.tracer.render_metrics() + "\n".join(lines) + "\n"
+
+    def _load_secrets(self):
+        # Load secrets at initialization, in one concurrent batch; a missing secret leaves its attribute None.
         try:
-            self.legacy_db_host = get_secret(config.LEGACY_DB_HOST_SECRET)
-            self.legacy_db_user = get_secret(config.LEGACY_DB_USER_SECRET)
-            self.legacy_db_password = get_secret(config.LEGACY_DB_PASSWORD_SECRET)
-            self.legacy_db_name = get_secret(config.LEGACY_DB_NAME_SECRET)
+            secrets = get_secrets([
+                config.LEGACY_DB_HOST_SECRET,
+                config.LEGACY_DB_USER_SECRET,
+                config.LEGACY_DB_PASSWORD_SECRET,
+                config.LEGACY_DB_NAME_SECRET,
+                config.CLOUD_SQL_ROOT_PASSWORD_SECRET,
+            ], ignore_missing=True)
         except Exception as e:
             print(f"Error loading legacy DB secrets: {e}")
             # Handle cases where secrets might not be needed immediately
-            self.legacy_db_host = None
+            secrets = {}
+        self.legacy_db_host = secrets.get(config.LEGACY_DB_HOST_SECRET)
+        self.legacy_db_user = secrets.get(config.LEGACY_DB_USER_SECRET)
+        self.legacy_db_password = secrets.get(config.LEGACY_DB_PASSWORD_SECRET)
+        self.legacy_db_name = secrets.get(config.LEGACY_DB_NAME_SECRET)
+        self.source_pool = ConnectionPool(self._connect_source)
 
-    def _run_command(self, command, cwd=None):
-        """Helper to run shell commands and return structured output."""
-        try:
-            process = subprocess.run(
-                command,
-                shell=True,
-                check=True,
-                capture_output=True,
-                text=True,
-                cwd=cwd
-            )
-            return {
-                "status": "success",
-                "stdout": process.stdout,
-                "stderr": process.stderr,
-                "returncode": process.returncode,
-            }
-        except subprocess.CalledProcessError as e:
-            return {
-                "status": "error",
-                "stdout": e.stdout,
-                "stderr": e.stderr,
-                "returncode": e.returncode,
-            }
+    async def _run_command(self, command, cwd=None, timeout=config.MCP_COMMAND_TIMEOUT):
+        """Helper to run shell commands without blocking the event loop."""
+        return await run_command(command, cwd=cwd, timeout=timeout)
+
+    def _summarize(self, tool, result, database=None):
+        """Feeds the anomaly detector, stores raw stdout/stderr as an artifact and returns the compact summary the agents see."""
+        self.anomalies.observe_command(tool, result, database)
+        return summarize_result(self.artifacts, tool, result)
+
+    def _connect_source(self, database=None):
+        return pymysql.connect(host=self.legacy_db_host,
+                               port=config.LEGACY_DB_PORT,
+                               user=self.legacy_db_user,
+                               password=self.legacy_db_password,
+                               database=database or self.legacy_db_name,
+                               cursorclass=pymysql.cursors.DictCursor,
+                               autocommit=True,
+                               read_timeout=config.DB_QUERY_TIMEOUT,
+                               write_timeout=config.DB_QUERY_TIMEOUT)
+
+    def _connect_target(self, host, password, database=None):
+        return pymysql.connect(host=host,
+                               port=config.CLOUD_SQL_PORT,
+                               user="root",
+                               password=password,
+                               database=database or self.legacy_db_name,
+                               cursorclass=pymysql.cursors.DictCursor,
+                               autocommit=True,
+                               read_timeout=config.DB_QUERY_TIMEOUT,
+                               write_timeout=config.DB_QUERY_TIMEOUT)
+
+    async def _cloud_sql_endpoint(self, instance=config.CLOUD_SQL_INSTANCE_NAME):
+        """Resolves a Cloud SQL instance's IP address and the root password, cached for CLOUD_SQL_ENDPOINT_CACHE_TTL."""
+        cached = self._target_endpoints.get(instance)
+        if cached and cached[2] > time.monotonic():
+            return cached[0], cached[1]
+        cloud_sql_password = await run_blocking(get_secret, config.CLOUD_SQL_ROOT_PASSWORD_SECRET)
+        result = await self._run_command(f"{config.GCLOUD_BIN} sql instances describe {instance} --project={config.GCP_PROJECT_ID} --format='json(ipAddresses.ipAddress)'")
+        if result['status'] == 'error':
+            return result, None
+        # gcloud renders ipAddresses as a list even when the format projects a single field.
+        addresses = json.loads(result['stdout'])['ipAddresses']
+        cloud_sql_ip = (addresses[0] if isinstance(addresses, list) else addresses)['ipAddress']
+        self._target_endpoints[instance] = (cloud_sql_ip, cloud_sql_password, time.monotonic() + config.CLOUD_SQL_ENDPOINT_CACHE_TTL)
+        return cloud_sql_ip, cloud_sql_password
+
+    async def _get_target_pool(self, scope):
+        """Returns the Cloud SQL connection pool for the scope's database, rebuilding it if the instance endpoint changed."""
+        cloud_sql_ip, cloud_sql_password = await self._cloud_sql_endpoint(scope.instance)
+        if cloud_sql_password is None:
+            return None, cloud_sql_ip
+        key = (scope.instance, scope.database)
+        pool, endpoint = self.target_pools.get(key, (None, None))
+        if pool is None or endpoint != (cloud_sql_ip, cloud_sql_password):
+            if pool is not None:
+                pool.close()
+            pool = ConnectionPool(lambda: self._connect_target(cloud_sql_ip, cloud_sql_password, scope.database))
+            self.target_pools[key] = (pool, (cloud_sql_ip, cloud_sql_password))
+        return pool, None
+
+    def _import_lock(self, instance):
+        return self._import_locks.setdefault(instance, asyncio.Lock())
+
+    def _source_pool_for(self, database):
+        return ConnectionPool(lambda: self._connect_source(database))
+
+    def _scope(self, database=None):
+        """
+        The scope a per-database tool works in: the named database of the active batch run, or
+        the single-database default (LEGACY_DB_NAME_SECRET on CLOUD_SQL_INSTANCE_NAME). None if
+        `database` is neither.
+        """
+        database = database or self.legacy_db_name
+        if database in self.scopes:
+            return self.scopes[database]
+        if database == self.legacy_db_name:
+            return DatabaseScope(self.legacy_db_name, config.CLOUD_SQL_INSTANCE_NAME, self.checkpoint, self.source_pool)
+        return None
+
+    @staticmethod
+    def _unknown_database(database):
+        return {"status": "error", "message": f"Database {database} is not part of the active batch run; start one with start_batch_run."}
+
+    def _source_tables(self, scope):
+        with scope.source_pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE' ORDER BY TABLE_NAME",
+                               (scope.database,))
+                return [row["TABLE_NAME"] for row in cursor.fetchall()]
+
+    def _completed_phase(self, phase, checkpoint=None):
+        """The stored result of a phase the active run (or `checkpoint`'s run) already finished, or None if it still has to run."""
+        checkpoint = checkpoint or self.checkpoint
+        state = checkpoint.phase_state(phase)
+        if state["status"] != DONE:
+            return None
+        return {"status": "success", "skipped": True, "message": f"Phase '{phase}' already completed in run {checkpoint.run_id}.",
+                "data": state["detail"]}
+
+    @staticmethod
+    def _schema_not_applied(scope):
+        """An error result if the run converted the schema but has not applied it to the target yet, else None."""
+        if scope.checkpoint.phase_state("schema")["status"] == DONE and scope.checkpoint.phase_state("schema_apply")["status"] != DONE:
+            return {"status": "error", "message": f"The converted schema of {scope.database} has not been applied to the target; "
+                                                  "run apply_schema before loading, so the data is not loaded into the source's DDL."}
+        return None
+
+    def _source_sizing(self, scope, refresh=False):
+        """Per-table source stats plus strategy estimates for the scope's database, reused for SOURCE_SIZE_CACHE_TTL seconds."""
+        cached = self._source_sizes.get(scope.database)
+        if not refresh and cached and cached[1] > time.monotonic():
+            return cached[0]
+        started = time.monotonic()
+        stats, source = SourceSizer(scope.source_pool, scope.database).collect_table_stats()
+        plan = DumpPlanner(scope.source_pool, scope.database).plan(stats=stats)
+        estimates, recommended = transfer_estimates(stats, plan)
+        data_bytes = sum(table["data_bytes"] for table in stats)
+        index_bytes = sum(table["index_bytes"] for table in stats)
+        sizing = {
+            "database_name": scope.database,
+            "size_in_gb": round((data_bytes + index_bytes) / 1024 ** 3, 3),
+            "data_bytes": data_bytes,
+            "index_bytes": index_bytes,
+            "row_estimate": sum(table["row_estimate"] for table in stats),
+            "tables_total": len(stats),
+            "stats_source": source,
+            "strategies": estimates,
+            "recommended_strategy": recommended,
+            "tables": stats,
+            "query_seconds": round(time.monotonic() - started, 3),
+            "measured_at": time.time(),
+        }
+        self._source_sizes[scope.database] = (sizing, time.monotonic() + config.SOURCE_SIZE_CACHE_TTL)
+        return sizing
 
     # --- Resources ---
-    async def get_source_db_size(self):
-        """Estimates the size of the source database."""
+    async def get_source_db_size(self, refresh: bool = False, limit: int = config.SOURCE_SIZE_TABLE_LIMIT, database: str = None):
+        """
+        Sizes the source database per table (data, index, estimated rows, average row length,
+        BLOB/TEXT columns, engine) and estimates the transfer time of each strategy.
+        `recommended_strategy` is the fastest eligible one. Only the `limit` largest tables are
+        listed. Results are cached for SOURCE_SIZE_CACHE_TTL seconds unless refresh is set.
+        In a batch run, `database` selects one of the batch's databases.
+        """
         if not self.legacy_db_host:
             return {"error": "Legacy DB credentials not configured."}
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
         try:
-            connection = pymysql.connect(host=self.legacy_db_host,
-                                         user=self.legacy_db_user,
-                                         password=self.legacy_db_password,
-                                         database=self.legacy_db_name,
-                                         cursorclass=pymysql.cursors.DictCursor)
-            with connection.cursor() as cursor:
-                sql = """
-                SELECT table_schema AS 'database_name', 
-                SUM(data_length + index_length) / 1024 / 1024 / 1024 AS 'size_in_gb' 
-                FROM information_schema.TABLES 
-                WHERE table_schema = %s
-                GROUP BY table_schema;
-                """
-                cursor.execute(sql, (self.legacy_db_name,))
-                result = cursor.fetchone()
-            connection.close()
-            return {"status": "success", "data": result}
+            sizing = await run_blocking(self._source_sizing, scope, refresh)
+            data = {**sizing, "tables": sizing["tables"][:limit],
+                    "cache_age_seconds": round(time.time() - sizing["measured_at"], 1)}
+            return {"status": "success", "data": data}
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
-    async def get_source_schema(self, tables: list = None):
-        """Gets CREATE TABLE statements from the source database."""
+    async def get_source_schema(self, tables: list = None, offset: int = 0, limit: int = config.SCHEMA_PAGE_SIZE, refresh: bool = False,
+                                database: str = None):
+        """
+        Gets CREATE TABLE statements (plus views, routines and triggers on the first page) from the source database.
+        Results are paged by table name; pass the returned `next_offset` to fetch the next slice.
+        Unchanged tables are served from the on-disk schema cache unless refresh is set.
+        """
         if not self.legacy_db_host:
             return {"error": "Legacy DB credentials not configured."}
-        
-        schemas = {}
-        try:
-            connection = pymysql.connect(host=self.legacy_db_host,
-                                         user=self.legacy_db_user,
-                                         password=self.legacy_db_password,
-                                         database=self.legacy_db_name,
-                                         cursorclass=pymysql.cursors.DictCursor)
-            with connection.cursor() as cursor:
-                if not tables:
-                    cursor.execute("SHOW TABLES")
-                    tables = [for row in cursor.fetchall()]
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
 
-                for table in tables:
-                    cursor.execute(f"SHOW CREATE TABLE `{table}`")
-                    schemas[table] = cursor.fetchone()
-            connection.close()
+        try:
+            extractor = SchemaExtractor(scope.source_pool, scope.database)
+            schemas = await run_blocking(extractor.extract, tables, offset, limit, refresh)
             return {"status": "success", "data": schemas}
         except Exception as e:
             return {"status": "error", "message": str(e)}
             
-    async def get_gcp_project_state(self):
-        """Gets the state of key GCP resources."""
-        command = f"gcloud sql instances describe {config.CLOUD_SQL_INSTANCE_NAME} --project={config.GCP_PROJECT_ID} --format=json"
-        return self._run_command(command)
+    async def _describe_instance(self, instance=config.CLOUD_SQL_INSTANCE_NAME):
+        command = f"{config.GCLOUD_BIN} sql instances describe {instance} --project={config.GCP_PROJECT_ID} --format=json"
+        return await self._run_command(command)
+
+    async def get_gcp_project_state(self, instance: str = config.CLOUD_SQL_INSTANCE_NAME):
+        """Gets the state of key GCP resources (state, version, tier and IPs; the full JSON is kept as an artifact)."""
+        return self._summarize("get_gcp_project_state", await self._describe_instance(instance))
+
+    async def get_performance_summary(self, run_id: str = None):
+        """
+        Measured performance of a run (default: the active one): per phase the elapsed and busy seconds,
+        bytes and rows moved with their throughput, subprocess CPU seconds and peak RSS, and the slowest tables.
+        """
+        if run_id and run_id != self.tracer.run_id:
+            summary = await run_blocking(self.tracer.saved_summary, run_id)
+            if summary is None:
+                return {"status": "error", "message": f"No telemetry recorded for run: {run_id}"}
+            return {"status": "success", "data": summary}
+        return {"status": "success", "data": self.tracer.summary()}
+
+    async def get_anomalies(self, since: int = 0, min_severity: str = None):
+        """
+        Anomalies flagged by the built-in detector after sequence number `since` (failed commands,
+        error patterns on stderr, slow or stalled jobs, throughput below the rolling baseline).
+        Pass the returned `last_seq` as `since` to see only new ones.
+        """
+        return {"status": "success", "data": {"anomalies": self.anomalies.since(since, min_severity), "last_seq": self.anomalies.last_seq}}
+
+    async def get_artifact(self, artifact_id: str, stream: str = "stdout", offset: int = 0, limit: int = config.ARTIFACT_SLICE_LINES, grep: str = None):
+        """
+        Fetches a slice of the raw output behind a tool summary's `artifact_id`: lines [offset, offset+limit)
+        of stdout or stderr, optionally only lines matching the `grep` regex. Page with `next_offset`.
+        """
+        try:
+            return {"status": "success", "data": await run_blocking(self.artifacts.read, artifact_id, stream, offset, limit, grep)}
+        except (KeyError, ValueError, re.error) as e:
+            return {"status": "error", "message": str(e)}
+
+    async def get_job_log(self, job_id: str, offset: int = 0, limit: int = config.ARTIFACT_SLICE_LINES, grep: str = None):
+        """Fetches a slice of a background job's log (lines are prefixed [stdout]/[stderr]), like get_artifact."""
+        job = self.jobs.get(job_id)
+        if not job:
+            return {"status": "error", "message": f"Unknown job: {job_id}"}
+        try:
+            return {"status": "success", "data": {"job_id": job_id, **await run_blocking(read_lines, job.log.path, offset, limit, grep)}}
+        except (OSError, re.error) as e:
+            return {"status": "error", "message": str(e)}
+
+    def _run_summary(self, run_id):
+        """RunStateStore.summary, plus for a batch run each database's instance, child run and phase statuses."""
+        summary = self.run_state.summary(run_id)
+        if summary is None or "batch" not in summary["params"]:
+            return summary
+        members = self.run_state.units(run_id, "batch")
+        summary["databases"] = {}
+        for database in summary["params"]["batch"]["databases"]:
+            member = members.get(database) or {"status": PENDING, "detail": {}}
+            child = self.run_state.summary(member["detail"]["run_id"]) if member["detail"].get("run_id") else None
+            summary["databases"][database] = {
+                **member["detail"],
+                "status": member["status"],
+                "phases": {phase: state["status"] for phase, state in child["phases"].items()} if child else {},
+                "incomplete_units": child["incomplete_units"] if child else {},
+            }
+        return summary
+
+    async def get_run_state(self, run_id: str = None, database: str = None):
+        """
+        Returns per-phase status, unit counts and incomplete units of a run (default: the active run).
+        For a batch run it also lists every database with its target instance, child run and phase
+        statuses; `database` returns that database's child run instead.
+        """
+        if database is not None:
+            scope = self._scope(database)
+            if scope is None or not scope.checkpoint.active:
+                return self._unknown_database(database)
+            run_id = scope.checkpoint.run_id
+        run_id = run_id or self.checkpoint.run_id or await run_blocking(self.run_state.latest_run_id)
+        summary = await run_blocking(self._run_summary, run_id) if run_id else None
+        if summary is None:
+            return {"status": "error", "message": f"Unknown run: {run_id}"}
+        return {"status": "success", "data": summary}
 
     # --- Tools ---
-    async def provision_infra(self):
-        """Provisions GCP infrastructure using Terraform."""
-        tf_dir = os.path.join(os.getcwd(), 'terraform')
-        command = f"terraform -chdir={tf_dir} init && terraform -chdir={tf_dir} apply -auto-approve -var='gcp_project_id={config.GCP_PROJECT_ID}' -var='gcp_region={config.GCP_REGION}' -var='gcp_zone={config.GCP_ZONE}' -var='cloud_sql_instance_name={config.CLOUD_SQL_INSTANCE_NAME}' -var='cloud_sql_db_version={config.CLOUD_SQL_DB_VERSION}' -var='cloud_sql_tier={config.CLOUD_SQL_TIER}' -var='cloud_sql_root_password_secret={config.CLOUD_SQL_ROOT_PASSWORD_SECRET}' -var='cloud_sql_backup_start_time={config.CLOUD_SQL_BACKUP_START_TIME}' -var='gcs_bucket_name_suffix={config.GCS_BUCKET_NAME_SUFFIX}'"
-        return self._run_command(command)
+    async def start_run(self, run_id: str = None, params: dict = None):
+        """
+        Starts recording a migration run, or resumes an existing one when run_id is given.
+        While a run is active, completed phases are skipped and dump, load, import and validation
+        only redo the tables or files that are not yet done.
+        """
+        if run_id:
+            if await run_blocking(self.run_state.get_run, run_id) is None:
+                return {"status": "error", "message": f"Unknown run: {run_id}"}
+            await run_blocking(self.run_state.set_run_status, run_id, RUNNING)
+        else:
+            run_id = await run_blocking(self.run_state.create_run, params)
+        await self._close_scopes()
+        self.checkpoint = RunCheckpoint(self.run_state, run_id)
+        self.tracer.start_run(run_id)
+        return await self.get_run_state(run_id)
+
+    def _existing_databases(self, databases):
+        with self.source_pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT SCHEMA_NAME FROM information_schema.SCHEMATA WHERE SCHEMA_NAME IN ({', '.join(['%s'] * len(databases))})",
+                               databases)
+                return {row["SCHEMA_NAME"] for row in cursor.fetchall()}
+
+    async def _close_pools(self, scope):
+        scope.source_pool.close()
+        for key in [key for key in self.target_pools if key[1] == scope.database]:
+            self.target_pools.pop(key)[0].close()
+        for key in [key for key in self.script_pools if key[1] == scope.database]:
+            await self.script_pools.pop(key).close()
+
+    async def _close_scopes(self):
+        for scope in self.scopes.values():
+            await self._close_pools(scope)
+        self.scopes = {}
+
+    async def _release_scope(self, scope, drain):
+        """
+        Stops the database's binlog catch-ups (draining them first with `drain`) and closes its
+        source and target connections, so a finished database of a batch holds no replication
+        stream or pooled connection. Its scope gets an empty source pool for later tools.
+        """
+        catchups = [catchup for catchup in self.catchups.values() if catchup.database == scope.database and catchup.status == "running"]
+        stopped = {catchup.id: await catchup.stop(drain=drain) for catchup in catchups}
+        await self._close_pools(scope)
+        scope.source_pool = self._source_pool_for(scope.database)
+        return stopped
+
+    async def start_batch_run(self, databases: list = None, instances: list = None, run_id: str = None, params: dict = None):
+        """
+        Starts a batch run that migrates several databases of the legacy host, or resumes one when
+        run_id is given. Each database gets its own child run, resumed on its own, and a target
+        instance: databases are spread over `instances` (default: CLOUD_SQL_INSTANCE_NAME and
+        CLOUD_SQL_ADDITIONAL_INSTANCES) largest first, so every instance gets a similar number of
+        bytes. The per-database tools then take `database` to pick one of them. `instances` must be
+        instances provision_infra manages. Databases are sized BATCH_MAX_ACTIVE_DATABASES at a time.
+        """
+        if not self.legacy_db_host:
+            return {"error": "Legacy DB credentials not configured."}
+        if run_id:
+            batch = await run_blocking(self.run_state.get_run, run_id)
+            if batch is None or "batch" not in batch["params"]:
+                return {"status": "error", "message": f"Unknown batch run: {run_id}"}
+            members = await run_blocking(self.run_state.units, run_id, "batch")
+            if any(database not in members for database in batch["params"]["batch"]["databases"]):
+                return {"status": "error", "message": f"Batch run {run_id} was not fully created; start a new one."}
+            scopes = {database: DatabaseScope(database, members[database]["detail"]["instance"],
+                                              RunCheckpoint(self.run_state, members[database]["detail"]["run_id"]),
+                                              self._source_pool_for(database))
+                      for database in batch["params"]["batch"]["databases"]}
+            await run_blocking(self.run_state.set_run_status, run_id, RUNNING)
+            for database, scope in scopes.items():
+                if members[database]["status"] != DONE:
+                    await run_blocking(self.run_state.set_run_status, scope.checkpoint.run_id, RUNNING)
+        else:
+            databases = list(dict.fromkeys(databases or []))
+            instances = list(dict.fromkeys(instances or batch_instances()))
+            if not databases:
+                return {"status": "error", "message": "No databases given."}
+            unmanaged = [instance for instance in instances if instance not in batch_instances()]
+            if unmanaged:
+                return {"status": "error", "message": f"Not provisioned by provision_infra: {', '.join(unmanaged)}. "
+                                                      f"Use CLOUD_SQL_INSTANCE_NAME or CLOUD_SQL_ADDITIONAL_INSTANCES: {', '.join(batch_instances())}"}
+            try:
+                missing = set(databases) - await run_blocking(self._existing_databases, databases)
+            except Exception as e:
+                return {"status": "error", "message": str(e)}
+            if missing:
+                return {"status": "error", "message": f"Not found on the legacy host: {', '.join(sorted(missing))}"}
+            scopes = {database: DatabaseScope(database, None, RunCheckpoint(), self._source_pool_for(database)) for database in databases}
+            slots = asyncio.Semaphore(config.BATCH_MAX_ACTIVE_DATABASES)
 
-    async def destroy_infra(self):
+            async def size(scope):
+                async with slots:
+                    try:
+                        return await run_blocking(self._source_sizing, scope)
+                    finally:
+                        # Sized databases keep no connections open until their migration starts.
+                        scope.source_pool.close()
+                        scope.source_pool = self._source_pool_for(scope.database)
+
+            try:
+                sizings = await asyncio.gather(*(size(scope) for scope in scopes.values()))
+            except Exception as e:
+                for scope in scopes.values():
+                    scope.source_pool.close()
+                return {"status": "error", "message": str(e)}
+            sizes = {sizing["database_name"]: sizing["data_bytes"] + sizing["index_bytes"] for sizing in sizings}
+            assignment = assign_instances(sizes, instances)
+            run_id = await run_blocking(self.run_state.create_run, {**(params or {}), "batch": {"databases": databases, "instances": instances}})
+            for database, scope in scopes.items():
+                scope.instance = assignment[database]
+                child_run_id = await run_blocking(self.run_state.create_run, {**(params or {}), "batch_run_id": run_id,
+                                                                               "database": database, "instance": scope.instance})
+                scope.checkpoint = RunCheckpoint(self.run_state, child_run_id)
+                await run_blocking(self.run_state.set_unit, run_id, "batch", database, RUNNING,
+                                   {"run_id": child_run_id, "instance": scope.instance, "size_gb": round(sizes[database] / 1024 ** 3, 3)})
+        await self._close_scopes()
+        self.scopes = scopes
+        self.checkpoint = RunCheckpoint(self.run_state, run_id)
+        self.tracer.start_run(run_id)
+        return await self.get_run_state(run_id)
+
+    async def finish_run(self, status: str = DONE, database: str = None):
+        """
+        Marks the active run as finished ('done' or 'failed') and stops recording. In a batch run,
+        `database` finishes only that database's child run; finishing the batch itself ends the batch.
+        Finishing a database stops its binlog catch-up, drained when it is done (the catch-up's
+        position stays checkpointed for a later start_binlog_catchup), and closes its connections.
+        """
+        if database is not None:
+            scope = self.scopes.get(database)
+            if scope is None:
+                return self._unknown_database(database)
+            catchups = await self._release_scope(scope, drain=status == DONE)
+            await run_blocking(self.run_state.set_run_status, scope.checkpoint.run_id, status)
+            self.checkpoint.units("batch", [database], status)
+            state = await self.get_run_state(scope.checkpoint.run_id)
+            if catchups and state["status"] == "success":
+                state["data"]["catchups"] = catchups
+            return state
+        if not self.checkpoint.active:
+            return {"status": "error", "message": "No active run."}
+        run_id = self.checkpoint.run_id
+        await run_blocking(self.run_state.set_run_status, run_id, status)
+        await self._close_scopes()
+        self.checkpoint = RunCheckpoint()
+        self.tracer.start_run(None)
+        return await self.get_run_state(run_id)
+
+    async def _instance_matches(self, instance):
+        result = await self._describe_instance(instance)
+        if result["status"] != "success":
+            return False
+        try:
+            described = json.loads(result["stdout"])
+        except ValueError:
+            return False
+        return (described.get("state") == "RUNNABLE"
+                and described.get("databaseVersion") == config.CLOUD_SQL_DB_VERSION
+                and described.get("settings", {}).get("tier") == config.CLOUD_SQL_TIER)
+
+    async def _live_state_matches(self):
+        """Whether every managed Cloud SQL instance exists, is running and has the configured version and tier."""
+        return all(await asyncio.gather(*(self._instance_matches(instance) for instance in batch_instances())))
+
+    async def provision_infra(self, targets: list = None, parallelism: int = config.TERRAFORM_PARALLELISM, plan_only: bool = False, force: bool = False, timeout: int = config.MCP_LONG_COMMAND_TIMEOUT):
+        """
+        Provisions GCP infrastructure using Terraform. Safe to call repeatedly: if the terraform files
+        and config values are unchanged since the last successful apply and the live Cloud SQL instance
+        matches, it returns "no changes" without running terraform (pass force=true to re-check).
+        `targets` limits the apply to "cloud_sql" and/or "orchestrator" (VM and bucket); plan_only
+        saves a plan that a later call with the same targets applies without re-planning.
+        """
+        completed = self._completed_phase("setup")
+        if completed and not (targets or plan_only or force):
+            return completed
+        unknown = [target for target in targets or [] if target not in TARGETS]
+        if unknown:
+            return {"status": "error", "message": f"Unknown targets: {', '.join(unknown)}. Use: {', '.join(TARGETS)}"}
+        runner = TerraformRunner(os.path.join(os.getcwd(), 'terraform'))
+        if not (force or plan_only) and await run_blocking(runner.applied, targets) and await self._live_state_matches():
+            self._checkpoint_setup(targets, DONE)
+            return {"status": "success", "changes": False, "skipped": True,
+                    "message": "No changes: configuration unchanged since the last apply and the Cloud SQL instance is running."}
+        if plan_only:
+            return self._summarize("provision_infra", await runner.apply(targets, parallelism, timeout, plan_only=True))
+        self._checkpoint_setup(targets, RUNNING)
+        result = await runner.apply(targets, parallelism, timeout)
+        self._checkpoint_setup(targets, DONE if result["status"] == "success" else FAILED)
+        if result.get("changes"):
+            self._target_endpoints = {}
+        return self._summarize("provision_infra", result)
+
+    def _checkpoint_setup(self, targets, status):
+        """A targeted apply is recorded as "setup" units, one per target; only a full apply settles the phase."""
+        if targets:
+            self.checkpoint.units("setup", sorted(targets), status)
+        else:
+            self.checkpoint.phase("setup", status)
+
+    async def destroy_infra(self, timeout: int = config.MCP_LONG_COMMAND_TIMEOUT):
         """Destroys GCP infrastructure using Terraform."""
         tf_dir = os.path.join(os.getcwd(), 'terraform')
-        command = f"terraform -chdir={tf_dir} destroy -auto-approve -var='gcp_project_id={config.GCP_PROJECT_ID}' -var='gcp_region={config.GCP_REGION}'"
-        return self._run_command(command)
+        command = f"{config.TERRAFORM_BIN} -chdir={tf_dir} destroy -auto-approve -var='gcp_project_id={config.GCP_PROJECT_ID}' -var='gcp_region={config.GCP_REGION}'"
+        self._target_endpoints = {}
+        await run_blocking(TerraformRunner(tf_dir).forget)
+        return self._summarize("destroy_infra", await self._run_command(command, timeout=timeout))
 
-    async def run_gcs_import(self, bucket_uri: str, database: str):
-        """Runs a Cloud SQL import from a GCS bucket."""
-        command = f"gcloud sql import sql {config.CLOUD_SQL_INSTANCE_NAME} {bucket_uri} --database={database} --project={config.GCP_PROJECT_ID} --quiet"
-        return self._run_command(command)
+    async def run_gcs_import(self, bucket_uri: str, database: str, instance: str = None, timeout: int = config.MCP_LONG_COMMAND_TIMEOUT):
+        """
+        Runs a Cloud SQL import from a GCS bucket into `instance` (default: the database's instance in
+        the active batch run, else CLOUD_SQL_INSTANCE_NAME). Waits for other imports into that instance.
+        """
+        scope = self._scope(database)
+        instance = instance or (scope.instance if scope is not None else config.CLOUD_SQL_INSTANCE_NAME)
+        command = f"{config.GCLOUD_BIN} sql import sql {instance} {bucket_uri} --database={database} --project={config.GCP_PROJECT_ID} --quiet"
+        async with self._import_lock(instance):
+            result = await self._run_command(command, timeout=timeout)
+        return self._summarize("run_gcs_import", result, database)
 
     async def run_dms_job(self, job_id: str):
         """Starts a Database Migration Service job."""
-        command = f"gcloud database-migration jobs start {job_id} --region={config.GCP_REGION} --project={config.GCP_PROJECT_ID}"
-        return self._run_command(command)
-
-    async def run_mydumper(self, output_dir: str, threads: int = 4):
-        """Runs the mydumper command."""
-        command = f"mydumper --host={self.legacy_db_host} --user={self.legacy_db_user} --password='{self.legacy_db_password}' --database={self.legacy_db_name} --outputdir={output_dir} --threads={threads} --compress --long-query-guard=60"
-        return self._run_command(command)
-
-    async def run_myloader(self, input_dir: str, threads: int = 4):
-        """Runs the myloader command."""
-        cloud_sql_password = get_secret(config.CLOUD_SQL_ROOT_PASSWORD_SECRET)
-        result = self._run_command(f"gcloud sql instances describe {config.CLOUD_SQL_INSTANCE_NAME} --project={config.GCP_PROJECT_ID} --format='json(ipAddresses.ipAddress)'")
-        if result['status'] == 'error':
+        command = f"{config.GCLOUD_BIN} database-migration jobs start {job_id} --region={config.GCP_REGION} --project={config.GCP_PROJECT_ID}"
+        return self._summarize("run_dms_job", await self._run_command(command))
+
+    async def _job_result(self, job, wait):
+        if wait:
+            summary = await self.jobs.wait(job.id)
+            result = {"status": "success" if summary["status"] == "success" else "error",
+                      "job_status": summary["status"], "returncode": summary["returncode"], "data": summary}
+            if result["status"] == "error":
+                result["message"] = f"{job.name} job {job.id} ended with status '{summary['status']}' (return code {summary['returncode']})."
             return result
-        cloud_sql_ip = json.loads(result['stdout'])['ipAddresses']['ipAddress']
-        
-        command = f"myloader --host={cloud_sql_ip} --user=root --password='{cloud_sql_password}' --database={self.legacy_db_name} --directory={input_dir} --threads={threads} --compress-protocol --verbose=3"
-        return self._run_command(command)
-
-    async def run_validation_script(self, script_content: str, language: str):
-        """Runs a validation script."""
-        if language == "sql":
-            return {"status": "error", "message": "SQL validation script execution needs more implementation details for connecting to both databases."}
-        elif language == "python":
-            with open("temp_validation_script.py", "w") as f:
-                f.write(script_content)
-            result = self._run_command("python3 temp_validation_script.py")
-            os.remove("temp_validation_script.py")
+        return {"status": "accepted", "job_id": job.id, "message": f"{job.name} started. Poll get_job_status or get_job_events for progress."}
+
+    async def plan_dump(self, tables: list = None, database: str = None):
+        """Sizes a dump: per-table chunking, thread count and chunk size from source, CPU and network headroom."""
+        if not self.legacy_db_host:
+            return {"error": "Legacy DB credentials not configured."}
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
+        try:
+            sizing = await run_blocking(self._source_sizing, scope)
+            plan = await run_blocking(DumpPlanner(scope.source_pool, scope.database).plan, tables, sizing["tables"])
+            return {"status": "success", "data": plan}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    async def _start_mydumper(self, scope, output_dir, threads, rows, chunk_filesize, timeout, no_schemas=False, max_threads=None):
+        """
+        Plans and starts a mydumper job for the scope's database; returns (job, plan), or (None, error result).
+        On a resumed run only the tables whose dump has not completed are dumped again, and the
+        earlier dump's binlog position is kept so a catch-up replays everything since either snapshot.
+        When every table is already dumped, the phase is marked done and (None, skipped result) is returned.
+        """
+        checkpoint = scope.checkpoint
+        tables = await run_blocking(self._source_tables, scope)
+        done = checkpoint.completed("dump")
+        previous_binlog = (checkpoint.phase_state("dump")["detail"] or {}).get("binlog") if done else None
+        if done:
+            tables = [table for table in tables if table not in done]
+            if not tables:
+                # The run stopped after the last table's unit was recorded; an empty --tables-list would dump everything.
+                checkpoint.phase("dump", DONE, {"output_dir": output_dir, "binlog": previous_binlog})
+                return None, self._completed_phase("dump", checkpoint)
+        planned = await self.plan_dump(tables if done else None, database=scope.database)
+        if planned.get("status") != "success":
+            return None, planned
+        plan = planned["data"]
+        if max_threads:
+            plan["threads"] = max(1, min(plan["threads"], max_threads))
+        plan["threads"] = threads or plan["threads"]
+        plan["rows"] = rows or plan["rows"]
+        plan["chunk_filesize_mb"] = chunk_filesize or plan["chunk_filesize_mb"]
+        await run_blocking(save_plan, plan, output_dir)
+
+        command = f"mydumper --host={self.legacy_db_host} --port={config.LEGACY_DB_PORT} --user={self.legacy_db_user} --password='{self.legacy_db_password}' --database={scope.database} --outputdir={output_dir} --threads={plan['threads']} --rows={plan['rows']} --chunk-filesize={plan['chunk_filesize_mb']} --compress --long-query-guard=60 --verbose=3"
+        if no_schemas:
+            command += " --no-schemas"
+        if done:
+            command += f" --tables-list={','.join(f'{scope.database}.{table}' for table in tables)}"
+        progress = ProgressTracker(tables_total=plan["tables"], size_probe=lambda: directory_size(output_dir))
+
+        def on_finish(job):
+            status = DONE if job.status == "success" else FAILED
+            checkpoint.units("dump", tables, status)
+            binlog = earliest_position(previous_binlog, read_dump_position(output_dir)) if status == DONE else previous_binlog
+            checkpoint.phase("dump", status, {"output_dir": output_dir, "job_id": job.id, "binlog": binlog})
+
+        checkpoint.phase("dump", RUNNING, {"output_dir": output_dir})
+        checkpoint.units("dump", tables, RUNNING)
+        return self.jobs.start("mydumper", command, timeout=timeout, progress=progress, on_finish=on_finish, database=scope.database), plan
+
+    async def run_mydumper(self, output_dir: str, threads: int = None, rows: int = None, chunk_filesize: int = None, no_schemas: bool = False,
+                           max_threads: int = None, database: str = None, wait: bool = False, timeout: int = config.MCP_LONG_COMMAND_TIMEOUT):
+        """
+        Runs the mydumper command as a background job and returns its job id.
+        Unless given explicitly, threads, rows per chunk and chunk file size come from the dump planner;
+        the plan is returned with the job and saved next to the dump for run_myloader.
+        Set no_schemas to dump data only, when the converted schema is applied with apply_schema.
+        max_threads caps the planned dump threads, e.g. to share the source between the concurrent
+        dumps of a batch run; `database` picks the batch database to dump.
+        """
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
+        completed = self._completed_phase("dump", scope.checkpoint)
+        if completed:
+            return completed
+        job, plan = await self._start_mydumper(scope, output_dir, threads, rows, chunk_filesize, timeout, no_schemas=no_schemas,
+                                               max_threads=max_threads)
+        if job is None:
+            return plan
+        result = await self._job_result(job, wait)
+        result["plan"] = plan
+        return result
+
+    async def run_myloader(self, input_dir: str, threads: int = None, max_threads: int = None, database: str = None, wait: bool = False,
+                           timeout: int = config.MCP_LONG_COMMAND_TIMEOUT):
+        """
+        Runs the myloader command as a background job and returns its job id.
+        The thread count defaults to the load_threads of the plan saved by run_mydumper, capped at
+        max_threads when given (e.g. when several databases of a batch load into one instance).
+        Tables are checkpointed one by one: after a failed load, a table counts as loaded when its
+        row count on the target matches the dump's metadata. A retry skips loaded tables and
+        empties the others first, since myloader only inserts.
+        Once convert_schema has run, the load waits for apply_schema.
+        """
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
+        checkpoint = scope.checkpoint
+        completed = self._completed_phase("load", checkpoint)
+        if completed:
+            return completed
+        not_applied = self._schema_not_applied(scope)
+        if not_applied:
+            return not_applied
+        plan = await run_blocking(load_plan, input_dir)
+        threads = threads or min((plan or {}).get("load_threads") or config.TARGET_MAX_LOAD_THREADS, max_threads or config.TARGET_MAX_LOAD_THREADS)
+        cloud_sql_ip, cloud_sql_password = await self._cloud_sql_endpoint(scope.instance)
+        if cloud_sql_password is None:
+            return cloud_sql_ip
+
+        command = f"myloader --host={cloud_sql_ip} --port={config.CLOUD_SQL_PORT} --user=root --password='{cloud_sql_password}' --database={scope.database} --directory={input_dir} --threads={threads} --compress-protocol --verbose=3"
+        tables = sorted({table for table in (classify_dump_file(name)[1] for name in await run_blocking(os.listdir, input_dir)) if table})
+        done = checkpoint.completed("load")
+        if done:
+            tables = [table for table in tables if table not in done]
+            if not tables:
+                # The run stopped after the last table's unit was recorded; an empty --tables-list would load everything again.
+                checkpoint.phase("load", DONE, {"input_dir": input_dir})
+                return self._completed_phase("load", checkpoint)
+            command += f" --tables-list={','.join(f'{scope.database}.{table}' for table in tables)}"
+        if tables and checkpoint.phase_state("load")["status"] in (RUNNING, FAILED):
+            # An earlier attempt may have loaded part of these tables; reloading on top of that would duplicate rows.
+            pool, error = await self._get_target_pool(scope)
+            if pool is None:
+                return error
+            try:
+                await run_blocking(self._truncate_tables, pool, tables)
+            except pymysql.MySQLError as e:
+                return {"status": "error", "message": f"Could not empty the partially loaded tables: {e}"}
+        progress = ProgressTracker(bytes_total=await run_blocking(directory_size, input_dir), input_dir=input_dir)
+
+        async def on_finish(job):
+            loaded = set(tables) if job.status == "success" else await self._loaded_tables(scope, input_dir, tables)
+            checkpoint.units("load", sorted(loaded), DONE)
+            checkpoint.units("load", [table for table in tables if table not in loaded], FAILED)
+            checkpoint.phase("load", DONE if job.status == "success" else FAILED, {"input_dir": input_dir, "job_id": job.id})
+
+        checkpoint.phase("load", RUNNING, {"input_dir": input_dir})
+        checkpoint.units("load", tables, RUNNING)
+        job = self.jobs.start("myloader", command, timeout=timeout, progress=progress, on_finish=on_finish, database=scope.database)
+        result = await self._job_result(job, wait)
+        result["plan"] = {"threads": threads, "from_dump_plan": plan is not None}
+        return result
+
+    @staticmethod
+    def _truncate_tables(pool, tables):
+        with pool.connection() as connection:
+            with connection.cursor() as cursor:
+                # TRUNCATE refuses tables that other tables reference while foreign key checks are on.
+                cursor.execute("SET SESSION foreign_key_checks = 0")
+                try:
+                    for table in tables:
+                        try:
+                            cursor.execute(f"TRUNCATE TABLE `{table}`")
+                        except pymysql.err.ProgrammingError as e:
+                            if e.args[0] != 1146:  # ER_NO_SUCH_TABLE: nothing was loaded into it
+                                raise
+                finally:
+                    cursor.execute("SET SESSION foreign_key_checks = 1")
+
+    @staticmethod
+    def _target_row_counts(pool, tables):
+        counts = {}
+        with pool.connection() as connection:
+            with connection.cursor() as cursor:
+                for table in tables:
+                    cursor.execute(f"SELECT COUNT(*) AS n FROM `{table}`")
+                    counts[table] = cursor.fetchone()["n"]
+        return counts
+
+    async def _loaded_tables(self, scope, input_dir, tables):
+        """Tables whose row count on the target matches the dump's metadata; none when either cannot be read."""
+        expected = await run_blocking(dump_table_rows, input_dir)
+        counted = [table for table in tables if table in expected]
+        if not counted:
+            return set()
+        pool, _ = await self._get_target_pool(scope)
+        if pool is None:
+            return set()
+        try:
+            actual = await run_blocking(self._target_row_counts, pool, counted)
+        except pymysql.MySQLError:
+            return set()
+        return {table for table in counted if actual[table] == expected[table]}
+
+    async def run_pipelined_migration(self, output_dir: str = "/tmp/dump", storage_uri: str = None, upload_workers: int = config.PIPELINE_UPLOAD_WORKERS, schema_preloaded: bool = False, use_existing_dump: bool = False,
+                                      max_threads: int = None, database: str = None, wait: bool = False, timeout: int = config.MCP_LONG_COMMAND_TIMEOUT):
+        """
+        GCS Import strategy as one overlapped pipeline: mydumper writes the dump, finished files are
+        uploaded to the migration bucket in parallel, and Cloud SQL imports start while later tables
+        are still being dumped. Set schema_preloaded when the converted DDL was already applied to the
+        target; the dump then skips schema files. Set use_existing_dump to upload and import a dump that
+        run_mydumper already wrote to output_dir. Returns a pipeline id to poll with get_pipeline_status.
+        On a resumed run, a completed dump is not repeated and already imported files are skipped.
+        Pipelines of a batch run that import into the same instance take turns, file by file.
+        Once convert_schema has run, the load waits for apply_schema and never imports the dump's schema files.
+        """
+        if not self.legacy_db_host:
+            return {"error": "Legacy DB credentials not configured."}
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
+        completed = self._completed_phase("load", scope.checkpoint)
+        if completed:
+            return completed
+        not_applied = self._schema_not_applied(scope)
+        if not_applied:
+            return not_applied
+        # The source DDL in the dump would replace the converted schema already on the target.
+        schema_preloaded = schema_preloaded or scope.checkpoint.phase_state("schema_apply")["status"] == DONE
+        storage_uri = storage_uri or config.PIPELINE_STORAGE_URI or f"gs://{config.GCP_PROJECT_ID}{config.GCS_BUCKET_NAME_SUFFIX}"
+        try:
+            storage = storage_for(storage_uri)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        job, plan = None, None
+        if not use_existing_dump and not self._completed_phase("dump", scope.checkpoint):
+            job, plan = await self._start_mydumper(scope, output_dir, None, None, None, timeout, no_schemas=schema_preloaded,
+                                                   max_threads=max_threads)
+            if job is None:
+                if not plan.get("skipped"):
+                    return plan
+                plan = None  # Every table was already dumped: import the existing dump.
+        pipeline = DumpImportPipeline(output_dir, storage, scope.database, instance=scope.instance, upload_workers=upload_workers,
+                                      schema_preloaded=schema_preloaded, dump_job=job, checkpoint=scope.checkpoint,
+                                      observer=lambda tool, result: self.anomalies.observe_command(tool, result, scope.database),
+                                      tracer=self.tracer,
+                                      import_lock=self._import_lock(scope.instance)).start()
+        self.pipelines[pipeline.id] = pipeline
+        if wait:
+            summary = await pipeline.wait()
+            result = {"status": "success" if summary["status"] == "success" else "error", "data": summary, "plan": plan}
+            if result["status"] == "error":
+                result["message"] = summary["error"] or f"Pipeline {pipeline.id} ended with status '{summary['status']}'."
             return result
+        return {"status": "accepted", "pipeline_id": pipeline.id, "dump_job_id": job.id if job else None, "plan": plan,
+                "message": "Pipeline started. Poll get_pipeline_status for progress."}
+
+    async def get_pipeline_status(self, pipeline_id: str = None):
+        """Returns file counts per stage, bytes uploaded and per-stage busy time for one or all pipelines."""
+        if pipeline_id is None:
+            return {"status": "success", "data": [pipeline.summary() for pipeline in self.pipelines.values()]}
+        pipeline = self.pipelines.get(pipeline_id)
+        if not pipeline:
+            return {"status": "error", "message": f"Unknown pipeline: {pipeline_id}"}
+        return {"status": "success", "data": pipeline.summary()}
+
+    async def cancel_pipeline(self, pipeline_id: str):
+        """Stops a pipeline and its dump job."""
+        pipeline = self.pipelines.get(pipeline_id)
+        if not pipeline:
+            return {"status": "error", "message": f"Unknown pipeline: {pipeline_id}"}
+        if pipeline.dump_job is not None:
+            await self.jobs.cancel(pipeline.dump_job.id)
+        pipeline._task.cancel()
+        try:
+            await pipeline._task
+        except asyncio.CancelledError:
+            pass
+        return {"status": "success", "data": pipeline.summary()}
+
+    async def start_binlog_catchup(self, dump_dir: str = config.DUMP_OUTPUT_DIR, log_file: str = None, log_pos: int = None,
+                                   tables: list = None, batch_rows: int = config.BINLOG_CATCHUP_BATCH_ROWS,
+                                   workers: int = config.BINLOG_CATCHUP_WORKERS, database: str = None):
+        """
+        Replays changes made on the source since the bulk dump onto Cloud SQL, from the binlog position
+        mydumper recorded in dump_dir (or log_file/log_pos), in batched transactions, in parallel across
+        tables not linked by foreign keys. Tables without a primary key are refused; leave them out of `tables`.
+        It keeps following the source after catching up; poll get_catchup_status for lag, and call
+        stop_binlog_catchup with drain=true at cutover, once writes to the source have stopped.
+        On a resumed run it continues from the last applied position. In a batch run, each database
+        has its own catch-up, reading the binlog under its own replica server id.
+        """
+        if not self.legacy_db_host:
+            return {"error": "Legacy DB credentials not configured."}
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
+        checkpoint = scope.checkpoint
+        completed = self._completed_phase("catchup", checkpoint)
+        if completed:
+            return completed
+        running = [catchup for catchup in self.catchups.values() if catchup.status == "running"]
+        same_database = [catchup for catchup in running if catchup.database == scope.database]
+        if same_database:
+            return {"status": "error", "message": f"Binlog catch-up {same_database[0].id} of {scope.database} is already running."}
+        try:
+            problems = await run_blocking(source_problems, self.source_pool)
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+        if problems:
+            return {"status": "error", "unsupported": True, "message": " ".join(problems)}
+        resumed = checkpoint.phase_state("catchup")["detail"] or {}
+        if log_file and log_pos is not None:
+            position = {"log_file": log_file, "log_pos": int(log_pos)}
+        elif resumed.get("log_file"):
+            position = {"log_file": resumed["log_file"], "log_pos": resumed["log_pos"]}
         else:
+            position = (checkpoint.phase_state("dump")["detail"] or {}).get("binlog") or await run_blocking(read_dump_position, dump_dir)
+        if not position:
+            return {"status": "error", "message": f"No binlog position in {dump_dir}/metadata; pass log_file and log_pos."}
+        target_pool, error = await self._get_target_pool(scope)
+        if error:
+            return error
+        source_settings = {"host": self.legacy_db_host, "port": config.LEGACY_DB_PORT, "user": self.legacy_db_user,
+                           "password": self.legacy_db_password}
+        used_ids = {catchup.server_id for catchup in running}
+        server_id = next(server_id for server_id in itertools.count(config.BINLOG_CATCHUP_SERVER_ID) if server_id not in used_ids)
+        catchup = BinlogCatchup(source_settings, scope.source_pool, target_pool, scope.database, position,
+                                tables=tables, batch_rows=batch_rows, workers=workers, server_id=server_id,
+                                checkpoint=checkpoint, tracer=self.tracer)
+        try:
+            unkeyed = await run_blocking(catchup.unkeyed_tables)
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+        if unkeyed:
+            return {"status": "error", "unkeyed_tables": unkeyed,
+                    "message": f"{len(unkeyed)} table(s) have no primary key, so their changes cannot be replayed "
+                               "idempotently. Add primary keys, or pass `tables` without them and cut them over "
+                               "with writes stopped."}
+        self.catchups[catchup.start().id] = catchup
+        return {"status": "accepted", "catchup_id": catchup.id, "database": scope.database, "start_position": position,
+                "message": "Binlog catch-up started. Poll get_catchup_status until caught_up is true."}
+
+    async def get_catchup_status(self, catchup_id: str = None):
+        """Returns the applied binlog position, lag in seconds and bytes, and applied row changes for one or all catch-ups."""
+        if catchup_id is None:
+            return {"status": "success", "data": [catchup.summary() for catchup in self.catchups.values()]}
+        catchup = self.catchups.get(catchup_id)
+        if not catchup:
+            return {"status": "error", "message": f"Unknown binlog catch-up: {catchup_id}"}
+        return {"status": "success", "data": catchup.summary()}
+
+    async def stop_binlog_catchup(self, catchup_id: str, drain: bool = True):
+        """
+        Stops a binlog catch-up. With drain (the cutover), it first applies everything the source has
+        logged so far, so stop writes to the source before calling it; without drain it stops at once.
+        """
+        catchup = self.catchups.get(catchup_id)
+        if not catchup:
+            return {"status": "error", "message": f"Unknown binlog catch-up: {catchup_id}"}
+        summary = await catchup.stop(drain=drain)
+        return {"status": "error" if summary["status"] == "error" else "success", "data": summary}
+
+    def _reviewed_script(self, scope, reviewed):
+        """
+        Writes the converted script with the corrected statements for the objects convert_schema
+        left out for review merged in. Returns (script_path, unresolved objects); with no objects
+        to review, the converted script itself.
+        """
+        script_path = os.path.abspath(os.path.join(config.CONVERTED_SCHEMA_DIR, f"{scope.database}.sql"))
+        report_path = os.path.join(config.CONVERTED_SCHEMA_DIR, f"{scope.database}.report.json")
+        if not os.path.exists(report_path):
+            return script_path, []
+        with open(report_path) as f:
+            conversion = json.load(f)
+        if not conversion["needs_review"]:
+            return script_path, []
+        statements, unresolved = merge_reviewed(conversion["statements"], conversion["needs_review"], reviewed)
+        if unresolved:
+            return None, unresolved
+        reviewed_path = os.path.abspath(os.path.join(config.CONVERTED_SCHEMA_DIR, f"{scope.database}.reviewed.sql"))
+        with open(reviewed_path, "w") as f:
+            f.write(render_script(statements))
+        return reviewed_path, []
+
+    async def apply_schema(self, script_path: str = None, reviewed: list = None, database: str = None,
+                           timeout: int = config.MCP_LONG_COMMAND_TIMEOUT):
+        """
+        Creates the database on Cloud SQL if needed and runs the converted DDL script against it
+        with the mysql client. By default that is the script written by convert_schema, with the
+        corrected statements for its `needs_review` objects merged in: `reviewed` lists them as
+        {"object_type", "name", "ddl"}, and the schema is not applied while any is missing.
+        In a batch run, `database` picks the database, which is created on its assigned instance.
+        """
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
+        completed = self._completed_phase("schema_apply", scope.checkpoint)
+        if completed:
+            return completed
+        if not script_path:
+            script_path, unresolved = await run_blocking(self._reviewed_script, scope, reviewed)
+            if unresolved:
+                return {"status": "error", "unresolved": unresolved,
+                        "message": f"{len(unresolved)} object(s) flagged by convert_schema have no reviewed statement."}
+        if not os.path.exists(script_path):
+            return {"status": "error", "message": f"No converted schema at {script_path}; run convert_schema first."}
+        cloud_sql_ip, cloud_sql_password = await self._cloud_sql_endpoint(scope.instance)
+        if cloud_sql_password is None:
+            return cloud_sql_ip
+        client = f"mysql --host={cloud_sql_ip} --port={config.CLOUD_SQL_PORT} --user=root --password='{cloud_sql_password}'"
+        command = (f"{client} -e 'CREATE DATABASE IF NOT EXISTS `{scope.database}`' && "
+                   f"{client} {scope.database} < {script_path}")
+        scope.checkpoint.phase("schema_apply", RUNNING)
+        result = await self._run_command(command, timeout=timeout)
+        scope.checkpoint.phase("schema_apply", DONE if result["status"] == "success" else FAILED, {"script_path": script_path})
+        return self._summarize("apply_schema", result, scope.database)
+
+    def _convert_schema(self, scope, tables, rules, refresh):
+        schema = SchemaExtractor(scope.source_pool, scope.database).extract(tables, limit=None, refresh=refresh, include_objects=True)
+        conversion = DdlConverter(rules).convert(schema)
+        os.makedirs(config.CONVERTED_SCHEMA_DIR, exist_ok=True)
+        script_path = os.path.join(config.CONVERTED_SCHEMA_DIR, f"{scope.database}.sql")
+        report_path = os.path.join(config.CONVERTED_SCHEMA_DIR, f"{scope.database}.report.json")
+        with open(script_path, "w") as f:
+            f.write(conversion["script"])
+        with open(report_path, "w") as f:
+            json.dump({"report": conversion["report"], "needs_review": conversion["needs_review"], "summary": conversion["summary"],
+                       "statements": conversion["statements"]}, f, indent=2)
+        return {
+            "script_path": os.path.abspath(script_path),
+            "report_path": os.path.abspath(report_path),
+            "summary": conversion["summary"],
+            "needs_review": conversion["needs_review"],
+        }
+
+    async def convert_schema(self, tables: list = None, rules: list = None, refresh: bool = False, database: str = None):
+        """
+        Converts the source schema for Cloud SQL with the deterministic DDL rule engine
+        (MyISAM→InnoDB, DEFINER removal, utf8mb4 normalisation, ...). Writes the script and a
+        JSON change report to disk and returns a summary plus the objects that still need review.
+        """
+        if not self.legacy_db_host:
+            return {"error": "Legacy DB credentials not configured."}
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
+        checkpoint = scope.checkpoint
+        completed = self._completed_phase("schema", checkpoint)
+        if completed and not (tables or rules or refresh):
+            return completed
+        checkpoint.phase("schema", RUNNING)
+        try:
+            result = await run_blocking(self._convert_schema, scope, tables, rules, refresh)
+        except Exception as e:
+            checkpoint.phase("schema", FAILED)
+            return {"status": "error", "message": str(e)}
+        checkpoint.phase("schema", DONE, result)
+        return {"status": "success", "data": result}
+
+    async def run_validation_script(self, script_content: str, language: str, timeout: int = config.VALIDATION_SCRIPT_TIMEOUT,
+                                    cpu_seconds: int = config.VALIDATION_SCRIPT_CPU_SECONDS, database: str = None):
+        """
+        Runs a validation script in a pre-warmed worker process with its own workspace and CPU, memory
+        and wall-clock limits. Python scripts get `source` and `target` (pymysql sessions on the legacy
+        database and Cloud SQL that start read-only, returning dict rows) and report by assigning a
+        JSON-serializable value to `result`. SQL scripts may only run queries; each runs on both
+        databases and returns row counts, the first rows of each and whether they match.
+        In a batch run, `database` picks the database and its target instance.
+        """
+        if language not in ("python", "sql"):
             return {"status": "error", "message": f"Unsupported language: {language}"}
+        if not self.legacy_db_host:
+            return {"error": "Legacy DB credentials not configured."}
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
+        cloud_sql_ip, cloud_sql_password = await self._cloud_sql_endpoint(scope.instance)
+        if cloud_sql_password is None:
+            return cloud_sql_ip
+        script_pool = self.script_pools.setdefault((scope.instance, scope.database), ScriptWorkerPool())
+        database = {"database": scope.database, "read_timeout": config.DB_QUERY_TIMEOUT, "write_timeout": config.DB_QUERY_TIMEOUT}
+        try:
+            await script_pool.ensure({
+                "source": {"host": self.legacy_db_host, "port": config.LEGACY_DB_PORT, "user": self.legacy_db_user,
+                           "password": self.legacy_db_password, **database},
+                "target": {"host": cloud_sql_ip, "port": config.CLOUD_SQL_PORT, "user": "root",
+                           "password": cloud_sql_password, **database},
+            })
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+        reply = await script_pool.run(script_content, language, timeout, cpu_seconds=cpu_seconds,
+                                           memory_mb=config.VALIDATION_SCRIPT_MEMORY_MB)
+        record_process({key: reply[key] for key in ("cpu_seconds", "peak_rss_bytes") if reply.get(key) is not None})
+        reply["outcome"], reply["status"] = reply["status"], "success" if reply["status"] == "success" else "error"
+        return self._summarize("run_validation_script", reply)
+
+    async def run_validation_scripts(self, scripts: list, timeout: int = config.VALIDATION_SCRIPT_TIMEOUT,
+                                     cpu_seconds: int = config.VALIDATION_SCRIPT_CPU_SECONDS, database: str = None):
+        """
+        Runs several validation scripts in parallel on the database's worker pool. Each entry is
+        {"script_content": ..., "language": "python" | "sql"}; results are returned in order.
+        """
+        results = await asyncio.gather(*(self.run_validation_script(script.get("script_content", ""), script.get("language", "python"),
+                                                                     timeout=timeout, cpu_seconds=cpu_seconds, database=database)
+                                         for script in scripts))
+        failed = sum(1 for result in results if result.get("status") != "success")
+        return {"status": "success" if not failed else "error", "scripts": len(results), "failed": failed, "data": results}
+
+    async def _validate_held(self, validator, tables, catchup):
+        """
+        Validates while a binlog catch-up keeps the target following a live source. Each pass holds
+        the catch-up at the source's current binlog position, compares the tables with it drained
+        to there, and resumes it; rows the source changed after that position differ, so the tables
+        that failed are compared again at a later position, for up to VALIDATION_LIVE_PASSES passes.
+        """
+        report = None
+        for _ in range(max(1, config.VALIDATION_LIVE_PASSES)):
+            position = await run_blocking(source_position, catchup.source_pool)
+            if position is None:
+                raise RuntimeError("Cannot read the source's binlog position (needs REPLICATION CLIENT) to hold the catch-up "
+                                   "at; stop writes to the source and stop_binlog_catchup with drain=true before validating.")
+            held = await catchup.hold(position)
+            if held["status"] != "running":
+                raise RuntimeError(f"Binlog catch-up {catchup.id} stopped ({held['status']}) before reaching {position}: {held['error']}")
+            try:
+                passed = await run_blocking(validator.validate, tables)
+            finally:
+                catchup.resume()
+            if report is None:
+                report = dict(passed, passes=0)
+            else:
+                report["tables"].update(passed["tables"])
+                report["tables_failed"] = [table for table, result in report["tables"].items() if result["status"] != "match"]
+                report["result"] = passed["result"] if not report["tables_failed"] else "VALIDATION FAILURE"
+                report["elapsed_seconds"] = round(report["elapsed_seconds"] + passed["elapsed_seconds"], 2)
+            report["passes"] += 1
+            report["position"] = position
+            tables = report["tables_failed"]
+            if not tables:
+                break
+        return report
+
+    async def validate_data(self, tables: list = None, chunk_size: int = config.VALIDATION_CHUNK_SIZE, workers: int = config.VALIDATION_WORKERS,
+                            database: str = None, catchup_id: str = None):
+        """
+        Compares source and Cloud SQL tables using parallel, primary-key-chunked checksums.
+        Returns per-table row counts and, for mismatches, the differing chunks and primary keys.
+        On a resumed run, tables that already matched are not checked again.
+        While a binlog catch-up of the database (catchup_id, or the running one) is applying
+        changes, it is held at a source binlog position for each comparison, so the target is
+        not compared while it is still changing.
+        """
+        if not self.legacy_db_host:
+            return {"error": "Legacy DB credentials not configured."}
+        scope = self._scope(database)
+        if scope is None:
+            return self._unknown_database(database)
+        checkpoint = scope.checkpoint
+        target_pool, error = await self._get_target_pool(scope)
+        if error:
+            return error
+        validator = ChunkedChecksumValidator(
+            scope.source_pool,
+            target_pool,
+            scope.database,
+            chunk_size=chunk_size,
+            workers=workers,
+        )
+        catchup = self.catchups.get(catchup_id) if catchup_id else next(
+            (catchup for catchup in self.catchups.values() if catchup.database == scope.database and catchup.status == "running"), None)
+        if catchup is not None and catchup.status != "running":
+            catchup = None  # Stopped: the target no longer changes.
+        done = checkpoint.completed("validation")
+        try:
+            if done and not tables:
+                tables = [table for table in await run_blocking(self._source_tables, scope) if table not in done]
+                if not tables:
+                    return self._completed_phase("validation", checkpoint) or {"status": "success", "skipped": True, "message": "All tables already validated."}
+            checkpoint.phase("validation", RUNNING)
+            if catchup is not None:
+                report = await self._validate_held(validator, tables, catchup)
+            else:
+                report = await run_blocking(validator.validate, tables)
+        except Exception as e:
+            checkpoint.phase("validation", FAILED)
+            return {"status": "error", "message": str(e)}
+        finished = time.time()
+        for table, result in report["tables"].items():
+            seconds = result.get("elapsed_seconds") or 0
+            self.tracer.record("validate_table", finished - seconds, seconds, table=table, database=scope.database,
+                               status="success" if result["status"] == "match" else "error",
+                               rows=result.get("source_rows", 0))
+        matched = [table for table, result in report["tables"].items() if result["status"] == "match"]
+        checkpoint.units("validation", matched, DONE)
+        checkpoint.units("validation", report["tables_failed"], FAILED)
+        if done:
+            report["previously_validated"] = len(done)
+        checkpoint.phase("validation", FAILED if report["tables_failed"] else DONE,
+                         {"result": report["result"], "tables_failed": report["tables_failed"]})
+        return {"status": "success", "data": report}
+
+    async def reload_secrets(self):
+        """Drops cached secrets (e.g. after a rotation), reloads them and reconnects every pool."""
+        invalidate_secret()
+        old_pools = [self.source_pool, *(scope.source_pool for scope in self.scopes.values()),
+                     *(pool for pool, _ in self.target_pools.values())]
+        await run_blocking(self._load_secrets)
+        for scope in self.scopes.values():
+            scope.source_pool = self._source_pool_for(scope.database)
+        for pool in old_pools:
+            pool.close()
+        self.target_pools = {}
+        self._target_endpoints = {}
+        if not self.legacy_db_host:
+            return {"status": "error", "message": "Legacy DB secrets could not be reloaded."}
+        return {"status": "success", "message": "Secrets reloaded; connection pools will reconnect on next use."}
+
+    async def get_job_status(self, job_id: str = None):
+        """Returns the status, latest progress and stderr tail of one job, or of all jobs."""
+        if job_id is None:
+            return {"status": "success", "data": [job.summary() for job in self.jobs.jobs.values()]}
+        job = self.jobs.get(job_id)
+        if not job:
+            return {"status": "error", "message": f"Unknown job: {job_id}"}
+        return {"status": "success", "data": job.summary()}
+
+    async def get_job_events(self, job_id: str, since: int = 0, wait_seconds: int = 0):
+        """Returns progress/status events after sequence number `since`, long-polling up to wait_seconds."""
+        if not self.jobs.get(job_id):
+            return {"status": "error", "message": f"Unknown job: {job_id}"}
+        events = await self.jobs.events_since(job_id, since, min(wait_seconds, config.MCP_COMMAND_TIMEOUT))
+        return {"status": "success", "data": events}
+
+    async def cancel_job(self, job_id: str):
+        """Cancels a running background job."""
+        if not self.jobs.get(job_id):
+            return {"status": "error", "message": f"Unknown job: {job_id}"}
+        return {"status": "success", "data": await self.jobs.cancel(job_id)}
+
+    async def run_tools_concurrently(self, calls: list, max_concurrency: int = config.MCP_MAX_CONCURRENT_TOOLS):
+        """
+        Runs several independent tools/resources at once.
+        Each call is {"name": "<handler name>", "arguments": {...}}; results are returned in order.
+        """
+        semaphore = asyncio.Semaphore(max(1, min(max_concurrency, config.MCP_MAX_CONCURRENT_TOOLS)))
+
+        async def _invoke(call):
+            name = call.get("name", "")
+            handler = getattr(self, name, None)
+            if name.startswith("_") or name == "run_tools_concurrently" or not asyncio.iscoroutinefunction(handler):
+                return {"name": name, "status": "error", "message": f"Unknown tool: {name}"}
+            async with semaphore:
+                try:
+                    result = await handler(**call.get("arguments", {}))
+                except Exception as e:
+                    result = {"status": "error", "message": str(e)}
+            return {"name": name, "result": result}
+
+        results = await asyncio.gather(*(_invoke(call) for call in calls))
+        return {"status": "success", "data": results}
 
     # --- Prompts ---
     async def get_gcp_encryption_recommendation(self):
@@ -0,0 +1,295 @@
+# gcp-agentic-migration/mcp_server/jobs.py
+
+import asyncio
+import collections
+import inspect
+import os
+import re
+import time
+import uuid
+from.. import config
+from.executor import terminate_process_group, run_blocking
+from.telemetry import ProcessGroupSampler
+
+
+def directory_size(path):
+    """Returns the total size in bytes of the files under a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class RotatingLog:
+    """Append-only text log that rotates to <path>.1 ... <path>.N past max_bytes."""
+
+    def __init__(self, path, max_bytes=config.JOB_LOG_MAX_BYTES, backup_count=config.JOB_LOG_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, stream, line):
+        self._file.write(f"[{stream}] {line}\n")
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def close(self):
+        self._file.close()
+
+
+class ProgressTracker:
+    """
+    Derives structured progress from mydumper/myloader log lines.
+    Only counters are kept, so memory does not grow with the size of the output.
+    """
+    TABLES_RE = re.compile(r"Tables:?\s*(\d+)\s*(?:/|of)\s*(\d+)")
+    TABLE_RE = re.compile(r"`([^`]+)`\.`([^`]+)`")
+    FILE_RE = re.compile(r"from (\S+\.sql(?:\.gz|\.zst)?)")
+    ROWS_RE = re.compile(r"(\d+) rows")
+
+    def __init__(self, tables_total=None, bytes_total=None, input_dir=None, size_probe=None):
+        self.tables_total = tables_total
+        self.tables_done = 0
+        self.tables_seen = set()
+        self.bytes_total = bytes_total
+        self.bytes_done = 0
+        self.rows_done = 0
+        self.input_dir = input_dir
+        self.size_probe = size_probe
+        self._files_seen = set()
+        self._started = time.monotonic()
+
+    def feed(self, line):
+        match = self.TABLES_RE.search(line)
+        if match:
+            self.tables_done = max(self.tables_done, int(match.group(1)))
+            self.tables_total = int(match.group(2))
+        match = self.TABLE_RE.search(line)
+        if match:
+            self.tables_seen.add(f"{match.group(1)}.{match.group(2)}")
+        match = self.ROWS_RE.search(line)
+        if match:
+            self.rows_done += int(match.group(1))
+        if self.input_dir:
+            match = self.FILE_RE.search(line)
+            if match and match.group(1) not in self._files_seen:
+                self._files_seen.add(match.group(1))
+                try:
+                    self.bytes_done += os.path.getsize(os.path.join(self.input_dir, os.path.basename(match.group(1))))
+                except OSError:
+                    pass
+
+    async def sample(self):
+        if self.size_probe:
+            self.bytes_done = await run_blocking(self.size_probe)
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        progress = {
+            "tables_done": self.tables_done,
+            "tables_total": self.tables_total,
+            "tables_seen": len(self.tables_seen),
+            "bytes_done": self.bytes_done,
+            "bytes_total": self.bytes_total,
+            "bytes_per_second": round(self.bytes_done / elapsed, 1),
+            "rows_done": self.rows_done,
+            "rows_per_second": round(self.rows_done / elapsed, 1),
+            "elapsed_seconds": round(elapsed, 1),
+            "eta_seconds": None,
+        }
+        if self.bytes_total and self.bytes_done:
+            fraction = self.bytes_done / self.bytes_total
+        elif self.tables_total and self.tables_done:
+            fraction = self.tables_done / self.tables_total
+        else:
+            fraction = None
+        if fraction:
+            progress["eta_seconds"] = round(elapsed * (1 - min(fraction, 1.0)) / fraction, 1)
+        return progress
+
+
+class Job:
+    def __init__(self, name, command, log_dir, progress=None, database=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.database = database  # The migrated database the job works on, if any
+        self.command = command
+        self.status = "running"
+        self.returncode = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self.progress = progress or ProgressTracker()
+        self.log = RotatingLog(os.path.join(log_dir, f"{self.id}.log"))
+        self.stderr_tail = collections.deque(maxlen=config.JOB_STDERR_TAIL_LINES)
+        self.events = collections.deque(maxlen=config.JOB_EVENT_BUFFER)
+        self.last_progress = {}
+        self.resources = {}  # peak_rss_bytes / cpu_seconds of the process group, once finished
+        self._seq = 0
+        self._changed = asyncio.Condition()
+        self._process = None
+        self._task = None
+
+    async def _emit(self, event_type, **data):
+        self._seq += 1
+        self.events.append({"seq": self._seq, "time": time.time(), "type": event_type, **data})
+        async with self._changed:
+            self._changed.notify_all()
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "name": self.name,
+            "database": self.database,
+            "status": self.status,
+            "returncode": self.returncode,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.last_progress,
+            "stderr_tail": list(self.stderr_tail),
+            "resources": self.resources,
+            "log_path": self.log.path,
+            "last_event_seq": self._seq,
+        }
+
+
+class JobManager:
+    """Runs long commands in the background and spools their output to disk."""
+
+    def __init__(self, log_dir=config.JOB_LOG_DIR, listeners=()):
+        self.log_dir = log_dir
+        self.jobs = {}
+        # Observers implementing any of job_line(job, stream, line), job_progress(job, sample) and job_finished(job).
+        self._on_line = [listener.job_line for listener in listeners if hasattr(listener, "job_line")]
+        self._on_progress = [listener.job_progress for listener in listeners if hasattr(listener, "job_progress")]
+        self._on_finished = [listener.job_finished for listener in listeners if hasattr(listener, "job_finished")]
+
+    def start(self, name, command, cwd=None, timeout=None, progress=None, on_finish=None, database=None):
+        """
+        Starts `command` in the background. `on_finish(job)` (a function or coroutine function) is
+        called once the job has a final status, before that status is published to waiters and events.
+        """
+        job = Job(name, command, self.log_dir, progress, database=database)
+        self.jobs[job.id] = job
+        job._task = asyncio.create_task(self._run(job, cwd, timeout, on_finish))
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    async def _pump(self, job, stream, stream_name):
+        while True:
+            try:
+                raw = await stream.readline()
+            except ValueError:
+                # Line longer than the reader limit; drop what's buffered and carry on.
+                raw = await stream.read(config.JOB_MAX_LINE_BYTES)
+            if not raw:
+                break
+            line = raw.decode("utf-8", errors="replace").rstrip("\n")[:config.JOB_MAX_LINE_BYTES]
+            job.log.write(stream_name, line)
+            job.progress.feed(line)
+            if stream_name == "stderr":
+                job.stderr_tail.append(line)
+            for callback in self._on_line:
+                callback(job, stream_name, line)
+
+    async def _report_progress(self, job):
+        while True:
+            await asyncio.sleep(config.JOB_PROGRESS_INTERVAL)
+            job.last_progress = await job.progress.sample()
+            for callback in self._on_progress:
+                callback(job, job.last_progress)
+            await job._emit("progress", **job.last_progress)
+
+    async def _run(self, job, cwd, timeout, on_finish=None):
+        await job._emit("status", status="running")
+        reporter = asyncio.create_task(self._report_progress(job))
+        sampler = None
+        try:
+            job._process = await asyncio.create_subprocess_shell(
+                job.command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd,
+                start_new_session=True,
+                limit=config.JOB_MAX_LINE_BYTES,
+            )
+            sampler = ProcessGroupSampler(job._process.pid).start()
+            pumps = asyncio.gather(
+                self._pump(job, job._process.stdout, "stdout"),
+                self._pump(job, job._process.stderr, "stderr"),
+                job._process.wait(),
+            )
+            try:
+                await asyncio.wait_for(pumps, timeout)
+                job.returncode = job._process.returncode
+                job.status = "success" if job.returncode == 0 else "error"
+            except asyncio.TimeoutError:
+                terminate_process_group(job._process)
+                job.returncode = await job._process.wait()
+                job.status = "error"
+                job.stderr_tail.append(f"Command timed out after {timeout} seconds.")
+        except asyncio.CancelledError:
+            if job._process:
+                terminate_process_group(job._process)
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "error"
+            job.stderr_tail.append(str(e))
+        finally:
+            reporter.cancel()
+            if sampler is not None:
+                job.resources = await sampler.stop()
+            job.finished_at = time.time()
+            job.last_progress = await job.progress.sample()
+            job.log.close()
+            if on_finish is not None:
+                try:
+                    finished = on_finish(job)
+                    if inspect.isawaitable(finished):
+                        await finished
+                except Exception as e:
+                    job.stderr_tail.append(f"on_finish callback failed: {e}")
+            await job._emit("status", status=job.status, returncode=job.returncode, progress=job.last_progress)
+            for callback in self._on_finished:
+                callback(job)
+
+    async def wait(self, job_id):
+        job = self.jobs[job_id]
+        await asyncio.shield(job._task)
+        return job.summary()
+
+    async def cancel(self, job_id):
+        job = self.jobs[job_id]
+        if job.status == "running":
+            job._task.cancel()
+            try:
+                await job._task
+            except asyncio.CancelledError:
+                pass
+        return job.summary()
+
+    async def events_since(self, job_id, since=0, wait_seconds=0):
+        """Returns events with seq > since, optionally long-polling until one arrives."""
+        job = self.jobs[job_id]
+        if wait_seconds and job._seq <= since and job.status == "running":
+            async with job._changed:
+                try:
+                    await asyncio.wait_for(job._changed.wait_for(lambda: job._seq > since), wait_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        return [event for event in job.events if event["seq"] > since]
@@ -0,0 +1,419 @@
+# gcp-agentic-migration/mcp_server/pipeline.py
+
+import asyncio
+import os
+import re
+import shutil
+import time
+import uuid
+from.. import config
+from.executor import run_command, run_blocking
+from.telemetry import Tracer
+from..utils.run_state import RunCheckpoint, RUNNING, DONE, FAILED
+
+# mydumper output names: <db>-schema-create.sql, <db>.<table>-schema.sql, <db>.<table>.00000.sql,
+# <db>.<table>-schema-view.sql, <db>.<table>-schema-triggers.sql, <db>-schema-post.sql (optionally .gz or .zst).
+FILE_PATTERNS = [
+    ("database", re.compile(r"^(?P<db>[^.]+)-schema-create\.sql(\.gz|\.zst)?$")),
+    ("post", re.compile(r"^(?P<db>[^.]+)-schema-post\.sql(\.gz|\.zst)?$")),
+    ("view", re.compile(r"^(?P<db>[^.]+)\.(?P<table>.+)-schema-view\.sql(\.gz|\.zst)?$")),
+    ("trigger", re.compile(r"^(?P<db>[^.]+)\.(?P<table>.+)-schema-triggers\.sql(\.gz|\.zst)?$")),
+    ("schema", re.compile(r"^(?P<db>[^.]+)\.(?P<table>.+)-schema\.sql(\.gz|\.zst)?$")),
+    ("data", re.compile(r"^(?P<db>[^.]+)\.(?P<table>.+?)(\.\d+)*\.sql(\.gz|\.zst)?$")),
+]
+# Written by mydumper while it runs, or by the pipeline itself; never imported.
+IGNORED_FILES = re.compile(r"^(metadata\.partial|\..*)$")
+
+
+def classify_dump_file(filename):
+    """Returns (kind, table) for a mydumper output file, or (None, None) for files that are not imported."""
+    if filename == "metadata":
+        return "metadata", None
+    for kind, pattern in FILE_PATTERNS:
+        match = pattern.match(filename)
+        if match:
+            return kind, match.groupdict().get("table")
+    return None, None
+
+
+def import_object_name(filename):
+    """`gcloud sql import sql` reads plain or gzipped SQL only, so zstd files are uploaded decompressed."""
+    return filename[:-len(".zst")] if filename.endswith(".zst") else filename
+
+
+class LocalStorage:
+    """Filesystem stand-in for a GCS bucket (file:///path/prefix)."""
+
+    def __init__(self, uri):
+        self.root = uri[len("file://"):]
+
+    def uri_for(self, object_name):
+        return f"file://{os.path.join(self.root, object_name)}"
+
+    def _copy(self, local_path, object_name):
+        destination = os.path.join(self.root, object_name)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copyfile(local_path, f"{destination}.part")
+        os.replace(f"{destination}.part", destination)
+
+    async def upload(self, local_path, object_name):
+        await run_blocking(self._copy, local_path, object_name)
+        return {"status": "success", "returncode": 0, "stderr": ""}
+
+
+class GcsStorage:
+    """Uploads with `gcloud storage cp`, which uses resumable and parallel composite uploads for large files."""
+
+    def __init__(self, uri):
+        self.prefix = uri.rstrip("/")
+
+    def uri_for(self, object_name):
+        return f"{self.prefix}/{object_name}"
+
+    async def upload(self, local_path, object_name):
+        env = dict(os.environ, CLOUDSDK_STORAGE_PARALLEL_COMPOSITE_UPLOAD_ENABLED="True")
+        command = f"{config.GCLOUD_BIN} storage cp {local_path} {self.uri_for(object_name)} --project={config.GCP_PROJECT_ID}"
+        return await run_command(command, timeout=config.MCP_LONG_COMMAND_TIMEOUT, env=env)
+
+
+def storage_for(uri):
+    if uri.startswith("file://"):
+        return LocalStorage(uri)
+    if uri.startswith("gs://"):
+        return GcsStorage(uri)
+    raise ValueError(f"Unsupported storage URI: {uri}")
+
+
+class DumpImportPipeline:
+    """
+    Overlaps the three stages of the GCS Import strategy.
+
+    While mydumper is still writing, finished files (size and mtime stable for
+    PIPELINE_FILE_SETTLE_SECONDS) are uploaded by a pool of workers, and a single
+    importer feeds uploaded files to `gcloud sql import sql` in dependency order:
+    database, then each table's schema before its data chunks, then views, triggers
+    and routines once everything else is in. Cloud SQL runs one import per instance
+    at a time, so the importer is deliberately serial, and pipelines of a batch that
+    target the same instance share its `import_lock`.
+
+    With a checkpoint, every file's upload and import is recorded as an "upload" or
+    "load" unit; on a resumed run, files already imported are skipped and files
+    already uploaded go straight to the importer. Each upload and import is a telemetry
+    span carrying the file's table and size.
+
+    A file that settles while mydumper is still writing it (a long lock wait) is caught when
+    the dump ends: every uploaded file is compared with its size and mtime at upload, and
+    uploaded again, or fails the run if it was already imported.
+
+    zstd-compressed files are decompressed before their upload. A finished dump that
+    holds files no FILE_PATTERNS entry recognises fails the run instead of leaving
+    their tables out.
+    """
+
+    def __init__(self, dump_dir, storage, database, instance=config.CLOUD_SQL_INSTANCE_NAME,
+                 upload_workers=config.PIPELINE_UPLOAD_WORKERS, schema_preloaded=False, dump_job=None,
+                 checkpoint=None, observer=None, tracer=None, import_lock=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.dump_dir = dump_dir
+        self.storage = storage
+        self.database = database
+        self.instance = instance
+        self.upload_workers = max(1, upload_workers)
+        self.schema_preloaded = schema_preloaded
+        self.dump_job = dump_job
+        self.checkpoint = checkpoint or RunCheckpoint()
+        self.observer = observer  # Called as observer(tool, result) after every upload and import command.
+        self.tracer = tracer or Tracer(root=None)
+        self.import_lock = import_lock or asyncio.Lock()
+        self.status = "running"
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self.files = {}  # filename -> {"kind", "table", "bytes", "state"}
+        self.stage_seconds = {"upload": 0.0, "import": 0.0}
+        self.bytes_uploaded = 0
+        self._seen = {}  # filename -> (size, mtime) at the previous scan
+        self.unrecognised = []  # Files of the latest scan that no FILE_PATTERNS entry matches
+        self._upload_queue = asyncio.Queue()
+        self._uploaded = asyncio.Event()
+        self._tables_with_schema = set()
+        self._tables_imported_schema = set()
+        self._task = None
+
+    # --- Stage 1: discover finished dump files ---
+    def _scan(self, dump_finished):
+        ready = []
+        unrecognised = []
+        now = time.time()
+        for entry in os.scandir(self.dump_dir):
+            if not entry.is_file() or entry.name in self.files:
+                continue
+            kind, table = classify_dump_file(entry.name)
+            if kind is None:
+                if not IGNORED_FILES.match(entry.name):
+                    unrecognised.append(entry.name)
+                continue
+            stat = entry.stat()
+            previous = self._seen.get(entry.name)
+            self._seen[entry.name] = (stat.st_size, stat.st_mtime)
+            settled = previous == (stat.st_size, stat.st_mtime) and now - stat.st_mtime >= config.PIPELINE_FILE_SETTLE_SECONDS
+            if dump_finished or settled:
+                ready.append((entry.name, kind, table, stat.st_size))
+        self.unrecognised = sorted(unrecognised)
+        return ready
+
+    def _dump_finished(self):
+        return self.dump_job is None or self.dump_job.status != "running"
+
+    def _stat(self, name):
+        try:
+            stat = os.stat(os.path.join(self.dump_dir, name))
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def _changed_since_upload(self):
+        return [name for name, entry in self.files.items() if "stat" in entry and self._stat(name) != entry["stat"]]
+
+    async def _recheck_uploads(self):
+        """
+        Once the dump has ended, compares every uploaded file with its size and mtime at upload.
+        A file that mydumper was still writing (e.g. paused on a lock wait for longer than the
+        settle time) is uploaded again if not yet imported; one already imported fails the run.
+        """
+        truncated = []
+        for name in await run_blocking(self._changed_since_upload):
+            entry = self.files[name]
+            if entry["state"] == "uploading":
+                entry["recheck"] = True  # The worker uploads it again when the current upload ends.
+            elif entry["state"] == "uploaded":
+                entry["state"] = "queued"
+                await self._upload_queue.put(name)
+            elif entry["state"] in ("importing", "imported"):
+                truncated.append(name)
+        if truncated:
+            self.checkpoint.units("upload", truncated, FAILED)
+            self.checkpoint.units("load", truncated, FAILED)
+            raise RuntimeError(f"{len(truncated)} file(s) were imported before mydumper finished writing them; truncate their "
+                               f"tables on the target before loading them again: {sorted(truncated)[:10]}")
+
+    async def _watch(self):
+        imported = self.checkpoint.completed("load")
+        uploaded = self.checkpoint.completed("upload")
+        while True:
+            finished = self._dump_finished()
+            for name, kind, table, size in await run_blocking(self._scan, finished):
+                self.files[name] = {"kind": kind, "table": table, "bytes": size, "state": "queued"}
+                if kind == "schema":
+                    self._tables_with_schema.add(table)
+                if name in imported:
+                    self.files[name]["state"] = "imported"
+                    if kind == "schema":
+                        self._tables_imported_schema.add(table)
+                elif name in uploaded:
+                    self.files[name]["state"] = "uploaded"
+                    self._uploaded.set()
+                else:
+                    await self._upload_queue.put(name)
+            if finished:
+                if self.dump_job is not None and self.dump_job.status != "success":
+                    raise RuntimeError(f"mydumper job {self.dump_job.id} ended with status '{self.dump_job.status}'.")
+                if self.unrecognised:
+                    # Skipping them would leave tables silently empty on the target.
+                    raise RuntimeError(f"{len(self.unrecognised)} dump file(s) are in a format the pipeline cannot import: "
+                                       f"{self.unrecognised[:10]}")
+                await self._recheck_uploads()
+                break
+            await asyncio.sleep(config.PIPELINE_POLL_INTERVAL)
+        for _ in range(self.upload_workers):
+            await self._upload_queue.put(None)
+
+    # --- Stage 2: parallel uploads ---
+    async def _decompress(self, name):
+        """Writes a zstd dump file out as plain SQL under .staged/ for the upload; returns (path, result)."""
+        staged = os.path.join(self.dump_dir, ".staged", import_object_name(name))
+        await run_blocking(os.makedirs, os.path.dirname(staged), exist_ok=True)
+        command = f"{config.ZSTD_BIN} -d -q -f {os.path.join(self.dump_dir, name)} -o {staged}"
+        return staged, await run_command(command, timeout=config.MCP_LONG_COMMAND_TIMEOUT)
+
+    async def _upload_worker(self):
+        while True:
+            name = await self._upload_queue.get()
+            if name is None:
+                return
+            await self._upload(name)
+            while self.files[name].pop("recheck", False):
+                await self._upload(name)
+
+    async def _upload(self, name):
+        entry = self.files[name]
+        entry["state"] = "uploading"
+        # Compared again once the dump has ended (_recheck_uploads).
+        entry["stat"] = await run_blocking(self._stat, name)
+        entry["bytes"] = entry["stat"][0] if entry["stat"] else entry["bytes"]
+        started = time.monotonic()
+        local_path = os.path.join(self.dump_dir, name)
+        if name.endswith(".zst"):
+            local_path, result = await self._decompress(name)
+            if result["status"] != "success":
+                entry["state"] = "upload_failed"
+                self.checkpoint.units("upload", [name], FAILED)
+                raise RuntimeError(f"Decompressing {name} failed: {result['stderr'][-500:]}")
+        with self.tracer.span("pipeline_upload", table=entry["table"], file=name) as span:
+            for attempt in range(1, config.PIPELINE_UPLOAD_RETRIES + 1):
+                result = await self.storage.upload(local_path, f"{self.database}/{import_object_name(name)}")
+                if self.observer is not None:
+                    self.observer("pipeline_upload", result)
+                if result["status"] == "success":
+                    span.add(bytes=entry["bytes"])
+                    break
+            else:
+                span.fail(result["stderr"][-500:])
+        if local_path != os.path.join(self.dump_dir, name):
+            await run_blocking(os.remove, local_path)
+        self.stage_seconds["upload"] += time.monotonic() - started
+        if result["status"] != "success":
+            entry["state"] = "upload_failed"
+            self.checkpoint.units("upload", [name], FAILED)
+            raise RuntimeError(f"Upload of {name} failed after {attempt} attempts: {result['stderr'][-500:]}")
+        if entry.get("recheck"):
+            return  # Changed during the upload; not importable until the final version is up.
+        entry["state"] = "uploaded"
+        self.checkpoint.units("upload", [name], DONE)
+        self.bytes_uploaded += entry["bytes"]
+        self._uploaded.set()
+
+    # --- Stage 3: serial Cloud SQL imports in dependency order ---
+    def _next_importable(self, uploads_done):
+        uploaded = [(name, entry) for name, entry in sorted(self.files.items()) if entry["state"] == "uploaded"]
+        for name, entry in uploaded:
+            if entry["kind"] in ("database", "metadata"):
+                return name
+        if any(entry["kind"] == "database" and entry["state"] != "imported" for entry in self.files.values()):
+            return None
+        for name, entry in uploaded:
+            if entry["kind"] == "schema":
+                return name
+        for name, entry in uploaded:
+            if entry["kind"] == "data" and (self.schema_preloaded
+                                            or entry["table"] in self._tables_imported_schema
+                                            or (uploads_done and entry["table"] not in self._tables_with_schema)):
+                return name
+        # Views, triggers and routines reference other tables, so they go last.
+        tables_pending = any(entry["kind"] in ("schema", "data") and entry["state"] != "imported" for entry in self.files.values())
+        if uploads_done and not tables_pending:
+            for kind in ("view", "trigger", "post"):
+                for name, entry in uploaded:
+                    if entry["kind"] == kind:
+                        return name
+        return None
+
+    async def _import_file(self, name):
+        entry = self.files[name]
+        if entry["kind"] == "metadata":
+            entry["state"] = "imported"  # Kept in the bucket for binlog catch-up; nothing to import.
+            self.checkpoint.units("load", [name], DONE)
+            return
+        command = (f"{config.GCLOUD_BIN} sql import sql {self.instance} {self.storage.uri_for(f'{self.database}/{import_object_name(name)}')} "
+                   f"--database={self.database} --project={config.GCP_PROJECT_ID} --quiet")
+        async with self.import_lock:
+            if entry["state"] != "uploaded":
+                return  # Sent back for another upload while waiting for the lock.
+            entry["state"] = "importing"
+            self.checkpoint.units("load", [name], RUNNING)
+            started = time.monotonic()
+            with self.tracer.span("pipeline_import", table=entry["table"], file=name, kind=entry["kind"]) as span:
+                result = await run_command(command, timeout=config.MCP_LONG_COMMAND_TIMEOUT)
+                if result["status"] == "success":
+                    span.add(bytes=entry["bytes"])
+                else:
+                    span.fail(result["stderr"][-500:])
+            self.stage_seconds["import"] += time.monotonic() - started
+        if self.observer is not None:
+            self.observer("pipeline_import", result)
+        if result["status"] != "success":
+            entry["state"] = "import_failed"
+            self.checkpoint.units("load", [name], FAILED)
+            raise RuntimeError(f"Import of {name} failed: {result['stderr'][-500:]}")
+        entry["state"] = "imported"
+        self.checkpoint.units("load", [name], DONE)
+        if entry["kind"] == "schema":
+            self._tables_imported_schema.add(entry["table"])
+
+    async def _importer(self, uploads):
+        while True:
+            uploads_done = uploads.done()
+            name = self._next_importable(uploads_done)
+            if name is not None:
+                await self._import_file(name)
+                continue
+            if uploads_done:
+                return
+            self._uploaded.clear()
+            try:
+                await asyncio.wait_for(self._uploaded.wait(), config.PIPELINE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self):
+        self.checkpoint.phase("upload", RUNNING)
+        self.checkpoint.phase("load", RUNNING)
+        try:
+            stages = [asyncio.ensure_future(self._watch())]
+            stages += [asyncio.ensure_future(self._upload_worker()) for _ in range(self.upload_workers)]
+            uploads = asyncio.gather(*stages)
+            importer = asyncio.ensure_future(self._importer(uploads))
+            try:
+                await asyncio.gather(uploads, importer)
+            except BaseException:
+                # A failed gather leaves its other children running; the workers would wait on the queue forever.
+                for task in (*stages, importer):
+                    task.cancel()
+                raise
+            pending = [name for name, entry in self.files.items() if entry["state"] != "imported"]
+            if pending:
+                raise RuntimeError(f"{len(pending)} file(s) were not imported, e.g. {pending[:5]}")
+            self.status = "success"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+        except Exception as e:
+            self.status = "error"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+            status = DONE if self.status == "success" else FAILED
+            self.checkpoint.phase("upload", status, {"pipeline_id": self.id, "dump_dir": self.dump_dir})
+            self.checkpoint.phase("load", status, {"pipeline_id": self.id, "dump_dir": self.dump_dir, "error": self.error})
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+        return self
+
+    async def wait(self):
+        await asyncio.shield(self._task)
+        return self.summary()
+
+    def summary(self):
+        states = {}
+        for entry in self.files.values():
+            states[entry["state"]] = states.get(entry["state"], 0) + 1
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        dump_seconds = None
+        if self.dump_job is not None:
+            dump_seconds = round((self.dump_job.finished_at or time.time()) - self.dump_job.started_at, 1)
+        return {
+            "pipeline_id": self.id,
+            "status": self.status,
+            "database": self.database,
+            "instance": self.instance,
+            "error": self.error,
+            "dump_job_id": self.dump_job.id if self.dump_job is not None else None,
+            "files": len(self.files),
+            "file_states": states,
+            "bytes_uploaded": self.bytes_uploaded,
+            "elapsed_seconds": round(elapsed, 1),
+            # Wall-clock close to the longest stage (not their sum) means the overlap is working.
+            "stage_seconds": {"dump": dump_seconds,
+                              "upload": round(self.stage_seconds["upload"] / self.upload_workers, 1),
+                              "import": round(self.stage_seconds["import"], 1)},
+        }
@@ -0,0 +1,369 @@
+# gcp-agentic-migration/mcp_server/schema_extractor.py
+
+import json
+import os
+import re
+from.. import config
+from.validation import quote_identifier
+
+TIMESTAMP_TYPES = {"timestamp", "datetime"}
+NO_DEFAULT_NULL_TYPES = {"tinyblob", "blob", "mediumblob", "longblob", "tinytext", "text", "mediumtext", "longtext", "json", "geometry"}
+# Bumped when the synthesized DDL changes, so DDL cached by an older version is re-read.
+CACHE_VERSION = 3
+
+
+def _definer(definer):
+    user, _, host = (definer or "").rpartition("@")
+    return f"{quote_identifier(user)}@{quote_identifier(host)}" if user else quote_identifier(definer)
+
+
+def _quote_string(value):
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def _in_clause(names):
+    return ", ".join(["%s"] * len(names))
+
+
+class SchemaExtractor:
+    """
+    Extracts the source schema with a handful of set-based information_schema queries
+    and keeps a per-table on-disk cache keyed by CREATE_TIME/UPDATE_TIME, so repeated
+    runs only re-read tables that changed.
+    """
+
+    def __init__(self, pool, database, cache_dir=config.SCHEMA_CACHE_DIR):
+        self.pool = pool
+        self.database = database
+        self.cache_path = os.path.join(cache_dir, f"{database}.json")
+        self._version = None
+        self._quoted_defaults = False  # MariaDB 10.2.7+ reports COLUMN_DEFAULT as an SQL literal
+
+    def _query(self, sql, args=None):
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, args)
+                return cursor.fetchall()
+
+    def _scoped(self, sql, names, full_schema, column="TABLE_NAME"):
+        """Runs a per-schema query, restricted to `names` unless the whole schema is being read."""
+        if full_schema:
+            return self._query(sql.format(filter=""), (self.database,))
+        return self._query(sql.format(filter=f"AND {column} IN ({_in_clause(names)})"), (self.database, *names))
+
+    def _server_version(self):
+        """(major, minor, patch) of the source; MariaDB counts as (5, 7, 0), as it lacks the MySQL 8 columns read here."""
+        if self._version is None:
+            version = self._query("SELECT VERSION() AS version")[0]["version"]
+            number = tuple(int(part) for part in re.findall(r"\d+", version)[:3])
+            mariadb = "mariadb" in version.lower()
+            self._version = (5, 7, 0) if mariadb else number
+            self._quoted_defaults = mariadb and number >= (10, 2, 7)
+        return self._version
+
+    # --- Cache ---
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache.get("tables", {}) if cache.get("version") == CACHE_VERSION else {}
+
+    def _save_cache(self, tables):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": CACHE_VERSION, "database": self.database, "tables": tables}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    # --- Bulk reads ---
+    def _list_tables(self):
+        rows = self._query("""
+            SELECT t.TABLE_NAME, t.TABLE_TYPE, t.ENGINE, t.ROW_FORMAT, t.AUTO_INCREMENT,
+                   t.CREATE_TIME, t.UPDATE_TIME, t.TABLE_COLLATION, t.CREATE_OPTIONS, t.TABLE_COMMENT,
+                   c.CHARACTER_SET_NAME
+            FROM information_schema.TABLES t
+            LEFT JOIN information_schema.COLLATION_CHARACTER_SET_APPLICABILITY c
+                   ON c.COLLATION_NAME = t.TABLE_COLLATION
+            WHERE t.TABLE_SCHEMA = %s AND t.TABLE_TYPE = 'BASE TABLE'
+            ORDER BY t.TABLE_NAME
+        """, (self.database,))
+        return {row["TABLE_NAME"]: row for row in rows}
+
+    def _read_table_details(self, names, full_schema):
+        columns, indexes, foreign_keys, checks = {}, {}, {}, {}
+        mysql8 = self._server_version() >= (8, 0, 0)
+        for row in self._scoped("""
+            SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, DATA_TYPE, IS_NULLABLE, COLUMN_DEFAULT, EXTRA,
+                   CHARACTER_SET_NAME, COLLATION_NAME, COLUMN_COMMENT, GENERATION_EXPRESSION
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s {filter}
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, names, full_schema):
+            columns.setdefault(row["TABLE_NAME"], []).append(row)
+        for row in self._scoped("""
+            SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, SEQ_IN_INDEX, COLUMN_NAME, SUB_PART, COLLATION, INDEX_TYPE,
+                   INDEX_COMMENT, {visible} AS IS_VISIBLE
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = %s {{filter}}
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """.format(visible="IS_VISIBLE" if mysql8 else "'YES'"), names, full_schema):
+            indexes.setdefault(row["TABLE_NAME"], {}).setdefault(row["INDEX_NAME"], []).append(row)
+        for row in self._scoped("""
+            SELECT k.TABLE_NAME, k.CONSTRAINT_NAME, k.COLUMN_NAME, k.ORDINAL_POSITION,
+                   k.REFERENCED_TABLE_SCHEMA, k.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME,
+                   r.UPDATE_RULE, r.DELETE_RULE
+            FROM information_schema.KEY_COLUMN_USAGE k
+            JOIN information_schema.REFERENTIAL_CONSTRAINTS r
+              ON r.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA AND r.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+             AND r.TABLE_NAME = k.TABLE_NAME
+            WHERE k.TABLE_SCHEMA = %s AND k.REFERENCED_TABLE_NAME IS NOT NULL {filter}
+            ORDER BY k.TABLE_NAME, k.CONSTRAINT_NAME, k.ORDINAL_POSITION
+        """, names, full_schema, column="k.TABLE_NAME"):
+            foreign_keys.setdefault(row["TABLE_NAME"], {}).setdefault(row["CONSTRAINT_NAME"], []).append(row)
+        # Before 8.0.16 MySQL parses CHECK clauses but does not keep them.
+        if self._server_version() >= (8, 0, 16):
+            for row in self._scoped("""
+                SELECT t.TABLE_NAME, t.CONSTRAINT_NAME, t.ENFORCED, c.CHECK_CLAUSE
+                FROM information_schema.TABLE_CONSTRAINTS t
+                JOIN information_schema.CHECK_CONSTRAINTS c
+                  ON c.CONSTRAINT_SCHEMA = t.CONSTRAINT_SCHEMA AND c.CONSTRAINT_NAME = t.CONSTRAINT_NAME
+                WHERE t.TABLE_SCHEMA = %s AND t.CONSTRAINT_TYPE = 'CHECK' {filter}
+                ORDER BY t.TABLE_NAME, t.CONSTRAINT_NAME
+            """, names, full_schema, column="t.TABLE_NAME"):
+                checks.setdefault(row["TABLE_NAME"], []).append(row)
+        return columns, indexes, foreign_keys, checks
+
+    def _show_create_table(self, table):
+        rows = self._query(f"SHOW CREATE TABLE {quote_identifier(table)}")
+        return rows[0]["Create Table"]
+
+    # --- DDL synthesis ---
+    @staticmethod
+    def _column_definition(column, table_collation, quoted_defaults=False):
+        """
+        With `quoted_defaults` (MariaDB 10.2.7+) COLUMN_DEFAULT is already an SQL literal or
+        expression: strings arrive quoted and a NULL default as the word NULL.
+        """
+        parts = [quote_identifier(column["COLUMN_NAME"]), column["COLUMN_TYPE"]]
+        extra = column["EXTRA"] or ""
+        if column["COLLATION_NAME"] and column["COLLATION_NAME"] != table_collation:
+            parts.append(f"CHARACTER SET {column['CHARACTER_SET_NAME']} COLLATE {column['COLLATION_NAME']}")
+        if column.get("GENERATION_EXPRESSION"):
+            kind = "STORED" if "STORED" in extra.upper() else "VIRTUAL"
+            parts.append(f"GENERATED ALWAYS AS ({column['GENERATION_EXPRESSION']}) {kind}")
+        nullable = column["IS_NULLABLE"] == "YES"
+        if not nullable:
+            parts.append("NOT NULL")
+        elif column["DATA_TYPE"] in TIMESTAMP_TYPES:
+            parts.append("NULL")
+        default = column["COLUMN_DEFAULT"]
+        if quoted_defaults and default == "NULL":
+            default = None
+        if not column.get("GENERATION_EXPRESSION"):
+            if default is None:
+                if nullable and column["DATA_TYPE"] not in NO_DEFAULT_NULL_TYPES:
+                    parts.append("DEFAULT NULL")
+            elif default.upper().startswith("CURRENT_TIMESTAMP") or column["DATA_TYPE"] == "bit":
+                parts.append(f"DEFAULT {default}")
+            elif "DEFAULT_GENERATED" in extra.upper():
+                parts.append(f"DEFAULT ({default})")
+            elif quoted_defaults:
+                literal = default.startswith("'") or re.fullmatch(r"-?[\d.]+(e[-+]?\d+)?|[bx]'[^']*'", default, re.IGNORECASE)
+                parts.append(f"DEFAULT {default}" if literal else f"DEFAULT ({default})")
+            else:
+                parts.append(f"DEFAULT {_quote_string(default)}")
+        remainder = " ".join(word for word in extra.split() if word.upper() not in ("DEFAULT_GENERATED", "VIRTUAL", "STORED", "GENERATED"))
+        if remainder:
+            parts.append(remainder)
+        if column["COLUMN_COMMENT"]:
+            parts.append(f"COMMENT {_quote_string(column['COLUMN_COMMENT'])}")
+        return " ".join(parts)
+
+    @staticmethod
+    def _index_definition(name, parts, engine):
+        columns = []
+        for part in parts:
+            column = quote_identifier(part["COLUMN_NAME"])
+            if part["SUB_PART"]:
+                column += f"({part['SUB_PART']})"
+            if part["COLLATION"] == "D":
+                column += " DESC"
+            columns.append(column)
+        column_list = ",".join(columns)
+        index_type = parts[0]["INDEX_TYPE"]
+        if name == "PRIMARY":
+            definition = f"PRIMARY KEY ({column_list})"
+        elif index_type in ("FULLTEXT", "SPATIAL"):
+            definition = f"{index_type} KEY {quote_identifier(name)} ({column_list})"
+        else:
+            kind = "KEY" if int(parts[0]["NON_UNIQUE"]) else "UNIQUE KEY"
+            definition = f"{kind} {quote_identifier(name)} ({column_list})"
+        # HASH is only honoured by MEMORY (and NDB), whose default it is; there BTREE has to be asked for.
+        if index_type == "HASH" or (index_type == "BTREE" and (engine or "").upper() == "MEMORY"):
+            definition += f" USING {index_type}"
+        if parts[0].get("INDEX_COMMENT"):
+            definition += f" COMMENT {_quote_string(parts[0]['INDEX_COMMENT'])}"
+        if parts[0].get("IS_VISIBLE") == "NO":
+            definition += " /*!80000 INVISIBLE */"
+        return definition
+
+    def _foreign_key_definition(self, name, parts):
+        columns = ",".join(quote_identifier(part["COLUMN_NAME"]) for part in parts)
+        referenced = ",".join(quote_identifier(part["REFERENCED_COLUMN_NAME"]) for part in parts)
+        table = quote_identifier(parts[0]["REFERENCED_TABLE_NAME"])
+        if parts[0]["REFERENCED_TABLE_SCHEMA"] != self.database:
+            table = f"{quote_identifier(parts[0]['REFERENCED_TABLE_SCHEMA'])}.{table}"
+        definition = f"CONSTRAINT {quote_identifier(name)} FOREIGN KEY ({columns}) REFERENCES {table} ({referenced})"
+        for action, rule in (("DELETE", parts[0]["DELETE_RULE"]), ("UPDATE", parts[0]["UPDATE_RULE"])):
+            if rule and rule not in ("RESTRICT", "NO ACTION"):
+                definition += f" ON {action} {rule}"
+        return definition
+
+    @staticmethod
+    def _check_definition(check):
+        definition = f"CONSTRAINT {quote_identifier(check['CONSTRAINT_NAME'])} CHECK ({check['CHECK_CLAUSE']})"
+        if check["ENFORCED"] == "NO":
+            definition += " /*!80016 NOT ENFORCED */"
+        return definition
+
+    def _build_create_table(self, table, columns, indexes, foreign_keys, checks=()):
+        collation = table["TABLE_COLLATION"]
+        self._server_version()
+        lines = [self._column_definition(column, collation, self._quoted_defaults) for column in columns]
+        ordered = sorted(indexes.items(), key=lambda item: item[0] != "PRIMARY")
+        lines += [self._index_definition(name, parts, table["ENGINE"]) for name, parts in ordered]
+        lines += [self._foreign_key_definition(name, parts) for name, parts in sorted(foreign_keys.items())]
+        lines += [self._check_definition(check) for check in checks]
+        options = [f"ENGINE={table['ENGINE']}"]
+        if table["AUTO_INCREMENT"]:
+            options.append(f"AUTO_INCREMENT={table['AUTO_INCREMENT']}")
+        if collation:
+            options.append(f"DEFAULT CHARSET={table['CHARACTER_SET_NAME']} COLLATE={collation}")
+        if table["CREATE_OPTIONS"]:
+            options.append(table["CREATE_OPTIONS"].upper())
+        if table["TABLE_COMMENT"]:
+            options.append(f"COMMENT={_quote_string(table['TABLE_COMMENT'])}")
+        body = ",\n  ".join(lines)
+        return f"CREATE TABLE {quote_identifier(table['TABLE_NAME'])} (\n  {body}\n) {' '.join(options)}"
+
+    @staticmethod
+    def _needs_show_create(table, columns, indexes):
+        """Tables using features the synthesized DDL does not cover fall back to SHOW CREATE TABLE."""
+        if "partitioned" in (table["CREATE_OPTIONS"] or "").lower():
+            return True
+        return any(part["COLUMN_NAME"] is None for parts in indexes.values() for part in parts) or not columns
+
+    # --- Views, routines and triggers ---
+    def _read_objects(self):
+        views = {}
+        for row in self._query("""
+            SELECT TABLE_NAME, VIEW_DEFINITION, CHECK_OPTION, DEFINER, SECURITY_TYPE
+            FROM information_schema.VIEWS WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME
+        """, (self.database,)):
+            ddl = (f"CREATE DEFINER={_definer(row['DEFINER'])} SQL SECURITY {row['SECURITY_TYPE']} "
+                   f"VIEW {quote_identifier(row['TABLE_NAME'])} AS {row['VIEW_DEFINITION']}")
+            if row["CHECK_OPTION"] and row["CHECK_OPTION"] != "NONE":
+                ddl += f" WITH {row['CHECK_OPTION']} CHECK OPTION"
+            views[row["TABLE_NAME"]] = ddl
+
+        # A procedure and a function may share a name, so parameters are keyed by both.
+        parameters = {}
+        for row in self._query("""
+            SELECT SPECIFIC_NAME, ROUTINE_TYPE, ORDINAL_POSITION, PARAMETER_MODE, PARAMETER_NAME, DTD_IDENTIFIER
+            FROM information_schema.PARAMETERS WHERE SPECIFIC_SCHEMA = %s AND ORDINAL_POSITION > 0
+            ORDER BY SPECIFIC_NAME, ROUTINE_TYPE, ORDINAL_POSITION
+        """, (self.database,)):
+            mode = f"{row['PARAMETER_MODE']} " if row["PARAMETER_MODE"] else ""
+            parameters.setdefault((row["ROUTINE_TYPE"], row["SPECIFIC_NAME"]), []).append(
+                f"{mode}{quote_identifier(row['PARAMETER_NAME'])} {row['DTD_IDENTIFIER']}")
+        routines = {}
+        for row in self._query("""
+            SELECT SPECIFIC_NAME, ROUTINE_NAME, ROUTINE_TYPE, DTD_IDENTIFIER, ROUTINE_DEFINITION, IS_DETERMINISTIC,
+                   SQL_DATA_ACCESS, SECURITY_TYPE, DEFINER, ROUTINE_COMMENT
+            FROM information_schema.ROUTINES WHERE ROUTINE_SCHEMA = %s ORDER BY ROUTINE_NAME, ROUTINE_TYPE
+        """, (self.database,)):
+            name = row["ROUTINE_NAME"]
+            arguments = ", ".join(parameters.get((row["ROUTINE_TYPE"], row["SPECIFIC_NAME"]), []))
+            ddl = f"CREATE DEFINER={_definer(row['DEFINER'])} {row['ROUTINE_TYPE']} {quote_identifier(name)}({arguments})"
+            if row["ROUTINE_TYPE"] == "FUNCTION":
+                ddl += f" RETURNS {row['DTD_IDENTIFIER']}"
+            if row["IS_DETERMINISTIC"] == "YES":
+                ddl += " DETERMINISTIC"
+            ddl += f" {row['SQL_DATA_ACCESS']} SQL SECURITY {row['SECURITY_TYPE']}"
+            if row["ROUTINE_COMMENT"]:
+                ddl += f" COMMENT {_quote_string(row['ROUTINE_COMMENT'])}"
+            # ROUTINE_DEFINITION is NULL when the account lacks privileges on the routine.
+            # The procedure of a name shared with a function is listed as "<name> (PROCEDURE)".
+            key = f"{name} ({row['ROUTINE_TYPE']})" if name in routines else name
+            routines[key] = f"{ddl}\n{row['ROUTINE_DEFINITION']}" if row["ROUTINE_DEFINITION"] is not None else None
+
+        triggers = {}
+        for row in self._query("""
+            SELECT TRIGGER_NAME, ACTION_TIMING, EVENT_MANIPULATION, EVENT_OBJECT_TABLE, ACTION_STATEMENT, DEFINER
+            FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = %s ORDER BY EVENT_OBJECT_TABLE, ACTION_ORDER
+        """, (self.database,)):
+            triggers[row["TRIGGER_NAME"]] = (
+                f"CREATE DEFINER={_definer(row['DEFINER'])} TRIGGER {quote_identifier(row['TRIGGER_NAME'])} "
+                f"{row['ACTION_TIMING']} {row['EVENT_MANIPULATION']} ON {quote_identifier(row['EVENT_OBJECT_TABLE'])} "
+                f"FOR EACH ROW {row['ACTION_STATEMENT']}"
+            )
+        return {"views": views, "routines": routines, "triggers": triggers}
+
+    # --- Entry point ---
+    def extract(self, tables=None, offset=0, limit=None, refresh=False, include_objects=None):
+        """
+        Returns CREATE TABLE statements for one page of tables (ordered by name),
+        re-reading from the source only the tables whose CREATE_TIME/UPDATE_TIME changed.
+        Views, routines and triggers are included on the first page of a full listing.
+        """
+        current = self._list_tables()
+        names = [name for name in (tables or current.keys()) if name in current]
+        total = len(names)
+        page = names[offset:offset + limit] if limit else names[offset:]
+
+        cache = {} if refresh else self._load_cache()
+        stale = [name for name in page
+                 if name not in cache
+                 or cache[name].get("create_time") != str(current[name]["CREATE_TIME"])
+                 or cache[name].get("update_time") != str(current[name]["UPDATE_TIME"])]
+
+        if stale:
+            # Reading the whole schema in one pass is cheaper than a huge IN (...) list.
+            full_schema = len(stale) > len(current) // 2
+            columns, indexes, foreign_keys, checks = self._read_table_details(stale, full_schema)
+            for name in stale:
+                table = current[name]
+                table_indexes = indexes.get(name, {})
+                if self._needs_show_create(table, columns.get(name), table_indexes):
+                    ddl = self._show_create_table(name)
+                else:
+                    ddl = self._build_create_table(table, columns[name], table_indexes, foreign_keys.get(name, {}), checks.get(name, []))
+                cache[name] = {
+                    "create_time": str(table["CREATE_TIME"]),
+                    "update_time": str(table["UPDATE_TIME"]),
+                    "engine": table["ENGINE"],
+                    "table_collation": table["TABLE_COLLATION"],
+                    "ddl": ddl,
+                }
+            # Forget dropped tables, then persist.
+            self._save_cache({name: entry for name, entry in cache.items() if name in current})
+
+        next_offset = offset + len(page)
+        result = {
+            "database": self.database,
+            "tables": {name: cache[name]["ddl"] for name in page},
+            "total_tables": total,
+            "offset": offset,
+            "next_offset": next_offset if next_offset < total else None,
+            "refetched_tables": len(stale),
+            "cached_tables": len(page) - len(stale),
+        }
+        if include_objects is None:
+            include_objects = offset == 0 and not tables
+        if include_objects:
+            result.update(self._read_objects())
+        return result
@@ -0,0 +1,166 @@
+# gcp-agentic-migration/mcp_server/script_pool.py
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import uuid
+from.. import config
+from.executor import terminate_process_group
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "script_worker.py")
+WORKER_ENV = ("PATH", "LANG", "LC_ALL", "TZ", "PYTHONPATH", "VIRTUAL_ENV")
+WORKER_STARTUP_TIMEOUT = 60
+REPLY_GRACE_SECONDS = 30  # On top of the job timeout, for the worker to reap the job and reconnect
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+class ScriptWorker:
+    def __init__(self, process):
+        self.process = process
+        self.jobs = 0
+
+    async def request(self, message, timeout):
+        self.process.stdin.write((json.dumps(message) + "\n").encode())
+        await self.process.stdin.drain()
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        if not line:
+            raise ConnectionError(f"Validation worker {self.process.pid} exited with code {await self.process.wait()}.")
+        return json.loads(line)
+
+    async def close(self):
+        if self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                terminate_process_group(self.process, grace_period=1)
+                await self.process.wait()
+
+
+class ScriptWorkerPool:
+    """
+    Pre-warmed worker processes (script_worker.py) for run_validation_script.
+
+    Each worker holds open source and target connections and runs one job at a time in a
+    forked child with its own workspace directory and CPU/memory limits, so up to `size`
+    scripts run in parallel without paying interpreter start-up or connection set-up per
+    call. Workers get a scrubbed environment and receive credentials on stdin. A worker
+    that stops answering is killed and replaced; each is recycled after `max_jobs` jobs.
+    Workers start on first use and restart when the connection settings change.
+    """
+
+    def __init__(self, size=config.VALIDATION_SCRIPT_WORKERS, workspace_root=config.VALIDATION_SCRIPT_DIR,
+                 max_jobs=config.VALIDATION_SCRIPT_MAX_JOBS):
+        self.size = max(1, size)
+        self.workspace_root = workspace_root
+        self.max_jobs = max(1, max_jobs)
+        self._settings = None
+        self._workers = []
+        self._idle = asyncio.Queue()
+        self._lock = asyncio.Lock()
+
+    async def _spawn(self):
+        env = {name: os.environ[name] for name in WORKER_ENV if name in os.environ}
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-u", WORKER_SCRIPT,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+            cwd=self.workspace_root, env=env, start_new_session=True, limit=MAX_LINE_BYTES)
+        worker = ScriptWorker(process)
+        try:
+            process.stdin.write((json.dumps(self._settings) + "\n").encode())
+            await process.stdin.drain()
+            line = await asyncio.wait_for(process.stdout.readline(), WORKER_STARTUP_TIMEOUT)
+            ready = json.loads(line) if line else {"ready": False, "error": f"exited with code {await process.wait()}"}
+        except BaseException:
+            await worker.close()
+            raise
+        if not ready.get("ready"):
+            await worker.close()
+            raise RuntimeError(f"Validation worker failed to start: {ready.get('error')}")
+        return worker
+
+    async def _replace(self, worker):
+        await worker.close()
+        if worker not in self._workers:
+            return  # Left over from before a restart; the current workers are already complete.
+        self._workers.remove(worker)
+        try:
+            replacement = await self._spawn()
+        except Exception:
+            return  # Retried on the next ensure(); the pool runs smaller until then.
+        self._workers.append(replacement)
+        self._idle.put_nowait(replacement)
+
+    async def ensure(self, settings):
+        """Starts the workers, or restarts them if `settings` ({"source", "target"} connect kwargs) changed."""
+        settings = {**settings, "max_rows": config.VALIDATION_SCRIPT_MAX_ROWS}
+        async with self._lock:
+            if settings != self._settings:
+                await self._close_workers()
+                self._settings = settings
+            os.makedirs(self.workspace_root, exist_ok=True)
+            missing = self.size - len(self._workers)
+            if missing > 0:
+                started = await asyncio.gather(*(self._spawn() for _ in range(missing)), return_exceptions=True)
+                for worker in started:
+                    if isinstance(worker, ScriptWorker):
+                        self._workers.append(worker)
+                        self._idle.put_nowait(worker)
+                if not self._workers:
+                    raise next(error for error in started if isinstance(error, BaseException))
+
+    async def run(self, script, language, timeout, cpu_seconds=None, memory_mb=None):
+        """Runs one script on the next free worker; returns the worker's reply plus the job's stdout and stderr."""
+        job_id = uuid.uuid4().hex[:12]
+        workspace = os.path.join(self.workspace_root, job_id)
+        os.makedirs(workspace)
+        with open(os.path.join(workspace, "script.py" if language == "python" else "script.sql"), "w") as f:
+            f.write(script)
+        try:
+            worker = await asyncio.wait_for(self._idle.get(), timeout)
+        except asyncio.TimeoutError:
+            shutil.rmtree(workspace, ignore_errors=True)
+            return {"job_id": job_id, "status": "error", "returncode": None, "result": None, "stdout": "", "stderr": "",
+                    "error": f"No validation worker became free within {timeout} seconds."}
+        job = {"job_id": job_id, "script": script, "language": language, "workspace": workspace,
+               "timeout": timeout, "cpu_seconds": cpu_seconds, "memory_mb": memory_mb}
+        try:
+            reply = await worker.request(job, timeout + REPLY_GRACE_SECONDS)
+        except (asyncio.TimeoutError, ConnectionError, ValueError) as e:
+            await self._replace(worker)
+            reply = {"job_id": job_id, "status": "error", "returncode": None, "result": None,
+                     "error": f"Validation worker failed: {e or type(e).__name__}"}
+        except BaseException:
+            await self._replace(worker)
+            raise
+        else:
+            worker.jobs += 1
+            if worker not in self._workers or worker.jobs >= self.max_jobs:
+                await self._replace(worker)
+            else:
+                self._idle.put_nowait(worker)
+        for stream in ("stdout", "stderr"):
+            try:
+                with open(os.path.join(workspace, f"{stream}.log"), errors="replace") as f:
+                    reply[stream] = f.read()
+            except OSError:
+                reply[stream] = ""
+        shutil.rmtree(workspace, ignore_errors=True)
+        return reply
+
+    def stats(self):
+        return {"workers": len(self._workers), "idle": self._idle.qsize(),
+                "jobs": sum(worker.jobs for worker in self._workers)}
+
+    async def _close_workers(self):
+        workers, self._workers = self._workers, []
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        await asyncio.gather(*(worker.close() for worker in workers))
+
+    async def close(self):
+        async with self._lock:
+            await self._close_workers()
+            self._settings = None
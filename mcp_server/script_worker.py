@@ -0,0 +1,249 @@
+# gcp-agentic-migration/mcp_server/script_worker.py
+"""
+Validation script worker, started by ScriptWorkerPool (script_pool.py) as `python -u script_worker.py`.
+
+Protocol, one JSON document per line: the first line on stdin holds the connection settings
+({"source": {...}, "target": {...}, "max_rows": N}); the worker connects, replies {"ready": true},
+then answers every job line with a result line. Each job runs in a forked child with its own process
+group, working directory (the job's workspace), stdout/stderr files and CPU/memory rlimits, so a
+runaway job is killed without taking the worker down. This limits resources only: jobs run as the
+server's user and can read anything it can. The connections opened here are inherited by the child
+and reused across jobs. Their sessions start read-only; a Python script can still switch its own
+session to read-write, so this guards against mistakes, not against a hostile script. A connection is
+reopened when the job was killed mid-query, left it unusable or left its session read-write.
+
+Stands alone (no package imports) so it starts quickly.
+"""
+import importlib
+import json
+import os
+import re
+import resource
+import signal
+import sys
+import time
+import traceback
+import pymysql
+
+# Loaded once here so forked jobs start with them; Python scripts also get them as globals.
+PRELOADED = {name: importlib.import_module(name)
+             for name in ("collections", "datetime", "decimal", "hashlib", "itertools", "math", "re", "statistics")}
+
+# First keywords of the statements a SQL script may run.
+READ_STATEMENTS = {"SELECT", "WITH", "TABLE", "VALUES", "SHOW", "EXPLAIN", "DESCRIBE", "DESC", "CHECKSUM"}
+# Whitespace, comments and opening parentheses before a statement's first keyword. /*! ... */ is
+# executable in MySQL, so it is not skipped and the statement is refused.
+LEADING = re.compile(r"(\s+|/\*(?!!).*?\*/|(--(?=\s|$)|#)[^\n]*|\()*", re.S)
+
+
+def connect(settings):
+    return pymysql.connect(cursorclass=pymysql.cursors.DictCursor, autocommit=True,
+                           init_command="SET SESSION TRANSACTION READ ONLY", **settings)
+
+
+def split_statements(sql):
+    """Splits a script on the semicolons outside quoted strings, identifiers and comments."""
+    statements, start, quote, i = [], 0, None, 0
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            if char == "\\" and quote != "`":
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = len(sql) if end < 0 else end + 1
+        elif char == "#" or (sql.startswith("--", i) and sql[i + 2:i + 3] in ("", " ", "\t", "\r", "\n")):
+            end = sql.find("\n", i)
+            i = len(sql) if end < 0 else end
+        elif char == ";":
+            statements.append(sql[start:i])
+            start = i + 1
+        i += 1
+    statements.append(sql[start:])
+    # Drop the empty and comment-only pieces.
+    return [statement.strip() for statement in statements if LEADING.match(statement).end() < len(statement)]
+
+
+def first_keyword(statement):
+    match = re.match(r"\w+", statement[LEADING.match(statement).end():])
+    return match.group(0).upper() if match else None
+
+
+def compare_sql(sql, connections, max_rows):
+    """
+    Runs each statement on both databases, each side in one read-only transaction; returns row counts,
+    the first rows and whether they match. A script with any statement other than a query is refused
+    before anything runs.
+    """
+    statements = split_statements(sql)
+    refused = [statement for statement in statements if first_keyword(statement) not in READ_STATEMENTS]
+    if refused:
+        raise ValueError(f"SQL validation scripts may only run queries; refused: {refused[0][:200]}")
+    for connection in connections.values():
+        with connection.cursor() as cursor:
+            cursor.execute("START TRANSACTION READ ONLY")
+    try:
+        return _compare(statements, connections, max_rows)
+    finally:
+        for connection in connections.values():
+            connection.rollback()
+
+
+def _compare(statements, connections, max_rows):
+    results = []
+    for statement in statements:
+        rows = {}
+        for side, connection in connections.items():
+            with connection.cursor() as cursor:
+                cursor.execute(statement)
+                rows[side] = list(cursor.fetchall())
+        results.append({
+            "statement": statement[:500],
+            "match": rows["source"] == rows["target"],
+            "source_rows": len(rows["source"]),
+            "target_rows": len(rows["target"]),
+            "source": rows["source"][:max_rows],
+            "target": rows["target"][:max_rows],
+        })
+    return {"statements": results, "match": all(result["match"] for result in results)}
+
+
+def run_child(job, connections, max_rows):
+    """Body of the forked job process; never returns."""
+    code = 1
+    try:
+        os.setpgid(0, 0)
+        os.chdir(job["workspace"])
+        stdin = os.open(os.devnull, os.O_RDONLY)
+        stdout = os.open("stdout.log", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        stderr = os.open("stderr.log", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        for fd, target in ((stdin, 0), (stdout, 1), (stderr, 2)):
+            os.dup2(fd, target)
+        if job.get("cpu_seconds"):
+            resource.setrlimit(resource.RLIMIT_CPU, (job["cpu_seconds"], job["cpu_seconds"] + 5))
+        if job.get("memory_mb"):
+            limit = job["memory_mb"] * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        namespace = {**PRELOADED, "__name__": "__main__", "source": connections["source"], "target": connections["target"],
+                     "result": None}
+        try:
+            if job["language"] == "sql":
+                namespace["result"] = compare_sql(job["script"], connections, max_rows)
+            else:
+                exec(compile(job["script"], os.path.join(job["workspace"], "script.py"), "exec"), namespace)
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        with open("result.json", "w") as f:
+            json.dump(namespace.get("result"), f, default=str)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def run_job(job, connections, max_rows):
+    started = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        run_child(job, connections, max_rows)
+    deadline = started + job["timeout"]
+    timed_out = False
+    while True:
+        waited, wait_status, usage = os.wait4(pid, os.WNOHANG)
+        if waited:
+            break
+        if time.monotonic() > deadline:
+            timed_out = True
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _, wait_status, usage = os.wait4(pid, 0)
+            break
+        time.sleep(0.02)
+    signal_number = os.WTERMSIG(wait_status) if os.WIFSIGNALED(wait_status) else None
+    returncode = -signal_number if signal_number else os.WEXITSTATUS(wait_status)
+    if timed_out:
+        status, error = "timeout", f"Script timed out after {job['timeout']} seconds."
+    elif signal_number == signal.SIGXCPU:
+        status, error = "cpu_limit", f"Script exceeded its {job.get('cpu_seconds')} CPU seconds."
+    elif returncode != 0:
+        status, error = "error", f"Script exited with code {returncode}."
+    else:
+        status, error = "success", None
+    result = None
+    try:
+        with open(os.path.join(job["workspace"], "result.json")) as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        pass
+    return {
+        "status": status,
+        "error": error,
+        "returncode": returncode,
+        "result": result,
+        "duration_seconds": round(time.monotonic() - started, 3),
+        "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3),
+        "peak_rss_bytes": usage.ru_maxrss * 1024,  # Linux reports KiB.
+    }
+
+
+def session_read_only(connection):
+    # transaction_read_only is MySQL 5.7.20+ and MariaDB 11.1+; older servers only know tx_read_only.
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("SELECT @@session.transaction_read_only AS read_only")
+        except pymysql.err.OperationalError:
+            cursor.execute("SELECT @@session.tx_read_only AS read_only")
+        return bool(int(cursor.fetchall()[0]["read_only"]))
+
+
+def reusable(connection, reply):
+    """Whether a connection the job's child used can serve the next job."""
+    if reply["status"] in ("timeout", "cpu_limit") or reply["returncode"] < 0:
+        return False  # Killed mid-query: the rest of a result may still be on the socket.
+    try:
+        # A round trip that fails on a closed or out-of-sync connection, and ends any transaction the script left open.
+        connection.rollback()
+        # The session outlives the job, so one a script made read-write is not handed to the next.
+        return session_read_only(connection)
+    except Exception:
+        return False
+
+
+def main():
+    settings = json.loads(sys.stdin.readline())
+    max_rows = settings.get("max_rows", 100)
+    try:
+        connections = {side: connect(settings[side]) for side in ("source", "target")}
+    except Exception as e:
+        print(json.dumps({"ready": False, "error": str(e)}), flush=True)
+        return 1
+    print(json.dumps({"ready": True, "pid": os.getpid()}), flush=True)
+    for line in sys.stdin:
+        job = json.loads(line)
+        reply = run_job(job, connections, max_rows)
+        reply["job_id"] = job["job_id"]
+        for side, connection in connections.items():
+            if not reusable(connection, reply):
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+                connections[side] = connect(settings[side])
+        print(json.dumps(reply, default=str), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
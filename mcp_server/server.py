@@ -2,6 +2,7 @@
 
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from modelcontextprotocol.server.fastapi import McpRouter
 from.handlers import MigrationToolHandlers
 
@@ -19,8 +20,21 @@ mcp_router = McpRouter(
         "get_source_db_size": handlers.get_source_db_size,
         "get_source_schema": handlers.get_source_schema,
         "get_gcp_project_state": handlers.get_gcp_project_state,
+        "get_job_status": handlers.get_job_status,
+        "get_job_events": handlers.get_job_events,
+        "plan_dump": handlers.plan_dump,
+        "get_pipeline_status": handlers.get_pipeline_status,
+        "get_catchup_status": handlers.get_catchup_status,
+        "get_run_state": handlers.get_run_state,
+        "get_artifact": handlers.get_artifact,
+        "get_anomalies": handlers.get_anomalies,
+        "get_performance_summary": handlers.get_performance_summary,
+        "get_job_log": handlers.get_job_log,
     },
     tools={
+        "start_run": handlers.start_run,
+        "start_batch_run": handlers.start_batch_run,
+        "finish_run": handlers.finish_run,
         "provision_infra": handlers.provision_infra,
         "destroy_infra": handlers.destroy_infra,
         "run_gcs_import": handlers.run_gcs_import,
@@ -28,6 +42,17 @@ mcp_router = McpRouter(
         "run_mydumper": handlers.run_mydumper,
         "run_myloader": handlers.run_myloader,
         "run_validation_script": handlers.run_validation_script,
+        "run_validation_scripts": handlers.run_validation_scripts,
+        "convert_schema": handlers.convert_schema,
+        "apply_schema": handlers.apply_schema,
+        "run_pipelined_migration": handlers.run_pipelined_migration,
+        "cancel_pipeline": handlers.cancel_pipeline,
+        "start_binlog_catchup": handlers.start_binlog_catchup,
+        "stop_binlog_catchup": handlers.stop_binlog_catchup,
+        "validate_data": handlers.validate_data,
+        "run_tools_concurrently": handlers.run_tools_concurrently,
+        "cancel_job": handlers.cancel_job,
+        "reload_secrets": handlers.reload_secrets,
     },
     prompts={
         "get_gcp_encryption_recommendation": handlers.get_gcp_encryption_recommendation,
@@ -41,6 +66,11 @@ app.include_router(mcp_router, prefix="/mcp")
 async def root():
     return {"message": "MCP Server is running. Use the /mcp endpoint."}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-tool, per-phase and per-table counters in the Prometheus text format."""
+    return handlers.render_metrics()
+
 if __name__ == "__main__":
     # This allows running the server directly for testing
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,153 @@
+# gcp-agentic-migration/mcp_server/source_sizing.py
+
+import re
+import pymysql
+from.. import config
+
+BLOB_TYPES = ("tinyblob", "blob", "mediumblob", "longblob", "tinytext", "text", "mediumtext", "longtext", "json")
+# mysql.innodb_table_stats lists each partition as <table>#P#<partition> (#p# from MySQL 8.0).
+PARTITION_SEPARATOR = re.compile(r"#p#", re.IGNORECASE)
+MB = 1024 * 1024
+
+
+class SourceSizer:
+    """
+    Per-table sizes of the source database without forcing statistics refreshes.
+
+    With innodb_stats_on_metadata ON (the default before MySQL 5.6.6), reading DATA_LENGTH
+    and friends from information_schema.TABLES recalculates InnoDB statistics for every
+    table it touches, which can take minutes on large instances. In that case sizes come
+    from the persisted statistics in mysql.innodb_table_stats instead, and information_schema
+    is only asked for columns that can be answered from the table definition.
+    """
+
+    def __init__(self, pool, database):
+        self.pool = pool
+        self.database = database
+
+    def _query(self, sql, args=None):
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, args)
+                return cursor.fetchall()
+
+    def _stats_on_metadata(self):
+        try:
+            return bool(int(self._query("SELECT @@innodb_stats_on_metadata AS value")[0]["value"]))
+        except pymysql.MySQLError:
+            return False  # No such variable: no InnoDB statistics to trigger.
+
+    def _information_schema_stats(self, names=None):
+        sql = """
+            SELECT TABLE_NAME AS name, ENGINE AS engine, COALESCE(DATA_LENGTH, 0) AS data_bytes,
+                   COALESCE(INDEX_LENGTH, 0) AS index_bytes, COALESCE(TABLE_ROWS, 0) AS row_estimate,
+                   COALESCE(AVG_ROW_LENGTH, 0) AS avg_row_length
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+        """
+        args = [self.database]
+        if names is not None:
+            if not names:
+                return {}
+            sql += f" AND TABLE_NAME IN ({', '.join(['%s'] * len(names))})"
+            args += names
+        return {row["name"]: {key: (int(value) if key not in ("name", "engine") else value) for key, value in row.items()}
+                for row in self._query(sql, args)}
+
+    def _persistent_stats(self):
+        """Sizes of InnoDB tables from mysql.innodb_table_stats, or None if the table cannot be read."""
+        try:
+            page_size = int(self._query("SELECT @@innodb_page_size AS value")[0]["value"])
+            engines = {row["name"]: row["engine"] for row in self._query("""
+                SELECT TABLE_NAME AS name, ENGINE AS engine FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+            """, (self.database,))}
+            rows = self._query("""
+                SELECT table_name, n_rows, clustered_index_size, sum_of_other_index_sizes
+                FROM mysql.innodb_table_stats WHERE database_name = %s
+            """, (self.database,))
+        except pymysql.MySQLError:
+            return None
+        stats = {}
+        for row in rows:
+            name = PARTITION_SEPARATOR.split(row["table_name"], 1)[0]
+            if (engines.get(name) or "").lower() != "innodb":
+                continue
+            table = stats.setdefault(name, {"name": name, "engine": engines[name], "data_bytes": 0, "index_bytes": 0,
+                                            "row_estimate": 0, "avg_row_length": 0})
+            table["data_bytes"] += int(row["clustered_index_size"]) * page_size
+            table["index_bytes"] += int(row["sum_of_other_index_sizes"]) * page_size
+            table["row_estimate"] += int(row["n_rows"])
+        for table in stats.values():
+            if table["row_estimate"]:
+                table["avg_row_length"] = table["data_bytes"] // table["row_estimate"]
+        # Non-InnoDB tables (and InnoDB tables with STATS_PERSISTENT=0) are not in innodb_table_stats.
+        stats.update(self._information_schema_stats([name for name in engines if name not in stats]))
+        return stats
+
+    def _blob_columns(self):
+        blobs = {}
+        for row in self._query(f"""
+            SELECT TABLE_NAME AS name, COLUMN_NAME AS column_name FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND DATA_TYPE IN ({', '.join(['%s'] * len(BLOB_TYPES))})
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, (self.database, *BLOB_TYPES)):
+            blobs.setdefault(row["name"], []).append(row["column_name"])
+        return blobs
+
+    def collect_table_stats(self):
+        """
+        One dict per base table: name, engine, data_bytes, index_bytes, row_estimate,
+        avg_row_length and blob_columns; returns (stats, source).
+        """
+        stats = None
+        source = "information_schema"
+        if self._stats_on_metadata():
+            stats = self._persistent_stats()
+            source = "innodb_table_stats" if stats is not None else source
+        if stats is None:
+            stats = self._information_schema_stats()
+        blobs = self._blob_columns()
+        for name, table in stats.items():
+            table["blob_columns"] = blobs.get(name, [])
+        return sorted(stats.values(), key=lambda table: table["data_bytes"], reverse=True), source
+
+
+def transfer_estimates(stats, dump_plan):
+    """
+    Predicted wall time per strategy for moving `stats` (SourceSizer tables) to Cloud SQL,
+    from the configured throughputs and the dump planner's thread count and chunking.
+    Returns (estimates, recommended strategy): the fastest strategy that is eligible.
+    """
+    data_bytes = sum(table["data_bytes"] for table in stats)
+    index_bytes = sum(table["index_bytes"] for table in stats)
+    blob_bytes = sum(table["data_bytes"] for table in stats if table["blob_columns"])
+    # SQL dumps escape binary and text values, so blob-heavy tables grow on the way out.
+    dump_bytes = data_bytes + blob_bytes * (config.BLOB_DUMP_EXPANSION - 1)
+    # Secondary indexes are rebuilt on the target, which costs roughly their size again in load time.
+    load_bytes = dump_bytes + index_bytes
+    size_gb = (data_bytes + index_bytes) / 1024 ** 3
+    dump_seconds = dump_plan["estimated_dump_seconds"] * dump_bytes / data_bytes if data_bytes else 0
+
+    # The pipeline uploads and imports files while the dump runs, but Cloud SQL runs one import at a time.
+    import_seconds = load_bytes / (config.GCS_IMPORT_MBPS * MB) + dump_plan["chunks"] * config.GCS_IMPORT_FILE_OVERHEAD_SECONDS
+    load_seconds = load_bytes / (dump_plan["load_threads"] * config.LOAD_THREAD_MBPS * MB)
+    estimates = {
+        "gcs_import": {
+            "estimated_seconds": round(max(dump_seconds, import_seconds), 1),
+            "eligible": size_gb < config.GCS_IMPORT_MAX_GB,
+            "reason": f"Considered below {config.GCS_IMPORT_MAX_GB} GB.",
+        },
+        "dms": {
+            "estimated_seconds": round(config.DMS_SETUP_SECONDS + (data_bytes + index_bytes) / (config.DMS_MBPS * MB), 1),
+            "eligible": bool(config.DMS_JOB_ID) and size_gb <= config.DMS_MAX_GB,
+            "reason": f"Needs config.DMS_JOB_ID; considered up to {config.DMS_MAX_GB} GB.",
+        },
+        "mydumper": {
+            "estimated_seconds": round(dump_seconds + load_seconds, 1),
+            "eligible": True,
+            "reason": "Dump, then load with myloader.",
+        },
+    }
+    eligible = [name for name, estimate in estimates.items() if estimate["eligible"]]
+    return estimates, min(eligible, key=lambda name: estimates[name]["estimated_seconds"])
@@ -0,0 +1,444 @@
+# gcp-agentic-migration/mcp_server/telemetry.py
+
+import asyncio
+import atexit
+import collections
+import contextvars
+import functools
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from.. import config
+
+# Phase (as in utils/run_state.PHASES) that a tool's or job's work is accounted to.
+TOOL_PHASES = {
+    "provision_infra": "setup",
+    "destroy_infra": "setup",
+    "get_source_schema": "schema",
+    "convert_schema": "schema",
+    "apply_schema": "schema_apply",
+    "plan_dump": "dump",
+    "run_mydumper": "dump",
+    "mydumper": "dump",
+    "pipeline_upload": "upload",
+    "run_pipelined_migration": "load",
+    "pipeline_import": "load",
+    "run_myloader": "load",
+    "myloader": "load",
+    "run_gcs_import": "load",
+    "run_dms_job": "load",
+    "start_binlog_catchup": "catchup",
+    "binlog_apply": "catchup",
+    "stop_binlog_catchup": "catchup",
+    "validate_data": "validation",
+    "validate_table": "validation",
+    "run_validation_script": "validation",
+    "run_validation_scripts": "validation",
+}
+
+COUNTERS = ("bytes", "rows", "subprocesses", "subprocess_cpu_seconds", "process_cpu_seconds")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+class ProcessGroupSampler:
+    """
+    Samples the resident memory and CPU time of every process in a process group from /proc
+    (Linux only; elsewhere it reports nothing). RSS is summed across the group, so the peak
+    covers the shell and every tool it spawned. CPU is the last value seen per process, which
+    makes it a lower bound for processes that exit between two samples. A scan reads every
+    process on the host, so it runs on a worker thread rather than the event loop; stop()
+    takes a last one, so commands shorter than the interval are still sampled.
+    """
+
+    def __init__(self, pgid, interval=config.TELEMETRY_SAMPLE_SECONDS):
+        self.pgid = pgid
+        self.interval = interval
+        self.peak_rss_bytes = 0
+        self._cpu_ticks = {}  # pid -> utime + stime
+        self._lock = threading.Lock()  # a cancelled scan may still be running when the final one starts
+        self._task = None
+
+    def sample(self):
+        rss = 0
+        try:
+            entries = [entry.name for entry in os.scandir("/proc") if entry.name.isdigit()]
+        except OSError:
+            return
+        for pid in entries:
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            # Fields after the parenthesised command name, starting with field 3 (state).
+            fields = stat[stat.rindex(")") + 2:].split()
+            if int(fields[2]) != self.pgid:
+                continue
+            with self._lock:
+                self._cpu_ticks[pid] = int(fields[11]) + int(fields[12])
+            rss += int(fields[21]) * _PAGE_SIZE
+        with self._lock:
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await loop.run_in_executor(None, self.sample)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if os.path.isdir("/proc"):
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def cancel(self):
+        """Stops sampling without a last sample (the command is being torn down)."""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def stop(self):
+        """Stops sampling, takes a last sample of what is left of the group and returns its usage."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            await asyncio.get_running_loop().run_in_executor(None, self.sample)
+        return {"peak_rss_bytes": self.peak_rss_bytes or None,
+                "cpu_seconds": round(sum(self._cpu_ticks.values()) / _CLOCK_TICKS, 2) if self._cpu_ticks else None}
+
+
+def current_span():
+    return _current_span.get()
+
+
+def record_process(usage):
+    """Attributes a finished subprocess (ProcessGroupSampler.stop() output) to the current span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.add_process(usage)
+
+
+class Span:
+    """
+    One timed unit of work: a handler call, a pipeline upload/import, a background job or a
+    validated table. Counters: bytes and rows moved, subprocesses run with their sampled CPU
+    seconds and peak RSS, and the server's own CPU time while the span was open (process-wide,
+    so it includes anything running concurrently).
+    """
+
+    def __init__(self, tracer, name, phase=None, **attributes):
+        self.tracer = tracer
+        self.id = uuid.uuid4().hex[:12]
+        parent = _current_span.get()
+        self.parent = parent if parent is not None and parent.tracer is tracer else None
+        self.name = name
+        self.phase = phase if phase is not None else TOOL_PHASES.get(name)
+        self.attributes = attributes
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.peak_rss_bytes = 0
+        self.status = "success"
+        self.error = None
+        self.started_at = time.time()
+        self.wall_seconds = None
+        self._token = None
+
+    def add(self, bytes=0, rows=0):
+        self.counters["bytes"] += bytes or 0
+        self.counters["rows"] += rows or 0
+
+    def add_process(self, usage):
+        self.counters["subprocesses"] += 1
+        self.counters["subprocess_cpu_seconds"] += usage.get("cpu_seconds") or 0
+        self.peak_rss_bytes = max(self.peak_rss_bytes, usage.get("peak_rss_bytes") or 0)
+
+    def fail(self, error=None):
+        self.status = "error"
+        self.error = str(error)[:500] if error else None
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self._started = time.monotonic()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc_type is asyncio.CancelledError:
+            self.status = "cancelled"
+        elif exc_type is not None:
+            self.fail(exc)
+        self.wall_seconds = time.monotonic() - self._started
+        self.counters["process_cpu_seconds"] = time.process_time() - self._cpu
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "span_id": self.id,
+            "parent_id": self.parent.id if self.parent else None,
+            "name": self.name,
+            "phase": self.phase,
+            "status": self.status,
+            "started_at": self.started_at,
+            "wall_seconds": round(self.wall_seconds or 0, 3),
+            **{name: round(value, 3) if isinstance(value, float) else value for name, value in self.counters.items()},
+            "peak_rss_bytes": self.peak_rss_bytes or None,
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+class FileWriter:
+    """
+    Appends to and rewrites files on one background thread, in the order asked, so span
+    persistence never does file I/O on the event loop. wait() blocks until everything queued
+    so far is on disk; it also runs at interpreter exit.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _run(self):
+        while True:
+            path, mode, text = self._queue.get()
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp" if mode == "w" else path, mode) as f:
+                    f.write(text)
+                if mode == "w":
+                    os.replace(path + ".tmp", path)
+            except OSError as e:
+                print(f"Telemetry write to {path} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def submit(self, path, mode, text):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.wait)
+        self._queue.put((path, mode, text))
+
+    def wait(self):
+        self._queue.join()
+
+
+def _new_totals():
+    return {"spans": 0, "errors": 0, "first_start": None, "last_end": None, "busy_seconds": 0.0,
+            "peak_rss_bytes": 0, **dict.fromkeys(COUNTERS, 0)}
+
+
+def _accumulate(totals, record):
+    end = record["started_at"] + record["wall_seconds"]
+    totals["spans"] += 1
+    totals["errors"] += record["status"] == "error"
+    totals["first_start"] = min(filter(None, (totals["first_start"], record["started_at"])))
+    totals["last_end"] = max(filter(None, (totals["last_end"], end)))
+    totals["busy_seconds"] += record["wall_seconds"]
+    totals["peak_rss_bytes"] = max(totals["peak_rss_bytes"], record["peak_rss_bytes"] or 0)
+    for name in COUNTERS:
+        totals[name] += record[name] or 0
+
+
+def _rates(totals):
+    """Totals plus elapsed wall time (first start to last end, so overlapping spans count once) and throughput."""
+    elapsed = (totals["last_end"] - totals["first_start"]) if totals["first_start"] else 0
+    view = {name: round(value, 3) if isinstance(value, float) else value for name, value in totals.items()}
+    view["elapsed_seconds"] = round(elapsed, 3)
+    view["bytes_per_second"] = round(totals["bytes"] / elapsed, 1) if elapsed else None
+    view["rows_per_second"] = round(totals["rows"] / elapsed, 1) if elapsed else None
+    return view
+
+
+class Tracer:
+    """
+    Collects spans and aggregates them per tool (for the lifetime of the server), and per phase
+    and per table (for the active run). Spans only count bytes and rows for the unit of work
+    that moved them, so the handler span around a background job or a pipeline stays at zero
+    and phase totals are not double counted.
+
+    While a run is active, every finished span is appended to <TELEMETRY_DIR>/<run_id>/spans.jsonl
+    and the phase and table totals are rewritten to summary.json next to it; a resumed run
+    picks its totals up from there. The files are written by a FileWriter thread.
+    """
+
+    def __init__(self, root=config.TELEMETRY_DIR):
+        self.root = root
+        self.run_id = None
+        self.spans = collections.deque(maxlen=config.TELEMETRY_SPAN_BUFFER)
+        self.tools = {}  # (tool, status) -> totals, for /metrics
+        self.phases = {}
+        self.tables = {}  # phase -> table -> totals
+        self._summary_written = 0.0
+        self.writer = FileWriter()
+
+    # --- Runs ---
+    def _run_dir(self):
+        return os.path.join(self.root, self.run_id) if self.root and self.run_id else None
+
+    def start_run(self, run_id):
+        self.flush()
+        self.writer.wait()
+        self.run_id = run_id
+        self.phases, self.tables = {}, {}
+        run_dir = self._run_dir()
+        if run_dir and os.path.exists(os.path.join(run_dir, "summary.json")):
+            with open(os.path.join(run_dir, "summary.json")) as f:
+                saved = json.load(f)
+            self.phases, self.tables = saved["phase_totals"], saved["table_totals"]
+
+    def _persist(self, record):
+        run_dir = self._run_dir()
+        if run_dir is None:
+            return
+        self.writer.submit(os.path.join(run_dir, "spans.jsonl"), "a", json.dumps(record, default=str) + "\n")
+        # A pipeline finishes a span per dump file, so the summary is rewritten at most every few seconds.
+        if record["phase"] is not None and time.monotonic() - self._summary_written >= 5:
+            self.flush()
+
+    def flush(self):
+        """Queues the phase and table totals of the active run for summary.json."""
+        run_dir = self._run_dir()
+        if run_dir is None:
+            return
+        # Serialized here, so the writer thread never reads totals the event loop is updating.
+        self.writer.submit(os.path.join(run_dir, "summary.json"), "w",
+                           json.dumps({"run_id": self.run_id, "phase_totals": self.phases, "table_totals": self.tables,
+                                       **self.summary()}, indent=2))
+        self._summary_written = time.monotonic()
+
+    # --- Spans ---
+    def span(self, name, phase=None, **attributes):
+        return Span(self, name, phase, **attributes)
+
+    def traced(self, name, func):
+        """
+        Wraps an async handler in a span; results with status "error" mark the span as failed.
+        Calls for one database of a batch run carry it as the span's `database` attribute.
+        """
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            attributes = {"database": kwargs["database"]} if kwargs.get("database") else {}
+            with self.span(name, **attributes) as span:
+                result = await func(*args, **kwargs)
+                if isinstance(result, dict) and (result.get("status") == "error" or "error" in result):
+                    span.fail(result.get("message") or result.get("error"))
+                return result
+        return wrapper
+
+    def record(self, name, started_at, wall_seconds, phase=None, status="success", bytes=0, rows=0, usage=None, **attributes):
+        """Records a span for work that was timed elsewhere (a background job, a validated table)."""
+        span = Span(self, name, phase, **attributes)
+        span.parent = None
+        span.started_at, span.wall_seconds, span.status = started_at, wall_seconds, status
+        span.add(bytes, rows)
+        if usage:
+            span.add_process(usage)
+        self._finish(span)
+
+    def _finish(self, span):
+        if span.parent is not None:
+            # Subprocess usage rolls up; bytes and rows stay with the span that moved them.
+            span.parent.counters["subprocesses"] += span.counters["subprocesses"]
+            span.parent.counters["subprocess_cpu_seconds"] += span.counters["subprocess_cpu_seconds"]
+            span.parent.peak_rss_bytes = max(span.parent.peak_rss_bytes, span.peak_rss_bytes)
+        record = span.to_dict()
+        self.spans.append(record)
+        _accumulate(self.tools.setdefault((span.name, span.status), _new_totals()), record)
+        if span.phase is not None:
+            _accumulate(self.phases.setdefault(span.phase, _new_totals()), record)
+            table = span.attributes.get("table")
+            if table:
+                _accumulate(self.tables.setdefault(span.phase, {}).setdefault(table, _new_totals()), record)
+        self._persist(record)
+
+    # --- JobManager listener ---
+    def job_finished(self, job):
+        progress = job.last_progress or {}
+        self.record(job.name, job.started_at, job.finished_at - job.started_at,
+                    status=job.status if job.status in ("success", "cancelled") else "error",
+                    bytes=progress.get("bytes_done"), rows=progress.get("rows_done"), usage=job.resources or None,
+                    job_id=job.id)
+
+    # --- Views ---
+    def saved_summary(self, run_id):
+        """The summary.json of an earlier run, or None."""
+        self.writer.wait()
+        path = os.path.join(self.root, run_id, "summary.json") if self.root else None
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            saved = json.load(f)
+        return {key: saved[key] for key in ("run_id", "phases", "slowest_tables")}
+
+    def summary(self, top_tables=20):
+        """Per-phase totals and throughput, plus the slowest tables of each phase."""
+        return {
+            "run_id": self.run_id,
+            "phases": {phase: _rates(totals) for phase, totals in self.phases.items()},
+            "slowest_tables": {
+                phase: [{"table": table, **_rates(totals)} for table, totals in
+                        sorted(tables.items(), key=lambda item: item[1]["busy_seconds"], reverse=True)[:top_tables]]
+                for phase, tables in self.tables.items()
+            },
+        }
+
+    def render_metrics(self):
+        """Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        tools = sorted(self.tools.items())
+        metric("mcp_tool_calls_total", "counter", "Spans finished per tool, job or unit of work.",
+               [({"tool": tool, "status": status}, totals["spans"]) for (tool, status), totals in tools])
+        metric("mcp_tool_seconds_total", "counter", "Wall-clock seconds spent per tool.",
+               [({"tool": tool, "status": status}, round(totals["busy_seconds"], 3)) for (tool, status), totals in tools])
+        metric("mcp_tool_process_cpu_seconds_total", "counter", "Server CPU seconds while the tool ran (process-wide).",
+               [({"tool": tool, "status": status}, round(totals["process_cpu_seconds"], 3)) for (tool, status), totals in tools])
+        metric("mcp_subprocess_cpu_seconds_total", "counter", "Sampled CPU seconds of the tool's subprocesses.",
+               [({"tool": tool, "status": status}, round(totals["subprocess_cpu_seconds"], 3)) for (tool, status), totals in tools])
+        metric("mcp_subprocess_peak_rss_bytes", "gauge", "Highest sampled RSS of a tool's subprocess group.",
+               [({"tool": tool, "status": status}, totals["peak_rss_bytes"]) for (tool, status), totals in tools])
+        metric("mcp_bytes_moved_total", "counter", "Bytes dumped, uploaded or loaded.",
+               [({"tool": tool, "status": status}, totals["bytes"]) for (tool, status), totals in tools])
+        metric("mcp_rows_moved_total", "counter", "Rows dumped, loaded or validated.",
+               [({"tool": tool, "status": status}, totals["rows"]) for (tool, status), totals in tools])
+
+        run = {"run_id": self.run_id or ""}
+        phases = sorted((phase, _rates(totals)) for phase, totals in self.phases.items())
+        metric("migration_phase_elapsed_seconds", "gauge", "First start to last end of the phase's spans.",
+               [({**run, "phase": phase}, view["elapsed_seconds"]) for phase, view in phases])
+        metric("migration_phase_bytes_total", "counter", "Bytes moved in the phase.",
+               [({**run, "phase": phase}, view["bytes"]) for phase, view in phases])
+        metric("migration_phase_rows_total", "counter", "Rows moved in the phase.",
+               [({**run, "phase": phase}, view["rows"]) for phase, view in phases])
+        metric("migration_phase_bytes_per_second", "gauge", "Bytes moved per elapsed second.",
+               [({**run, "phase": phase}, view["bytes_per_second"] or 0) for phase, view in phases])
+
+        tables = sorted(((phase, table, totals) for phase, by_table in self.tables.items() for table, totals in by_table.items()),
+                        key=lambda item: item[2]["busy_seconds"], reverse=True)[:config.TELEMETRY_METRICS_MAX_TABLES]
+        metric("migration_table_seconds", "gauge", "Seconds spent on the table in the phase.",
+               [({**run, "phase": phase, "table": table}, round(totals["busy_seconds"], 3)) for phase, table, totals in tables])
+        metric("migration_table_bytes_total", "counter", "Bytes of the table moved in the phase.",
+               [({**run, "phase": phase, "table": table}, totals["bytes"]) for phase, table, totals in tables])
+        metric("migration_table_rows_total", "counter", "Rows of the table moved in the phase.",
+               [({**run, "phase": phase, "table": table}, totals["rows"]) for phase, table, totals in tables])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,185 @@
+# gcp-agentic-migration/mcp_server/terraform_runner.py
+
+import glob
+import hashlib
+import json
+import os
+from.. import config
+from.executor import run_command
+
+# Resource groups that can be applied on their own with -target. Terraform pulls in each
+# target's dependencies (e.g. the VPC for the Cloud SQL private network) automatically.
+TARGETS = {
+    "cloud_sql": ["google_sql_database_instance.mysql_instance", "google_sql_database_instance.additional_mysql_instances"],
+    "orchestrator": ["google_compute_instance.orchestrator_vm", "google_storage_bucket.migration_bucket"],
+}
+
+PLAN_FILE = "tfplan"
+STATE_FILE = "state.json"
+
+
+def terraform_variables():
+    """The -var values passed to every plan/apply, derived from config.py."""
+    return {
+        "gcp_project_id": config.GCP_PROJECT_ID,
+        "gcp_region": config.GCP_REGION,
+        "gcp_zone": config.GCP_ZONE,
+        "cloud_sql_instance_name": config.CLOUD_SQL_INSTANCE_NAME,
+        "cloud_sql_additional_instance_names": json.dumps(config.CLOUD_SQL_ADDITIONAL_INSTANCES),
+        "cloud_sql_db_version": config.CLOUD_SQL_DB_VERSION,
+        "cloud_sql_tier": config.CLOUD_SQL_TIER,
+        "cloud_sql_root_password_secret": config.CLOUD_SQL_ROOT_PASSWORD_SECRET,
+        "cloud_sql_backup_start_time": config.CLOUD_SQL_BACKUP_START_TIME,
+        "gcs_bucket_name_suffix": config.GCS_BUCKET_NAME_SUFFIX,
+    }
+
+
+class TerraformRunner:
+    """
+    Runs terraform for provision_infra without redoing work that has not changed.
+
+    - `init` is skipped while the provider requirements (all *.tf files plus the lock file)
+      hash to the same value as at the last successful init; providers come from a shared
+      plugin cache.
+    - Plans are saved to disk together with the fingerprint of the configuration (*.tf,
+      *.tfvars and the -var values) and the targets they cover, so a plan can be reviewed
+      and then applied without planning again.
+    - The fingerprint of every successful apply is recorded, which lets the caller skip
+      terraform entirely when nothing changed.
+    """
+
+    def __init__(self, tf_dir, cache_dir=config.TERRAFORM_CACHE_DIR):
+        self.tf_dir = tf_dir
+        self.cache_dir = cache_dir
+        self.plan_path = os.path.abspath(os.path.join(cache_dir, PLAN_FILE))
+        self.variables = terraform_variables()
+
+    # --- Fingerprints and cached state ---
+    def _hash_files(self, patterns, extra=""):
+        digest = hashlib.sha256(extra.encode())
+        for pattern in patterns:
+            for path in sorted(glob.glob(os.path.join(self.tf_dir, pattern))):
+                digest.update(os.path.basename(path).encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        return digest.hexdigest()
+
+    def fingerprint(self):
+        return self._hash_files(["*.tf", "*.tfvars", ".terraform.lock.hcl"], json.dumps(self.variables, sort_keys=True))
+
+    def _init_fingerprint(self):
+        return self._hash_files(["*.tf", ".terraform.lock.hcl"])
+
+    def load_state(self):
+        path = os.path.join(self.cache_dir, STATE_FILE)
+        if not os.path.exists(path):
+            return {"init": None, "applied": {}, "plan": None}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, STATE_FILE), "w") as f:
+            json.dump(state, f, indent=2)
+
+    @staticmethod
+    def target_key(targets):
+        return ",".join(sorted(targets)) if targets else "all"
+
+    def applied(self, targets):
+        """True if the current configuration was already applied for these targets (or for everything)."""
+        fingerprint = self.fingerprint()
+        applied = self.load_state()["applied"]
+        if applied.get("all") == fingerprint:
+            return True
+        return bool(targets) and all(applied.get(target) == fingerprint for target in targets)
+
+    def forget(self):
+        """Drops recorded applies and the saved plan, e.g. after a destroy."""
+        state = self.load_state()
+        state["applied"], state["plan"] = {}, None
+        self.save_state(state)
+        if os.path.exists(self.plan_path):
+            os.remove(self.plan_path)
+
+    # --- Commands ---
+    def _env(self):
+        os.makedirs(config.TERRAFORM_PLUGIN_CACHE_DIR, exist_ok=True)
+        return dict(os.environ, TF_IN_AUTOMATION="1", TF_PLUGIN_CACHE_DIR=os.path.abspath(config.TERRAFORM_PLUGIN_CACHE_DIR))
+
+    def _var_flags(self):
+        return " ".join(f"-var='{name}={value}'" for name, value in self.variables.items())
+
+    async def _terraform(self, args, timeout):
+        return await run_command(f"{config.TERRAFORM_BIN} -chdir={self.tf_dir} {args}", timeout=timeout, env=self._env())
+
+    async def init(self, timeout):
+        state = self.load_state()
+        fingerprint = self._init_fingerprint()
+        if state["init"] == fingerprint and os.path.isdir(os.path.join(self.tf_dir, ".terraform")):
+            return {"status": "success", "skipped": True, "stdout": "", "stderr": "", "returncode": 0}
+        result = await self._terraform("init -input=false", timeout)
+        if result["status"] == "success":
+            state["init"] = fingerprint
+            self.save_state(state)
+        return result
+
+    def _saved_plan(self, targets):
+        plan = self.load_state()["plan"]
+        if plan and plan["fingerprint"] == self.fingerprint() and plan["targets"] == self.target_key(targets) \
+                and os.path.exists(self.plan_path):
+            return plan
+        return None
+
+    async def plan(self, targets, parallelism, timeout):
+        """Writes a saved plan; returns the result with `changes` set from -detailed-exitcode."""
+        target_flags = " ".join(f"-target={resource}" for target in targets or [] for resource in TARGETS[target])
+        os.makedirs(self.cache_dir, exist_ok=True)
+        result = await self._terraform(
+            f"plan -input=false -detailed-exitcode -parallelism={parallelism} -out={self.plan_path} {target_flags} {self._var_flags()}",
+            timeout)
+        # -detailed-exitcode: 0 = no changes, 1 = error, 2 = changes present.
+        if result["returncode"] == 2:
+            result["status"] = "success"
+        result["changes"] = result["returncode"] == 2
+        if result["status"] == "success":
+            state = self.load_state()
+            state["plan"] = {"fingerprint": self.fingerprint(), "targets": self.target_key(targets), "changes": result["changes"]}
+            self.save_state(state)
+        return result
+
+    async def apply(self, targets, parallelism, timeout, plan_only=False):
+        """init (if needed) -> plan (unless a matching saved plan exists) -> apply the saved plan."""
+        init = await self.init(timeout)
+        if init["status"] != "success":
+            return init
+        plan = self._saved_plan(targets)
+        if plan is None:
+            result = await self.plan(targets, parallelism, timeout)
+            if result["status"] != "success":
+                return result
+            plan = self.load_state()["plan"]
+        else:
+            result = {"status": "success", "stdout": "Reusing saved plan.", "stderr": "", "returncode": 0}
+        if plan_only:
+            result["plan_path"] = self.plan_path
+            return result
+        if not plan["changes"]:
+            self._record_apply(targets)
+            return {"status": "success", "changes": False, "stdout": "No changes. Infrastructure matches the configuration.",
+                    "stderr": "", "returncode": 0}
+        result = await self._terraform(f"apply -input=false -auto-approve -parallelism={parallelism} {self.plan_path}", timeout)
+        state = self.load_state()
+        state["plan"] = None  # A saved plan is stale once applied (or once the apply failed part-way).
+        self.save_state(state)
+        if result["status"] == "success":
+            self._record_apply(targets)
+        result["changes"] = True
+        return result
+
+    def _record_apply(self, targets):
+        state = self.load_state()
+        fingerprint = self.fingerprint()
+        for key in (targets or ["all", *TARGETS]):
+            state["applied"][key] = fingerprint
+        self.save_state(state)
@@ -0,0 +1,259 @@
+# gcp-agentic-migration/mcp_server/validation.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from.. import config
+
+# Hashed as stored; every other column is hashed as utf8mb4 text, so a table converted from
+# latin1 or utf8 on the way to Cloud SQL hashes the same on both sides.
+BINARY_TYPES = {"binary", "varbinary", "tinyblob", "blob", "mediumblob", "longblob", "bit", "geometry", "point", "linestring",
+                "polygon", "multipoint", "multilinestring", "multipolygon", "geometrycollection"}
+
+
+def quote_identifier(name):
+    return "`" + str(name).replace("`", "``") + "`"
+
+
+class ChunkedChecksumValidator:
+    """
+    Compares source and target tables chunk by chunk.
+
+    Each table is split into chunks of `chunk_size` rows by walking its primary key on the
+    source (keyset pagination: the key `chunk_size` rows after the previous boundary ends a
+    chunk), so chunks stay even for sparse, composite and non-integer keys. For every chunk
+    both sides compute a row count plus an order-independent hash of the rows (BIT_XOR and
+    SUM of CRC32 over the length-prefixed values of all columns), so no sort or GROUP_CONCAT
+    is needed. Mismatched chunks
+    are split further until they are small enough to diff row by row on the full key.
+
+    Both sides must agree on key order for a range to hold the same rows. When a string key
+    column's collation differs between source and target (e.g. after a utf8mb4 conversion),
+    ranges and boundaries compare that column as utf8mb4_bin on both sides, which costs an
+    index range scan per chunk.
+    """
+
+    def __init__(self, source_pool, target_pool, database,
+                 chunk_size=config.VALIDATION_CHUNK_SIZE,
+                 workers=config.VALIDATION_WORKERS,
+                 drilldown_rows=config.VALIDATION_DRILLDOWN_ROWS,
+                 max_diff_rows=config.VALIDATION_MAX_DIFF_ROWS):
+        self.pools = {"source": source_pool, "target": target_pool}
+        self.database = database
+        self.chunk_size = max(1, chunk_size)
+        self.workers = max(1, workers)
+        self.drilldown_rows = drilldown_rows
+        self.max_diff_rows = max_diff_rows
+        self._key_order = {}  # table -> SQL expression per primary key column, in the order both sides compare by
+
+    def _query(self, side, sql, args=None):
+        with self.pools[side].connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, args)
+                return cursor.fetchall()
+
+    # --- Metadata ---
+    def _list_tables(self):
+        rows = self._query("source", """
+            SELECT TABLE_NAME AS name FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE' ORDER BY TABLE_NAME
+        """, (self.database,))
+        return [row["name"] for row in rows]
+
+    def _table_layout(self, table):
+        """The columns in order ({"name", "type", "collation"}) and the primary key columns, or None without a primary key."""
+        columns = self._query("source", """
+            SELECT COLUMN_NAME AS name, DATA_TYPE AS type, COLLATION_NAME AS collation FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION
+        """, (self.database, table))
+        primary_key = self._query("source", """
+            SELECT COLUMN_NAME AS name FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = 'PRIMARY' ORDER BY SEQ_IN_INDEX
+        """, (self.database, table))
+        return columns, [column["name"] for column in primary_key] or None
+
+    def _key_expressions(self, table, columns, key):
+        """The key columns as compared in ranges; string columns whose collation changed compare as utf8mb4_bin."""
+        source = {column["name"]: column["collation"] for column in columns}
+        target = {row["name"]: row["collation"] for row in self._query("target", """
+            SELECT COLUMN_NAME AS name, COLLATION_NAME AS collation FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+        """, (self.database, table))}
+        if all(source[column] == target.get(column) for column in key if source[column]):
+            return [quote_identifier(column) for column in key]
+        return [f"CONVERT({quote_identifier(column)} USING utf8mb4) COLLATE utf8mb4_bin" if source[column] else quote_identifier(column)
+                for column in key]
+
+    @staticmethod
+    def _row_hash_expression(columns):
+        # Each value is written as <byte length>:<value> and NULL as N, so no choice of
+        # values can shift one column's bytes into the next.
+        parts = []
+        for column in columns:
+            value = quote_identifier(column["name"])
+            if column["type"].lower() not in BINARY_TYPES:
+                value = f"CONVERT({value} USING utf8mb4)"
+            parts.append(f"COALESCE(CONCAT(LENGTH({value}), ':', {value}), 'N')")
+        return f"CRC32(CONCAT({', '.join(parts)}))"
+
+    def _key_range(self, table, key, lower, upper):
+        """The WHERE clause and arguments for the keys after `lower` up to and including `upper` (tuples; None is open)."""
+        if key is None:
+            return "", []
+        columns = ", ".join(self._key_order[table])
+        placeholders = ", ".join(["%s"] * len(key))
+        clauses, args = [], []
+        if lower is not None:
+            clauses.append(f"({columns}) > ({placeholders})")
+            args += lower
+        if upper is not None:
+            clauses.append(f"({columns}) <= ({placeholders})")
+            args += upper
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    @staticmethod
+    def _key_value(key):
+        """A key tuple as reported: the value itself for a single-column key, else a list."""
+        if key is None:
+            return None
+        values = [value if value is None or isinstance(value, (int, float, str)) else str(value) for value in key]
+        return values[0] if len(values) == 1 else values
+
+    # --- Chunking ---
+    def _next_boundary(self, side, table, key, lower, upper, rows):
+        """The key `rows` rows after `lower` (not past `upper`) in key order, or None if fewer rows are left."""
+        where, args = self._key_range(table, key, lower, upper)
+        columns = ", ".join(quote_identifier(column) for column in key)
+        order = ", ".join(self._key_order[table])
+        found = self._query(side, f"SELECT {columns} FROM {quote_identifier(table)}{where} ORDER BY {order} LIMIT 1 OFFSET %s",
+                            args + [rows - 1])
+        return tuple(found[0][column] for column in key) if found else None
+
+    def _chunks(self, side, table, key, lower, upper, rows):
+        """Yields consecutive (lower, upper] ranges of `rows` keys each on `side`, covering (lower, upper]."""
+        while True:
+            boundary = self._next_boundary(side, table, key, lower, upper, rows)
+            if boundary is None or boundary == upper:
+                yield lower, upper
+                return
+            yield lower, boundary
+            lower = boundary
+
+    # --- Chunk checks ---
+    def _chunk_checksum(self, side, table, columns, key, lower, upper):
+        where, args = self._key_range(table, key, lower, upper)
+        row_hash = self._row_hash_expression(columns)
+        rows = self._query(side, f"""
+            SELECT COUNT(*) AS row_count,
+                   COALESCE(BIT_XOR({row_hash}), 0) AS crc_xor,
+                   COALESCE(SUM({row_hash}), 0) AS crc_sum
+            FROM {quote_identifier(table)}{where}
+        """, args)
+        row = rows[0]
+        return int(row["row_count"]), int(row["crc_xor"]), int(row["crc_sum"])
+
+    def _row_hashes(self, side, table, columns, key, lower, upper):
+        where, args = self._key_range(table, key, lower, upper)
+        key_columns = ", ".join(quote_identifier(column) for column in key)
+        rows = self._query(side, f"""
+            SELECT {key_columns}, {self._row_hash_expression(columns)} AS `__row_crc`
+            FROM {quote_identifier(table)}{where}
+        """, args)
+        return {tuple(row[column] for column in key): row["__row_crc"] for row in rows}
+
+    def _submit_chunk(self, pool, table, columns, key, lower, upper):
+        """Queues the checksum of one range on both sides; returns the two futures."""
+        return (pool.submit(self._chunk_checksum, "source", table, columns, key, lower, upper),
+                pool.submit(self._chunk_checksum, "target", table, columns, key, lower, upper))
+
+    def _drill_down(self, pool, table, columns, key, lower, upper, source_rows, target_rows, diff):
+        """Narrows a mismatched range down to individual primary keys."""
+        rows = max(source_rows, target_rows)
+        if rows > self.drilldown_rows:
+            # Split on the side with more rows, so every part is about a tenth of the range.
+            side = "source" if source_rows >= target_rows else "target"
+            ranges = list(self._chunks(side, table, key, lower, upper, max(1, rows // 10)))
+            if len(ranges) > 1:
+                checks = [(r, self._submit_chunk(pool, table, columns, key, *r)) for r in ranges]
+                for (sub_lower, sub_upper), (source, target) in checks:
+                    source, target = source.result(), target.result()
+                    if source != target:
+                        self._drill_down(pool, table, columns, key, sub_lower, sub_upper, source[0], target[0], diff)
+                return
+        source = pool.submit(self._row_hashes, "source", table, columns, key, lower, upper)
+        target = pool.submit(self._row_hashes, "target", table, columns, key, lower, upper)
+        source, target = source.result(), target.result()
+        for pk, crc in source.items():
+            if pk not in target:
+                self._record(diff, "missing_in_target", pk)
+            elif target[pk] != crc:
+                self._record(diff, "changed", pk)
+        for pk in target.keys() - source.keys():
+            self._record(diff, "extra_in_target", pk)
+
+    def _record(self, diff, kind, pk):
+        diff["diff_counts"][kind] += 1
+        if len(diff[kind]) < self.max_diff_rows:
+            diff[kind].append(self._key_value(pk))
+
+    def _validate_table(self, pool, table):
+        started = time.monotonic()
+        columns, key = self._table_layout(table)
+        result = {
+            "status": "match",
+            "source_rows": 0,
+            "target_rows": 0,
+            "chunks": 0,
+            "mismatched_chunks": [],
+            "missing_in_target": [],
+            "extra_in_target": [],
+            "changed": [],
+            "diff_counts": {"missing_in_target": 0, "extra_in_target": 0, "changed": 0},
+        }
+        if key is None:
+            # No primary key to page through: compare the table as a single chunk.
+            ranges = [(None, None)]
+            result["note"] = "No primary key; compared as a single chunk without row-level drill-down."
+        else:
+            self._key_order[table] = self._key_expressions(table, columns, key)
+            if any(" COLLATE " in expression for expression in self._key_order[table]):
+                result["note"] = "Key collation differs on the target; key ranges are compared as utf8mb4_bin on both sides."
+            # The first chunk starts before the lowest key and the last one is open-ended, so target
+            # rows outside the source's key range land in them too. Checksums start as boundaries are found.
+            ranges = self._chunks("source", table, key, None, None, self.chunk_size)
+
+        checks = [(r, self._submit_chunk(pool, table, columns, key, *r)) for r in ranges]
+        result["chunks"] = len(checks)
+        for (lower, upper), (source, target) in checks:
+            source, target = source.result(), target.result()
+            result["source_rows"] += source[0]
+            result["target_rows"] += target[0]
+            if source != target:
+                result["status"] = "mismatch"
+                result["mismatched_chunks"].append([self._key_value(lower), self._key_value(upper)])
+                if key is not None:
+                    self._drill_down(pool, table, columns, key, lower, upper, source[0], target[0], result)
+        result["elapsed_seconds"] = round(time.monotonic() - started, 2)
+        return result
+
+    def validate(self, tables=None):
+        started = time.monotonic()
+        report = {}
+        # Checksum queries run on `workers` threads and never wait on other tasks;
+        # per-table coordination (and drill-down) runs on a separate pool.
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="validate") as pool, \
+                ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="validate-table") as table_pool:
+            tables = tables or self._list_tables()
+            futures = {table: table_pool.submit(self._validate_table, pool, table) for table in tables}
+            for table, future in futures.items():
+                try:
+                    report[table] = future.result()
+                except Exception as e:
+                    report[table] = {"status": "error", "message": str(e)}
+        failed = [table for table, result in report.items() if result["status"] != "match"]
+        return {
+            "result": "VALIDATION FAILURE" if failed else "VALIDATION SUCCESS",
+            "tables_checked": len(report),
+            "tables_failed": failed,
+            "elapsed_seconds": round(time.monotonic() - started, 2),
+            "tables": report,
+        }
@@ -0,0 +1,682 @@
+# gcp-agentic-migration/orchestrator.py
+import asyncio
+import contextlib
+import json
+import os
+import re
+import time
+from modelcontextprotocol.client.ws import McpWsClient
+
+import config
+
+class PhaseFailed(Exception):
+    def __init__(self, phase, result):
+        super().__init__(f"Phase '{phase}' failed")
+        self.phase = phase
+        self.result = result
+
+
+def _compact(result, limit=4000):
+    """Tool results are trimmed before they reach an agent; the agent sees the summary, not the raw output."""
+    text = json.dumps(result, default=str)
+    return text if len(text) <= limit else text[:limit] + "...(truncated)"
+
+
+def _reviewed_statements(reply):
+    """The list of {"object_type", "name", "ddl"} in the Schema_Conversion_Agent's reply (a ```json block or bare JSON), or []."""
+    match = re.search(r"```(?:json)?\s*(\[.*?\])\s*```", reply, re.DOTALL)
+    try:
+        statements = json.loads(match.group(1) if match else reply.strip())
+    except ValueError:
+        return []
+    return [entry for entry in statements if isinstance(entry, dict)] if isinstance(statements, list) else []
+
+
+@contextlib.asynccontextmanager
+async def _holding(*slots):
+    """Holds every slot, acquired in the order given."""
+    async with contextlib.AsyncExitStack() as stack:
+        for slot in slots:
+            await stack.enter_async_context(slot)
+        yield
+
+
+class MigrationOrchestrator:
+    """
+    Runs the migration as a graph of phases (see build_graph): provisioning, schema conversion and
+    the source dump overlap; applying the schema, loading, the binlog catch-up and validation wait
+    for the target.
+
+    Every tool call is made directly against the MCP server. Agents are consulted only at
+    decision points and only with the data that decision needs, in a fresh conversation:
+    - Schema_Conversion_Agent: objects the rule engine flagged for review (skipped if none).
+    - Anomaly_Detection_Agent: anomalies flagged by the MCP server's detector (checked while jobs
+      run and after every phase), to decide between CONTINUE and ABORT; and a failed tool result,
+      to decide between RETRY and ABORT.
+    - Data_Validation_Agent: the validation report, only when validation fails.
+    - Performance_Optimization_Agent: the run summary, once, for the final report.
+    LLM calls therefore scale with the number of decisions, not with turns x agents x transcript.
+
+    Inside a batch run (see BatchOrchestrator) it migrates one `database` of the batch: tools are
+    called with database=..., the dump goes to its own directory, provisioning, anomaly escalation
+    and agent calls are shared with the batch, and phases wait for the batch's scheduler slots.
+    """
+
+    def __init__(self, mcp_client: McpWsClient, agents: dict, volume: int, encryption: str, run_state: dict = None,
+                 database: str = None, batch: "BatchOrchestrator" = None):
+        self.mcp = mcp_client
+        self.agents = agents
+        self.volume = volume
+        self.encryption = encryption
+        self.run_state = run_state or {}
+        self.database = database
+        self.batch = batch
+        self.scope = {"database": database} if database else {}
+        self.dump_dir = os.path.join(config.DUMP_OUTPUT_DIR, database) if database else config.DUMP_OUTPUT_DIR
+        self.queued_seconds = {}
+        self.phase_seconds = {}
+        self.results = {}
+        self.decisions = []
+        self.llm_calls = 0
+        self.llm_prompt_chars = 0
+        self.strategy = None
+        self._schema_converted = asyncio.Event()  # Set once schema() has a result; only a DMS decision waits on it
+        self.graph = None
+        self.critical_path = []
+        self.anomaly_seq = 0
+        self.anomalies = []
+
+    # --- Agent decision points ---
+    async def _ask(self, agent_name, prompt):
+        if self.batch is not None:
+            return await self.batch._ask(agent_name, f"[Database {self.database}] {prompt}")
+        agent = self.agents[agent_name]
+        self.llm_calls += 1
+        self.llm_prompt_chars += len(prompt)
+        reply = await agent.a_generate_reply(messages=[{"role": "user", "content": prompt}])
+        content = reply.get("content", "") if isinstance(reply, dict) else (reply or "")
+        self.decisions.append({"agent": agent_name, "prompt_chars": len(prompt), "reply": content[:500]})
+        return content
+
+    async def _new_anomalies(self):
+        """Anomalies the server's detector flagged since the last check (warnings and errors only)."""
+        if self.batch is not None:
+            return await self.batch._new_anomalies()
+        result = await self.mcp.resources.get_anomalies(since=self.anomaly_seq, min_severity="warning")
+        if not self._ok(result):
+            return []
+        self.anomaly_seq = result["data"]["last_seq"]
+        anomalies = result["data"]["anomalies"]
+        self.anomalies.extend(anomalies)
+        return anomalies
+
+    async def _check_anomalies(self, phase):
+        """Escalates new anomalies to the Anomaly_Detection_Agent; raises PhaseFailed if it answers ABORT."""
+        if self.batch is not None:
+            return await self.batch._check_anomalies(phase, self.database)
+        await self._escalate(phase, await self._new_anomalies())
+
+    async def _escalate(self, phase, anomalies):
+        if not anomalies:
+            return
+        reply = await self._ask("Anomaly_Detection_Agent", (
+            f"The anomaly detector flagged the following during the '{phase}' phase of a MySQL to Cloud SQL migration:\n"
+            f"{_compact(anomalies)}\n\n"
+            "Diagnose them in two or three sentences, then answer on the last line with exactly "
+            "CONTINUE if the migration can safely proceed or ABORT if it cannot."))
+        if reply.strip().splitlines()[-1:] == ["ABORT"]:
+            raise PhaseFailed(phase, {"status": "error", "aborted": True, "anomalies": anomalies, "diagnosis": reply[-1000:]})
+
+    async def _should_retry(self, phase, result, attempt):
+        if attempt > config.ORCHESTRATOR_MAX_RETRIES or result.get("aborted"):
+            return False
+        anomalies = await self._new_anomalies()
+        reply = await self._ask("Anomaly_Detection_Agent", (
+            f"The '{phase}' phase of a MySQL to Cloud SQL migration failed (attempt {attempt}). Tool result:\n"
+            f"{_compact(result)}\n\n"
+            + (f"Anomalies flagged by the detector:\n{_compact(anomalies)}\n\n" if anomalies else "") +
+            "Diagnose the failure in two or three sentences, then answer on the last line with exactly "
+            "RETRY if it looks transient (timeouts, quota, lost connections) or ABORT otherwise."))
+        return reply.strip().splitlines()[-1:] == ["RETRY"]
+
+    # --- MCP helpers ---
+    def _thread_share(self, argument, budget, jobs):
+        """In a batch, a job gets its share of a thread budget `jobs` concurrent jobs split; alone, the server's default."""
+        return {argument: max(1, budget // jobs)} if self.batch is not None else {}
+
+    @staticmethod
+    def _ok(result):
+        return isinstance(result, dict) and result.get("status") in ("success", "accepted") and "error" not in result
+
+    async def _wait_for_job(self, phase, job_id):
+        since = 0
+        while True:
+            events = await self.mcp.resources.get_job_events(job_id=job_id, since=since, wait_seconds=config.ORCHESTRATOR_POLL_SECONDS)
+            for event in events.get("data", []):
+                since = event["seq"]
+                if event["type"] == "status" and event["status"] != "running":
+                    return (await self.mcp.resources.get_job_status(job_id=job_id))["data"]
+            try:
+                await self._check_anomalies(phase)
+            except PhaseFailed:
+                await self.mcp.tools.cancel_job(job_id=job_id)
+                raise
+
+    async def _wait_for_pipeline(self, phase, pipeline_id):
+        while True:
+            status = (await self.mcp.resources.get_pipeline_status(pipeline_id=pipeline_id))["data"]
+            if status["status"] != "running":
+                return status
+            await asyncio.sleep(config.ORCHESTRATOR_POLL_SECONDS)
+            try:
+                await self._check_anomalies(phase)
+            except PhaseFailed:
+                await self.mcp.tools.cancel_pipeline(pipeline_id=pipeline_id)
+                raise
+
+    async def _run_job(self, phase, tool, **arguments):
+        """Starts a background job tool and waits for it; returns the job summary as a tool result."""
+        started = await getattr(self.mcp.tools, tool)(**arguments)
+        if not self._ok(started) or started.get("skipped"):
+            return started
+        job = await self._wait_for_job(phase, started["job_id"])
+        return {"status": "success" if job["status"] == "success" else "error", "data": job, "plan": started.get("plan")}
+
+    # --- Phases ---
+    async def setup(self):
+        result = await self.mcp.tools.provision_infra()
+        if not self._ok(result):
+            raise PhaseFailed("setup", result)
+        if self.encryption == "gcp-recommended":
+            self.results["encryption"] = (await self.mcp.prompts.get_gcp_encryption_recommendation()).get("data")
+        return {"status": result["status"], "skipped": result.get("skipped", False)}
+
+    async def schema(self):
+        result = await self.mcp.tools.convert_schema(**self.scope)
+        if not self._ok(result):
+            raise PhaseFailed("schema", result)
+        conversion = result["data"]
+        review, reviewed = None, []
+        if conversion["needs_review"]:
+            review = await self._ask("Schema_Conversion_Agent", (
+                "The rule engine converted the schema and wrote it to "
+                f"{conversion['script_path']}. Only these objects still need review; they are not in the script:\n"
+                f"{json.dumps(conversion['needs_review'], indent=2)}\n\n"
+                "For each object, give one line on what you changed, then end with a ```json block holding a list of "
+                '{"object_type": ..., "name": ..., "ddl": ...} with the corrected Cloud SQL compatible statement of '
+                'every object, without a trailing delimiter. Use "ddl": null for an object you cannot correct.'))
+            reviewed = _reviewed_statements(review)
+            corrected = {(entry.get("object_type"), entry.get("name")) for entry in reviewed if entry.get("ddl")}
+            unresolved = [{"object_type": entry["object_type"], "name": entry["name"]} for entry in conversion["needs_review"]
+                          if (entry["object_type"], entry["name"]) not in corrected]
+            if unresolved:
+                raise PhaseFailed("schema", {"status": "error", "message": "Objects flagged for review were not corrected.",
+                                             "unresolved": unresolved, "review": review[-2000:]})
+        self.results["schema"] = {"script_path": conversion["script_path"], "summary": conversion["summary"],
+                                  "objects_reviewed": len(conversion["needs_review"]), "review": review, "reviewed": reviewed}
+        self._schema_converted.set()
+        return self.results["schema"]
+
+    async def _dms_allowed(self):
+        """
+        DMS copies the source DDL as it is, so it is only used when the rule engine changed nothing;
+        a converted schema is applied with apply_schema and the dumped data loaded into it. In a
+        batch, config.DMS_JOB_ID is one job for one source, so its databases are dumped and loaded.
+        Waits for the schema conversion, which sizing otherwise runs alongside.
+        """
+        if self.batch is not None:
+            return False
+        await self._schema_converted.wait()
+        schema = self.results["schema"]
+        return not schema["summary"].get("objects_changed") and not schema["objects_reviewed"]
+
+    async def _strategy(self, size_gb):
+        if size_gb < config.GCS_IMPORT_MAX_GB:
+            return "gcs_import"
+        if size_gb <= config.DMS_MAX_GB and await self._dms_allowed():
+            return "dms"
+        return "mydumper"
+
+    async def size(self):
+        size = await self.mcp.resources.get_source_db_size(limit=0, **self.scope)
+        data = (size.get("data") or {}) if self._ok(size) else {}
+        measured = data.get("size_in_gb")
+        size_gb = float(measured) if measured is not None else self.volume
+        # Prefer the strategy with the lowest predicted transfer time; fall back to the size thresholds.
+        recommended = data.get("recommended_strategy")
+        estimates = data.get("strategies") or {}
+        if recommended == "dms" and not await self._dms_allowed():
+            eligible = [name for name, estimate in estimates.items() if estimate["eligible"] and name != "dms"]
+            recommended = min(eligible, key=lambda name: estimates[name]["estimated_seconds"], default=None)
+        self.strategy = recommended or await self._strategy(size_gb)
+        return {"strategy": self.strategy, "size_gb": size_gb, "size_measured": measured is not None,
+                "estimates": data.get("strategies")}
+
+    async def dump(self):
+        # The converted schema is applied separately, so the dump carries data only.
+        if self.strategy == "dms":
+            return {"skipped": True, "reason": "DMS reads the source directly."}
+        if self.strategy == "gcs_import":
+            return {"skipped": True, "reason": "The pipelined load dumps, uploads and imports in one pass."}
+        result = await self._run_job("dump", "run_mydumper", output_dir=self.dump_dir, no_schemas=True, **self.scope,
+                                     **self._thread_share("max_threads", config.SOURCE_MAX_DUMP_THREADS, config.BATCH_MAX_SOURCE_JOBS))
+        if not self._ok(result):
+            raise PhaseFailed("dump", result)
+        return {"plan": result.get("plan"), "result": result.get("data")}
+
+    async def apply_schema(self):
+        if self.strategy == "dms":
+            return {"skipped": True, "reason": "DMS creates the schema on the target; the rule engine changed nothing in it."}
+        # The converted script plus the corrected statements of the objects the rule engine left out.
+        result = await self.mcp.tools.apply_schema(reviewed=self.results["schema"]["reviewed"], **self.scope)
+        if not self._ok(result):
+            raise PhaseFailed("apply_schema", result)
+        return {"status": result["status"], "skipped": result.get("skipped", False)}
+
+    async def load(self):
+        if self.strategy == "dms":
+            if not config.DMS_JOB_ID:
+                raise PhaseFailed("load", {"status": "error", "message": "DMS strategy selected but config.DMS_JOB_ID is not set."})
+            result = await self.mcp.tools.run_dms_job(job_id=config.DMS_JOB_ID)
+        elif self.strategy == "gcs_import":
+            # Dumps, uploads and imports at once, so uploads and imports overlap the dump.
+            started = await self.mcp.tools.run_pipelined_migration(output_dir=self.dump_dir, schema_preloaded=True, **self.scope,
+                                                                   **self._thread_share("max_threads", config.SOURCE_MAX_DUMP_THREADS,
+                                                                                        config.BATCH_MAX_SOURCE_JOBS))
+            if not self._ok(started) or started.get("skipped"):
+                result = started
+            else:
+                pipeline = await self._wait_for_pipeline("load", started["pipeline_id"])
+                result = {"status": pipeline["status"], "data": pipeline}
+        else:
+            result = await self._run_job("load", "run_myloader", input_dir=self.dump_dir, **self.scope,
+                                         **self._thread_share("max_threads", config.TARGET_MAX_LOAD_THREADS, config.BATCH_MAX_LOADS_PER_INSTANCE))
+        if not self._ok(result):
+            raise PhaseFailed("load", result)
+        return {"strategy": self.strategy, "result": result.get("data")}
+
+    async def catchup(self):
+        """
+        Replays source changes made since the dump until the target has caught up. The catch-up keeps
+        running afterwards, so the cutover only has to drain the last few seconds of changes.
+        """
+        if self.strategy == "dms" or not config.BINLOG_CATCHUP_ENABLED:
+            return {"skipped": True, "reason": "DMS replicates changes itself." if self.strategy == "dms" else "Disabled in config."}
+        started = await self.mcp.tools.start_binlog_catchup(dump_dir=self.dump_dir, **self.scope)
+        if started.get("unsupported"):
+            return {"skipped": True, "reason": started["message"]}
+        if not self._ok(started):
+            raise PhaseFailed("catchup", started)
+        if started.get("skipped"):
+            return {"skipped": True, "reason": started.get("message")}
+        catchup_id = started["catchup_id"]
+        while True:
+            status = (await self.mcp.resources.get_catchup_status(catchup_id=catchup_id))["data"]
+            if status["status"] != "running":
+                raise PhaseFailed("catchup", {"status": "error", "data": status})
+            if status["caught_up"]:
+                return {"catchup_id": catchup_id, "lag_seconds": status["lag_seconds"], "row_changes": status["row_changes"],
+                        "position": status["position"],
+                        "cutover": f"Stop writes to the source, then call stop_binlog_catchup(catchup_id='{catchup_id}', drain=true)."}
+            await asyncio.sleep(config.ORCHESTRATOR_POLL_SECONDS)
+            try:
+                await self._check_anomalies("catchup")
+            except PhaseFailed:
+                await self.mcp.tools.stop_binlog_catchup(catchup_id=catchup_id, drain=False)
+                raise
+
+    async def validate(self):
+        """
+        Compares the source and target tables. The catch-up is still following the source, so
+        validate_data holds it at a source binlog position, drained to there, for each comparison.
+        """
+        catchup_id = (self.results.get("catchup") or {}).get("catchup_id")
+        result = await self.mcp.tools.validate_data(**self.scope, **({"catchup_id": catchup_id} if catchup_id else {}),
+                                                    **self._thread_share("workers", config.VALIDATION_WORKERS, config.BATCH_MAX_SOURCE_JOBS))
+        if not self._ok(result):
+            raise PhaseFailed("validate", result)
+        report = result.get("data") or {}
+        summary = {"result": report.get("result", "VALIDATION SUCCESS"), "tables_checked": report.get("tables_checked"),
+                   "tables_failed": report.get("tables_failed", [])}
+        if summary["tables_failed"]:
+            failed = {table: report["tables"][table] for table in summary["tables_failed"]}
+            summary["report"] = await self._ask("Data_Validation_Agent", (
+                "Validation of the migrated data failed for these tables:\n"
+                f"{_compact(failed, limit=8000)}\n\n"
+                "Write the validation report in markdown: state 'VALIDATION FAILURE' and list every table with its specific discrepancy."))
+            raise PhaseFailed("validate", summary)
+        return summary
+
+    async def report(self):
+        self.critical_path = self.graph.critical_path()
+        measured = await self.mcp.resources.get_performance_summary()
+        run_summary = {
+            "volume_gb": self.volume,
+            "encryption": self.encryption,
+            "cloud_sql_tier": config.CLOUD_SQL_TIER,
+            "phase_seconds": self.phase_seconds,
+            "critical_path": self.critical_path,
+            "measured": measured.get("data") if self._ok(measured) else None,
+            "results": self.results,
+        }
+        return await self._ask("Performance_Optimization_Agent", (
+            "The migration completed. Phases ran concurrently where they did not depend on each other; "
+            "the critical path lists the chain of phases that determined the total run time. "
+            "`measured` holds the MCP server's telemetry: per phase bytes and rows moved, throughput, "
+            "subprocess CPU seconds and peak RSS, and the slowest tables. "
+            "Run summary (durations are measured wall-clock seconds):\n"
+            f"{_compact(run_summary, limit=12000)}\n\n"
+            "Produce your final optimization report in markdown, focusing on the phases on the critical path."))
+
+    # --- Phase graph ---
+    def _phase(self, phase):
+        """
+        Wraps a phase method with timing, result recording and agent-triaged retries. In a batch the
+        phase first waits for its scheduler slot; the wait is recorded in queued_seconds.
+        """
+        label = f"{self.database}/{phase}" if self.database else phase
+
+        async def run_phase():
+            queued = time.monotonic()
+            async with self.batch.slot(self.database, phase) if self.batch is not None else contextlib.nullcontext():
+                if self.batch is not None:
+                    self.queued_seconds[phase] = round(time.monotonic() - queued, 1)
+                    self.batch.raise_if_aborted(phase, self.database)
+                attempt = 1
+                while True:
+                    started = time.monotonic()
+                    try:
+                        self.results[phase] = await getattr(self, phase)()
+                        await self._check_anomalies(phase)
+                        self.phase_seconds[phase] = round(self.phase_seconds.get(phase, 0) + time.monotonic() - started, 1)
+                        print(f"[{label}] done in {self.phase_seconds[phase]}s")
+                        return self.results[phase]
+                    except PhaseFailed as failure:
+                        self.phase_seconds[phase] = round(self.phase_seconds.get(phase, 0) + time.monotonic() - started, 1)
+                        print(f"[{label}] failed: {_compact(failure.result, limit=1000)}")
+                        if phase != "validate" and await self._should_retry(phase, failure.result, attempt):
+                            attempt += 1
+                            continue
+                        self.results[phase] = failure.result
+                        raise
+        return run_phase
+
+    def build_graph(self):
+        """
+        Provisioning runs concurrently with schema conversion, sizing and the source dump; only the
+        steps that touch the target wait for it to exist. The dump starts once sizing has picked
+        the strategy; sizing only waits for the conversion when DMS is in question, since the
+        conversion decides whether DMS may copy the source DDL. The load waits for the converted
+        schema to be applied. With gcs_import the load is the whole dump -> upload -> import
+        pipeline, so the dump phase has nothing to do. In a batch, setup waits on the batch's one
+        provisioning and the batch writes the one report.
+        """
+        graph = PhaseGraph()
+        graph.add("setup", self._phase("setup") if self.batch is None else self.batch.wait_for_setup)
+        graph.add("schema", self._phase("schema"))
+        graph.add("size", self._phase("size"))
+        graph.add("dump", self._phase("dump"), deps=("size",))
+        graph.add("apply_schema", self._phase("apply_schema"), deps=("setup", "schema", "size"))
+        graph.add("load", self._phase("load"), deps=("dump", "apply_schema"))
+        graph.add("catchup", self._phase("catchup"), deps=("load",))
+        graph.add("validate", self._phase("validate"), deps=("catchup",))
+        if self.batch is None:
+            graph.add("report", self._phase("report"), deps=("validate",))
+        return graph
+
+    async def run(self):
+        self.graph = self.build_graph()
+        try:
+            await self.graph.run()
+        except PhaseFailed as failure:
+            self.critical_path = self.graph.critical_path()
+            return self.outcome(succeeded=False, failed_phase=failure.phase)
+        self.critical_path = self.graph.critical_path()
+        return self.outcome(succeeded=True)
+
+    def outcome(self, succeeded, failed_phase=None):
+        return {
+            "message": "MIGRATION COMPLETE" if succeeded else f"TASK FAILED in phase '{failed_phase}'",
+            "succeeded": succeeded,
+            "failed_phase": failed_phase,
+            "phase_seconds": self.phase_seconds,
+            "critical_path": self.critical_path,
+            "wall_seconds": self.graph.wall_seconds,
+            "results": self.results,
+            "llm_calls": self.llm_calls,
+            "llm_prompt_chars": self.llm_prompt_chars,
+            "decisions": self.decisions,
+            "anomalies": self.anomalies,
+        }
+
+
+class BatchOrchestrator(MigrationOrchestrator):
+    """
+    Migrates the databases of a batch run (see the start_batch_run tool) with one
+    MigrationOrchestrator per database, each onto the Cloud SQL instance the server assigned it.
+
+    Provisioning runs once and every database's graph waits on it; the graphs then run
+    concurrently, bounded by a scheduler: at most config.BATCH_MAX_SOURCE_JOBS dumps and
+    validations read the legacy host at a time, and at most config.BATCH_MAX_LOADS_PER_INSTANCE
+    loads write to each instance, each job with that share of the thread budget. A database that
+    fails fails alone. At most config.BATCH_MAX_ACTIVE_DATABASES databases migrate at a time,
+    as each holds a source connection pool and a binlog stream until finish_run releases them.
+    Anomalies are escalated per database, so an ABORT stops only the database they came from;
+    one for the batch's own phases (provisioning) stops every database. The
+    Performance_Optimization_Agent writes one report for the batch.
+    """
+
+    def __init__(self, mcp_client: McpWsClient, agents: dict, encryption: str, run_state: dict):
+        members = run_state["databases"]
+        super().__init__(mcp_client, agents, round(sum(member.get("size_gb") or 0 for member in members.values()), 2),
+                         encryption, run_state)
+        self.migrations = {database: MigrationOrchestrator(mcp_client, agents, member.get("size_gb") or 0, encryption, member,
+                                                           database=database, batch=self)
+                           for database, member in members.items()}
+        self.source_slots = asyncio.Semaphore(config.BATCH_MAX_SOURCE_JOBS)
+        self.load_slots = {instance: asyncio.Semaphore(config.BATCH_MAX_LOADS_PER_INSTANCE)
+                           for instance in {member["instance"] for member in members.values()}}
+        self.database_slots = asyncio.Semaphore(config.BATCH_MAX_ACTIVE_DATABASES)
+        self.outcomes = {}
+        self.aborted = None  # An ABORT of the batch's own phases
+        self.aborted_databases = {}  # database -> the ABORT that stopped it
+        self.setup_task = None
+        self.wall_seconds = 0.0
+        self._escalation_lock = asyncio.Lock()
+        self._anomaly_lock = asyncio.Lock()
+
+    # --- Scheduler ---
+    def slot(self, database, phase):
+        """What a database's phase holds while it runs: a source slot, its instance's load slot, or nothing."""
+        if phase in ("dump", "validate"):
+            return self.source_slots
+        if phase == "load":
+            load_slot = self.load_slots[self.run_state["databases"][database]["instance"]]
+            if self.migrations[database].strategy == "gcs_import":
+                return _holding(self.source_slots, load_slot)  # The pipelined load dumps the source too.
+            return load_slot
+        return contextlib.nullcontext()
+
+    async def wait_for_setup(self):
+        # Shielded: one database's graph failing must not cancel the provisioning the others wait on.
+        return await asyncio.shield(self.setup_task)
+
+    # --- Shared anomaly escalation ---
+    async def _new_anomalies(self):
+        async with self._anomaly_lock:
+            return await super()._new_anomalies()
+
+    async def _check_anomalies(self, phase, database=None):
+        """
+        Escalates new anomalies once per database they belong to: the database of the job or command
+        that raised them, else the one whose phase is checking. An ABORT stops that database only.
+        """
+        async with self._escalation_lock:
+            by_database = {}
+            for anomaly in await self._new_anomalies():
+                by_database.setdefault(anomaly.get("database") or database, []).append(anomaly)
+            for owner, anomalies in by_database.items():
+                if self.aborted is not None or owner in self.aborted_databases:
+                    continue
+                label = phase if owner is None else f"{phase} of database {owner}" if owner == database else f"migration of database {owner}"
+                try:
+                    await self._escalate(label, anomalies)
+                except PhaseFailed as failure:
+                    if owner is None:
+                        self.aborted = failure.result
+                    else:
+                        self.aborted_databases[owner] = failure.result
+        self.raise_if_aborted(phase, database)
+
+    def raise_if_aborted(self, phase, database=None):
+        aborted = self.aborted if self.aborted is not None else self.aborted_databases.get(database)
+        if aborted is not None:
+            raise PhaseFailed(phase, aborted)
+
+    # --- Run ---
+    async def _migrate(self, database):
+        member = self.run_state["databases"][database]
+        if member["status"] == "done":
+            self.outcomes[database] = {"message": "MIGRATION COMPLETE", "succeeded": True, "skipped": True}
+            return
+        migration = self.migrations[database]
+        queued = time.monotonic()
+        async with self.database_slots:
+            migration.queued_seconds["start"] = round(time.monotonic() - queued, 1)
+            try:
+                self.outcomes[database] = await migration.run()
+            finally:
+                # Releases the database's catch-up stream and connections before the next database starts.
+                succeeded = (self.outcomes.get(database) or {}).get("succeeded", False)
+                await self.mcp.tools.finish_run(status="done" if succeeded else "failed", database=database)
+        print(f"[{database}] {self.outcomes[database]['message']}")
+
+    def _database_summary(self, database):
+        outcome = self.outcomes.get(database) or {}
+        migration = self.migrations[database]
+        return {
+            "instance": self.run_state["databases"][database]["instance"],
+            "size_gb": migration.volume,
+            "succeeded": outcome.get("succeeded"),
+            "failed_phase": outcome.get("failed_phase"),
+            "skipped": outcome.get("skipped", False),
+            "strategy": migration.strategy,
+            "phase_seconds": migration.phase_seconds,
+            "queued_seconds": migration.queued_seconds,
+            "critical_path": migration.critical_path,
+            "wall_seconds": migration.graph.wall_seconds if migration.graph else 0.0,
+        }
+
+    async def report(self):
+        measured = await self.mcp.resources.get_performance_summary()
+        run_summary = {
+            "volume_gb": self.volume,
+            "encryption": self.encryption,
+            "cloud_sql_tier": config.CLOUD_SQL_TIER,
+            "max_source_jobs": config.BATCH_MAX_SOURCE_JOBS,
+            "max_loads_per_instance": config.BATCH_MAX_LOADS_PER_INSTANCE,
+            "setup_seconds": self.phase_seconds.get("setup"),
+            "databases": {database: self._database_summary(database) for database in self.migrations},
+            "measured": measured.get("data") if self._ok(measured) else None,
+        }
+        return await self._ask("Performance_Optimization_Agent", (
+            "The batch migration completed. Each database ran as its own graph of phases, concurrently with the "
+            "others: dumps and validations shared the legacy host and loads onto the same Cloud SQL instance took "
+            "turns, so `queued_seconds` is how long a phase waited for its turn, and each database's critical path "
+            "lists the chain of phases that determined its run time. `measured` holds the MCP server's telemetry "
+            "for the whole batch: per phase bytes and rows moved, throughput, subprocess CPU seconds and peak RSS, "
+            "and the slowest tables. Run summary (durations are measured wall-clock seconds):\n"
+            f"{_compact(run_summary, limit=12000)}\n\n"
+            "Produce your final optimization report in markdown, focusing on the databases that finished last and "
+            "on whether the source or the instances were the bottleneck."))
+
+    async def run(self):
+        origin = time.monotonic()
+        self.setup_task = asyncio.ensure_future(self._phase("setup")())
+        try:
+            await asyncio.gather(*(self._migrate(database) for database in self.migrations))
+            # Retrieves a setup failure no database waited for (all of them were already done).
+            await asyncio.gather(self.setup_task, return_exceptions=True)
+            if any(outcome["succeeded"] and not outcome.get("skipped") for outcome in self.outcomes.values()):
+                try:
+                    await self._phase("report")()
+                except PhaseFailed:
+                    pass
+        finally:
+            self.wall_seconds = round(time.monotonic() - origin, 1)
+        return self.outcome()
+
+    def outcome(self):
+        failed = [database for database, outcome in self.outcomes.items() if not outcome["succeeded"]]
+        return {
+            "message": "MIGRATION COMPLETE" if not failed else f"TASK FAILED for databases: {', '.join(failed)}",
+            "succeeded": not failed,
+            "failed_databases": failed,
+            "aborted": self.aborted is not None,
+            "aborted_databases": sorted(self.aborted_databases),
+            "databases": {database: self._database_summary(database) for database in self.migrations},
+            "phase_seconds": self.phase_seconds,
+            "wall_seconds": self.wall_seconds,
+            "results": self.results,
+            "llm_calls": self.llm_calls,
+            "llm_prompt_chars": self.llm_prompt_chars,
+            "decisions": self.decisions,
+            "anomalies": self.anomalies,
+        }
+
+
+class PhaseGraph:
+    """
+    Dependency-graph scheduler for migration phases.
+    Each phase starts as soon as all of its dependencies have finished, so independent
+    phases overlap. The first failure cancels everything still pending or running.
+    """
+
+    def __init__(self):
+        self.nodes = {}  # name -> (coroutine function, dependency names)
+        self.timings = {}  # name -> (start, end), seconds since the graph started
+        self.wall_seconds = 0.0
+
+    def add(self, name, func, deps=()):
+        unknown = [dep for dep in deps if dep not in self.nodes]
+        if unknown:
+            # Dependencies must be added first, which also rules out cycles.
+            raise ValueError(f"Phase '{name}' depends on unknown phases: {', '.join(unknown)}")
+        self.nodes[name] = (func, tuple(deps))
+
+    async def run(self):
+        origin = time.monotonic()
+        tasks = {}
+
+        async def run_node(name):
+            func, deps = self.nodes[name]
+            await asyncio.gather(*(tasks[dep] for dep in deps))
+            started = time.monotonic() - origin
+            try:
+                return await func()
+            finally:
+                self.timings[name] = (started, time.monotonic() - origin)
+
+        for name in self.nodes:
+            tasks[name] = asyncio.ensure_future(run_node(name))
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            self.wall_seconds = round(time.monotonic() - origin, 1)
+        return dict(zip(tasks, results))
+
+    def critical_path(self):
+        """The chain of phases, ending at the last one to finish, in which each waited on the previous."""
+        name = max(self.timings, key=lambda node: self.timings[node][1], default=None)
+        path = []
+        while name is not None:
+            path.append(name)
+            deps = [dep for dep in self.nodes[name][1] if dep in self.timings]
+            name = max(deps, key=lambda dep: self.timings[dep][1], default=None)
+        return [{"phase": name, "start": round(self.timings[name][0], 1), "end": round(self.timings[name][1], 1),
+                 "seconds": round(self.timings[name][1] - self.timings[name][0], 1)} for name in reversed(path)]
@@ -155,4 +155,29 @@ resource "google_sql_database_instance" "mysql_instance" {
   root_password = data.google_secret_manager_secret_version.cloud_sql_password.secret_data
   
   deletion_protection = false # Set to true for production
-}
\ No newline at end of file
+}
+
+# --- Additional Cloud SQL Instances (batch migrations spread databases over these) ---
+resource "google_sql_database_instance" "additional_mysql_instances" {
+  for_each         = toset(var.cloud_sql_additional_instance_names)
+  name             = each.value
+  database_version = var.cloud_sql_db_version
+  region           = var.gcp_region
+
+  settings {
+    tier = var.cloud_sql_tier
+    ip_configuration {
+      ipv4_enabled    = true
+      private_network = google_compute_network.migration_vpc.id
+    }
+    backup_configuration {
+      enabled            = true
+      binary_log_enabled = true
+      start_time         = var.cloud_sql_backup_start_time
+    }
+  }
+
+  root_password = data.google_secret_manager_secret_version.cloud_sql_password.secret_data
+
+  deletion_protection = false # Set to true for production
+}
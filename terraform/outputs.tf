@@ -8,6 +8,10 @@ output "cloud_sql_instance_ip" {
   value = google_sql_database_instance.mysql_instance.private_ip_address
 }
 
+output "cloud_sql_additional_instance_ips" {
+  value = { for name, instance in google_sql_database_instance.additional_mysql_instances : name => instance.private_ip_address }
+}
+
 output "migration_bucket_name" {
   value = google_storage_bucket.migration_bucket.name
 }
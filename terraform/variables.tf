@@ -20,6 +20,12 @@ variable "cloud_sql_instance_name" {
   type        = string
 }
 
+variable "cloud_sql_additional_instance_names" {
+  description = "Further Cloud SQL instances, with the same version and tier, for batch migrations."
+  type        = list(string)
+  default     = []
+}
+
 variable "cloud_sql_db_version" {
   description = "MySQL version for Cloud SQL."
   type        = string
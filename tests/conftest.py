@@ -0,0 +1,122 @@
+# gcp-agentic-migration/tests/conftest.py
+"""
+The MCP server uses package-relative imports (`from.. import config`), so, as in
+benchmarks/run.py, the checkout is registered as the package `migration` and the tests
+import through it (`from migration.mcp_server import handlers`).
+"""
+import os
+import sys
+import time
+import types
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "migration"
+
+# config.py reads the backend at import time; tests never reach Secret Manager.
+os.environ.setdefault("MIGRATION_SECRETS_BACKEND", "local")
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [REPO_ROOT]
+    sys.modules[PACKAGE] = package
+
+
+@pytest.fixture
+def handlers(tmp_path, monkeypatch):
+    """
+    MigrationToolHandlers for the source database `shop`, with its run state, baselines,
+    telemetry and converted schemas under tmp_path and a resolved Cloud SQL endpoint, so
+    no tool reaches gcloud. Shell commands are recorded in `handlers.commands` instead of run.
+    """
+    monkeypatch.chdir(tmp_path)
+    from migration import config
+    from migration.mcp_server.handlers import MigrationToolHandlers
+    instance = MigrationToolHandlers()
+    instance.legacy_db_host, instance.legacy_db_user, instance.legacy_db_password, instance.legacy_db_name = "source", "user", "pw", "shop"
+    instance._target_endpoints[config.CLOUD_SQL_INSTANCE_NAME] = ("10.0.0.1", "root-pw", time.monotonic() + 3600)
+    instance.commands = []
+
+    async def run_command(command, cwd=None, timeout=None):
+        instance.commands.append(command)
+        return {"status": "success", "stdout": "", "stderr": "", "returncode": 0}
+
+    instance._run_command = run_command
+    yield instance
+    instance.source_pool.close()
+    instance.run_state.close()
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self._row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, args=None):
+        self.pool.statements.append(sql)
+        self.pool.calls.append((sql, args))
+        self._row = self.pool.respond(sql, args)
+        if isinstance(self._row, int):  # affected rows of a write
+            affected, self._row = self._row, None
+            return affected
+        return 0
+
+    def executemany(self, sql, args):
+        return sum(self.execute(sql, row) for row in args)
+
+    def fetchone(self):
+        return self._row
+
+    def fetchall(self):
+        return self._row or []
+
+
+class FakePool:
+    """
+    Stands in for db_pool.ConnectionPool: records statements (and their arguments in `calls`) and
+    answers them with `respond(sql, args)`, rows for a query or the affected row count for a write.
+    """
+
+    def __init__(self, respond=lambda sql, args: None):
+        self.respond = respond
+        self.statements = []
+        self.calls = []
+
+    def connection(self):
+        pool = self
+
+        class Connection:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def cursor(self):
+                return FakeCursor(pool)
+
+        return Connection()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_bin(tmp_path, monkeypatch):
+    """Puts executables written with fake_bin(name, script) first on PATH, so background jobs run them."""
+    directory = tmp_path / "bin"
+    directory.mkdir()
+    monkeypatch.setenv("PATH", f"{directory}{os.pathsep}{os.environ['PATH']}")
+
+    def install(name, script):
+        path = directory / name
+        path.write_text("#!/bin/sh\n" + script + "\n")
+        path.chmod(0o755)
+        return path
+
+    return install
@@ -0,0 +1,48 @@
+# gcp-agentic-migration/tests/test_anomaly.py
+import types
+from migration import config
+from migration.mcp_server.anomaly import AnomalyDetector
+
+
+def _job():
+    return types.SimpleNamespace(name="myloader", id="j1", database="shop")
+
+
+def test_ongoing_job_conditions_are_flagged_once_until_they_clear(monkeypatch):
+    monkeypatch.setattr(config, "ANOMALY_STALL_SECONDS", 0)
+    detector, job = AnomalyDetector(baseline_path=None), _job()
+    slow = {"elapsed_seconds": config.ANOMALY_WARMUP_SECONDS, "bytes_per_second": 10}
+    fast = dict(slow, bytes_per_second=config.ANOMALY_MIN_THROUGHPUT_BPS)
+    for bytes_done, sample in ((1, slow), (1, slow), (1, slow), (2, fast), (2, slow)):
+        detector.job_progress(job, dict(sample, bytes_done=bytes_done))
+
+    flagged = [(anomaly["rule"], anomaly["count"]) for anomaly in detector.since()]
+    # Stalled twice at 1 byte, then progress and throughput recover; at 2 bytes both come back as new anomalies.
+    assert flagged == [("low_throughput", 3), ("stalled", 2), ("stalled", 1), ("low_throughput", 1)]
+    assert all(anomaly["database"] == "shop" for anomaly in detector.since())
+
+
+def test_baselines_survive_a_damaged_file(tmp_path, capsys):
+    path = tmp_path / "baselines.json"
+    path.write_text('{"myloader.duration": {"count": 3, "mean"')  # cut off mid-write
+    detector = AnomalyDetector(baseline_path=str(path))
+    assert detector.baselines == {} and "Ignoring unreadable anomaly baselines" in capsys.readouterr().out
+
+    detector._learn("myloader.duration", 12.0)
+    detector.save_baselines()
+    detector.writer.wait()
+    assert AnomalyDetector(baseline_path=str(path)).baselines["myloader.duration"].mean == 12.0
+    assert [entry.name for entry in tmp_path.iterdir()] == ["baselines.json"]
+
+
+def test_commands_leave_no_open_anomalies_and_save_baselines_at_most_every_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ANOMALY_BASELINE_SAVE_SECONDS", 3600)
+    path = tmp_path / "baselines.json"
+    detector = AnomalyDetector(baseline_path=str(path))
+    for _ in range(3):
+        detector.observe_command("run_gcs_import", {"status": "error", "returncode": 1, "stderr": "ERROR: denied", "duration_seconds": 1})
+        detector.observe_command("run_gcs_import", {"status": "success", "returncode": 0, "duration_seconds": 2})
+    detector.writer.wait()
+    assert detector._open == {} and len(detector.since()) == 6
+    assert AnomalyDetector(baseline_path=str(path)).baselines["run_gcs_import.duration"].count == 1
+    assert detector.baselines["run_gcs_import.duration"].count == 3
@@ -0,0 +1,160 @@
+# gcp-agentic-migration/tests/test_batch.py
+import asyncio
+import pytest
+from migration.mcp_server.batch import assign_instances
+from migration.utils.run_state import PENDING, RUNNING
+
+
+@pytest.fixture
+def batch_handlers(handlers, monkeypatch):
+    """`handlers` with the legacy host holding databases a (3 GB), b (2 GB) and c (1 GB), and instances x and y."""
+    from migration import config
+    monkeypatch.setattr(config, "CLOUD_SQL_ADDITIONAL_INSTANCES", ["x", "y"])
+    sizes = {"a": 3 * 1024 ** 3, "b": 2 * 1024 ** 3, "c": 1024 ** 3}
+    handlers._existing_databases = lambda databases: set(databases) & set(sizes)
+    handlers._source_sizing = lambda scope, refresh=False: {"database_name": scope.database, "data_bytes": sizes[scope.database],
+                                                            "index_bytes": 0}
+    return handlers
+
+
+def test_assign_instances_balances_bytes_largest_first():
+    assert assign_instances({"a": 30, "b": 20, "c": 15, "d": 10}, ["x", "y"]) == {"a": "x", "b": "y", "c": "y", "d": "x"}
+
+
+def test_run_state_lists_every_database_of_a_batch(batch_handlers):
+    started = asyncio.run(batch_handlers.start_batch_run(databases=["a", "b", "c"], instances=["x", "y"]))
+    databases = started["data"]["databases"]
+    assert {database: (state["status"], state["instance"]) for database, state in databases.items()} == {
+        "a": (RUNNING, "x"), "b": (RUNNING, "y"), "c": (RUNNING, "y")}
+
+    # A batch whose child runs were never created lists its databases as pending.
+    run_id = batch_handlers.run_state.create_run({"batch": {"databases": ["a"], "instances": ["x"]}})
+    assert batch_handlers._run_summary(run_id)["databases"]["a"]["status"] == PENDING
+
+
+def test_instances_outside_provision_infra_are_rejected(batch_handlers):
+    result = asyncio.run(batch_handlers.start_batch_run(databases=["a"], instances=["unmanaged"]))
+    assert result["status"] == "error" and "unmanaged" in result["message"]
+
+
+def test_finishing_a_database_releases_its_catchup_and_connections(batch_handlers):
+    from migration import config
+
+    class Catchup:
+        id, database, status, drained = "c1", "a", "running", None
+
+        async def stop(self, drain=True):
+            self.drained, self.status = drain, "success"
+            return {"status": self.status}
+
+    async def scenario():
+        await batch_handlers.start_batch_run(databases=["a", "b"], instances=[config.CLOUD_SQL_INSTANCE_NAME])
+        pools = {database: scope.source_pool for database, scope in batch_handlers.scopes.items()}
+        batch_handlers.catchups["c1"] = catchup = Catchup()
+        finished = await batch_handlers.finish_run(database="a")
+        return pools, catchup, finished
+
+    pools, catchup, finished = asyncio.run(scenario())
+    assert catchup.drained is True and finished["data"]["catchups"] == {"c1": {"status": "success"}}
+    assert pools["a"]._closed and batch_handlers.scopes["a"].source_pool is not pools["a"]
+    assert not pools["b"]._closed
+
+
+def test_validation_scripts_run_against_their_own_database_and_instance(batch_handlers, monkeypatch):
+    import time
+    from migration.mcp_server import handlers as module
+
+    class Pool:
+        def __init__(self):
+            self.settings, self.closed = None, False
+
+        async def ensure(self, settings):
+            self.settings = settings
+
+        async def run(self, script, language, timeout, cpu_seconds=None, memory_mb=None):
+            return {"status": "success", "result": self.settings["target"]["host"]}
+
+        async def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(module, "ScriptWorkerPool", Pool)
+    for instance, ip in (("x", "10.0.0.2"), ("y", "10.0.0.3")):
+        batch_handlers._target_endpoints[instance] = (ip, "pw", time.monotonic() + 3600)
+
+    async def scenario():
+        await batch_handlers.start_batch_run(databases=["a", "b"], instances=["x", "y"])
+        for database in ("a", "b"):
+            await batch_handlers.run_validation_scripts([{"script_content": "result = 1"}], database=database)
+        pools = dict(batch_handlers.script_pools)
+        await batch_handlers.finish_run(database="a")
+        return pools, await batch_handlers.run_validation_script("result = 1", "python", database="z")
+
+    pools, unknown = asyncio.run(scenario())
+    assert {key: pool.settings["source"]["database"] for key, pool in pools.items()} == {("x", "a"): "a", ("y", "b"): "b"}
+    assert [pool.settings["target"]["host"] for pool in pools.values()] == ["10.0.0.2", "10.0.0.3"]
+    assert pools[("x", "a")].closed and not pools[("y", "b")].closed and list(batch_handlers.script_pools) == [("y", "b")]
+    assert unknown["status"] == "error"
+
+
+def test_an_abort_stops_only_the_database_it_came_from(monkeypatch):
+    pytest.importorskip("modelcontextprotocol")
+    from conftest import REPO_ROOT
+    monkeypatch.syspath_prepend(REPO_ROOT)
+    from orchestrator import BatchOrchestrator, PhaseFailed
+
+    class Resources:
+        async def get_anomalies(self, since=0, min_severity=None):
+            anomalies = [{"seq": 1, "rule": "stalled", "database": "a"}] if since == 0 else []
+            return {"status": "success", "data": {"last_seq": 1, "anomalies": anomalies}}
+
+    class Agent:
+        async def a_generate_reply(self, messages):
+            return "The load into `a` is stuck.\nABORT"
+
+    mcp = type("Mcp", (), {"resources": Resources()})()
+    members = {database: {"instance": "x", "size_gb": 1, "status": "running"} for database in ("a", "b")}
+    batch = BatchOrchestrator(mcp, {"Anomaly_Detection_Agent": Agent()}, "google", {"databases": members})
+
+    async def scenario():
+        await batch._check_anomalies("load", "b")  # `b` checks first, but the anomaly is `a`'s
+        with pytest.raises(PhaseFailed):
+            batch.raise_if_aborted("validate", "a")
+        batch.raise_if_aborted("validate", "b")
+
+    asyncio.run(scenario())
+    assert list(batch.aborted_databases) == ["a"] and batch.aborted is None
+
+
+def test_gcs_import_sizes_without_the_schema_and_pipelines_the_whole_load(monkeypatch):
+    pytest.importorskip("modelcontextprotocol")
+    from conftest import REPO_ROOT
+    monkeypatch.syspath_prepend(REPO_ROOT)
+    from orchestrator import MigrationOrchestrator
+
+    calls = []
+
+    class Resources:
+        async def get_source_db_size(self, limit=None):
+            return {"status": "success", "data": {"size_in_gb": 1}}
+
+        async def get_pipeline_status(self, pipeline_id):
+            return {"data": {"status": "success"}}
+
+    class Tools:
+        async def run_pipelined_migration(self, **arguments):
+            calls.append(arguments)
+            return {"status": "accepted", "pipeline_id": "p1"}
+
+    mcp = type("Mcp", (), {"resources": Resources(), "tools": Tools()})()
+    migration = MigrationOrchestrator(mcp, {}, 1, "google")
+    migration._check_anomalies = lambda phase: asyncio.sleep(0)
+
+    async def scenario():
+        # Schema conversion has not finished; only a DMS decision would wait for it.
+        size = await asyncio.wait_for(migration.size(), 1)
+        return size, await migration.dump(), await migration.load()
+
+    size, dump, load = asyncio.run(scenario())
+    assert size["strategy"] == "gcs_import" and dump["skipped"] is True
+    assert load["result"] == {"status": "success"}
+    assert len(calls) == 1 and "use_existing_dump" not in calls[0]
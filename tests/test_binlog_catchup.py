@@ -0,0 +1,125 @@
+# gcp-agentic-migration/tests/test_binlog_catchup.py
+import asyncio
+import pytest
+from conftest import FakePool
+from migration.mcp_server.binlog_catchup import BinlogCatchup
+
+COLUMNS = {
+    "customers": [("id", "PRI", ""), ("name", "", "")],
+    "orders": [("id", "PRI", ""), ("customer_id", "MUL", ""), ("total", "", ""),
+               ("total_cents", "", "STORED GENERATED")],
+    "order_items": [("id", "PRI", ""), ("order_id", "MUL", ""), ("sku", "", "")],
+    "audit": [("id", "PRI", ""), ("message", "", "")],
+    "events": [("at", "", ""), ("message", "", "")],
+}
+# order_items.order_id -> orders.id ON DELETE CASCADE ON UPDATE CASCADE,
+# orders.customer_id -> customers.id ON DELETE SET NULL ON UPDATE CASCADE.
+FOREIGN_KEYS = [
+    {"CONSTRAINT_NAME": "fk_customer", "TABLE_NAME": "orders", "COLUMN_NAME": "customer_id", "REFERENCED_TABLE_NAME": "customers",
+     "REFERENCED_COLUMN_NAME": "id", "UPDATE_RULE": "CASCADE", "DELETE_RULE": "SET NULL"},
+    {"CONSTRAINT_NAME": "fk_order", "TABLE_NAME": "order_items", "COLUMN_NAME": "order_id", "REFERENCED_TABLE_NAME": "orders",
+     "REFERENCED_COLUMN_NAME": "id", "UPDATE_RULE": "CASCADE", "DELETE_RULE": "CASCADE"},
+]
+
+
+def _source(sql, args):
+    if "information_schema.COLUMNS" in sql:
+        return [{"COLUMN_NAME": name, "COLUMN_KEY": key, "EXTRA": extra} for name, key, extra in COLUMNS[args[1]]]
+    if "REFERENTIAL_CONSTRAINTS" in sql:
+        return FOREIGN_KEYS
+    if "information_schema.TABLES" in sql:
+        return [{"TABLE_NAME": "events"}, {"TABLE_NAME": "logs"}]
+    return None
+
+
+@pytest.fixture
+def catchup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return BinlogCatchup({}, FakePool(_source), FakePool(), "shop", {"log_file": "binlog.000001", "log_pos": 4})
+
+
+def _writes(pool):
+    return [(sql, args) for sql, args in pool.calls if not sql.startswith(("SET SESSION", "START", "COMMIT"))]
+
+
+def test_generated_columns_are_left_to_the_target(catchup):
+    catchup._apply_group([("orders", ("upsert", [1, 7, 9.5, 950]))])
+    (sql, args), = _writes(catchup.target_pool)
+    assert "total_cents" not in sql
+    assert sql.startswith("INSERT INTO `orders` (`id`, `customer_id`, `total`) VALUES (%s, %s, %s)")
+    assert args == [1, 7, 9.5]
+
+
+def test_tables_linked_by_foreign_keys_are_applied_together(catchup):
+    assert catchup._group("order_items") == catchup._group("customers") == ("customers", "order_items", "orders")
+    assert catchup._group("audit") == ("audit",)
+
+
+def test_deletes_replay_the_cascades_the_binlog_does_not_carry(catchup):
+    def target(sql, args):
+        if sql.startswith("SELECT"):
+            return [{"id": 1, "customer_id": 7, "total": 9.5, "total_cents": 950}]
+        return 1
+
+    catchup.target_pool.respond = target
+    catchup._apply_group([("customers", ("delete", [7, "Ann"]))])
+    assert _writes(catchup.target_pool)[-2:] == [
+        ("UPDATE `orders` SET `customer_id` = %s WHERE `customer_id` = %s", [None, 7]),
+        ("DELETE FROM `customers` WHERE `id` = %s", [7]),
+    ]
+
+    catchup.target_pool.calls.clear()
+    catchup._apply_group([("orders", ("delete", [1, 7, 9.5, 950]))])
+    assert _writes(catchup.target_pool) == [
+        ("DELETE FROM `order_items` WHERE `order_id` = %s", [1]),
+        ("DELETE FROM `orders` WHERE `id` = %s", [1]),
+    ]
+
+
+def test_key_changes_move_the_row_and_its_children_and_replays_upsert(catchup):
+    catchup.target_pool.respond = lambda sql, args: 1
+    catchup._apply_group([("orders", ("update", [1, 7, 9.5, 950], [2, 7, 9.5, 950]))])
+    assert _writes(catchup.target_pool) == [
+        ("UPDATE `order_items` SET `order_id` = %s WHERE `order_id` = %s", [2, 1]),
+        ("UPDATE `orders` SET `id` = %s, `customer_id` = %s, `total` = %s WHERE `id` = %s", [2, 7, 9.5, 1]),
+    ]
+
+    # Replayed after the move: the old key is gone, so the row is upserted under the new one.
+    catchup.target_pool.respond = lambda sql, args: 0
+    catchup.target_pool.calls.clear()
+    catchup._apply_group([("orders", ("update", [1, 7, 9.5, 950], [2, 7, 9.5, 950]))])
+    assert [sql.split(" ")[0] for sql, _ in _writes(catchup.target_pool)] == ["UPDATE", "UPDATE", "INSERT"]
+
+
+def test_tables_without_a_primary_key_are_refused(catchup):
+    assert catchup.unkeyed_tables() == ["events", "logs"]
+    catchup.tables = {"events", "orders"}
+    assert catchup.unkeyed_tables() == ["events"]
+    with pytest.raises(RuntimeError, match="no primary key"):
+        catchup._layout("events")
+
+
+def test_hold_stops_applying_at_the_source_position_until_resumed(catchup, monkeypatch):
+    from migration import config
+    monkeypatch.setattr(config, "BINLOG_CATCHUP_POLL_SECONDS", 0.01)
+
+    def read_batch():
+        # One transaction per read; the source has logged up to position 500.
+        log_pos = catchup.position["log_pos"]
+        if log_pos >= 500:
+            return {}, 0, dict(catchup.position), None, True
+        return {}, 1, {"log_file": "binlog.000001", "log_pos": log_pos + 100}, 1.0, False
+
+    catchup._read_batch = read_batch
+
+    async def scenario():
+        catchup.position = {"log_file": "binlog.000001", "log_pos": 0}
+        catchup.start()
+        held = await catchup.hold({"log_file": "binlog.000001", "log_pos": 300})
+        await asyncio.sleep(0.05)
+        assert held["held"] and catchup.position["log_pos"] == 300
+        catchup.resume()
+        return await catchup.stop(drain=True)
+
+    summary = asyncio.run(scenario())
+    assert summary["status"] == "success" and summary["position"]["log_pos"] == 500
@@ -0,0 +1,97 @@
+# gcp-agentic-migration/tests/test_ddl_rules.py
+import asyncio
+import json
+import os
+from migration import config
+from migration.mcp_server.ddl_rules import DdlConverter, merge_reviewed, render_script
+
+SCHEMA = {
+    "tables": {
+        "orders": "CREATE TABLE `orders` (`id` int NOT NULL, PRIMARY KEY (`id`)) ENGINE=MyISAM DEFAULT CHARSET=latin1",
+        "sessions": "CREATE TABLE `sessions` (`id` int NOT NULL, PRIMARY KEY (`id`)) ENGINE=MEMORY",
+    },
+    "views": {}, "routines": {}, "triggers": {},
+}
+
+
+def test_objects_needing_review_are_left_out_of_the_script():
+    conversion = DdlConverter().convert(SCHEMA)
+    assert [entry["name"] for entry in conversion["needs_review"]] == ["sessions"]
+    assert "`sessions`" not in conversion["script"]
+    assert "ENGINE=InnoDB" in conversion["script"]
+
+
+def test_merge_reviewed_adds_corrected_statements():
+    conversion = DdlConverter().convert(SCHEMA)
+    corrected = "CREATE TABLE `sessions` (`id` int NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB;"
+    statements, unresolved = merge_reviewed(conversion["statements"], conversion["needs_review"],
+                                            [{"object_type": "table", "name": "sessions", "ddl": corrected}])
+    assert unresolved == []
+    script = render_script(statements)
+    assert "ENGINE=InnoDB;\n" in script and "InnoDB;;" not in script
+    assert script.index("`orders`") < script.index("`sessions`")
+
+
+def test_merge_reviewed_reports_unresolved_objects():
+    conversion = DdlConverter().convert(SCHEMA)
+    _, unresolved = merge_reviewed(conversion["statements"], conversion["needs_review"],
+                                   [{"object_type": "table", "name": "sessions", "ddl": None}])
+    assert unresolved == [{"object_type": "table", "name": "sessions"}]
+
+
+def _write_conversion():
+    conversion = DdlConverter().convert(SCHEMA)
+    os.makedirs(config.CONVERTED_SCHEMA_DIR, exist_ok=True)
+    with open(os.path.join(config.CONVERTED_SCHEMA_DIR, "shop.sql"), "w") as f:
+        f.write(conversion["script"])
+    with open(os.path.join(config.CONVERTED_SCHEMA_DIR, "shop.report.json"), "w") as f:
+        json.dump({key: conversion[key] for key in ("report", "needs_review", "summary", "statements")}, f)
+
+
+def test_apply_schema_refuses_while_objects_are_unresolved(handlers):
+    _write_conversion()
+    result = asyncio.run(handlers.apply_schema())
+    assert result["status"] == "error"
+    assert result["unresolved"] == [{"object_type": "table", "name": "sessions"}]
+    assert handlers.commands == []
+
+
+def test_apply_schema_applies_the_reviewed_script(handlers):
+    _write_conversion()
+    reviewed = [{"object_type": "table", "name": "sessions", "ddl": "CREATE TABLE `sessions` (`id` int) ENGINE=InnoDB"}]
+    result = asyncio.run(handlers.apply_schema(reviewed=reviewed))
+    assert result["status"] == "success"
+    reviewed_path = os.path.abspath(os.path.join(config.CONVERTED_SCHEMA_DIR, "shop.reviewed.sql"))
+    assert handlers.commands[-1].endswith(f"shop < {reviewed_path}")
+    with open(reviewed_path) as f:
+        assert "CREATE TABLE `sessions` (`id` int) ENGINE=InnoDB;" in f.read()
+
+
+def _convert_table(ddl):
+    return DdlConverter(["charset_utf8mb4"]).convert_object("table", "t", ddl)
+
+
+def test_binary_collations_stay_binary():
+    ddl, _, _ = _convert_table(
+        "CREATE TABLE `t` (\n  `id` int NOT NULL,\n  `code` varchar(20) CHARACTER SET latin1 COLLATE latin1_bin,\n"
+        "  `name` varchar(20) COLLATE utf8_general_ci,\n  `tag` varchar(20) COLLATE utf8_bin,\n  PRIMARY KEY (`id`)\n"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8 COLLATE=utf8_bin")
+    assert "`code` varchar(20) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin," in ddl
+    assert f"`name` varchar(20) COLLATE {config.TARGET_COLLATION}," in ddl
+    assert "`tag` varchar(20) COLLATE utf8mb4_bin," in ddl
+    assert ddl.endswith("DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_bin")
+
+
+def test_index_length_limit_depends_on_the_row_format():
+    table = ("CREATE TABLE `t` (\n  `id` int NOT NULL,\n  `email` varchar(255) NOT NULL,\n  PRIMARY KEY (`id`),\n"
+             "  UNIQUE KEY `email` (`email`)\n) ENGINE=InnoDB DEFAULT CHARSET=utf8{row_format}")
+    # 255 characters are 1020 bytes in utf8mb4: over 767, within 3072.
+    for row_format, flagged in (("", False), (" ROW_FORMAT=DYNAMIC", False), (" ROW_FORMAT=COMPRESSED", False),
+                                (" ROW_FORMAT=COMPACT", True), (" ROW_FORMAT=REDUNDANT", True)):
+        _, _, reviews = _convert_table(table.format(row_format=row_format))
+        assert bool(reviews) is flagged, row_format
+    _, _, reviews = _convert_table(table.format(row_format=" ROW_FORMAT=COMPACT").replace("(`email`)", "(`email`(191))"))
+    assert reviews == []
+    _, _, reviews = _convert_table(table.format(row_format="").replace("varchar(255)", "varchar(1000)"))
+    assert [review["reason"] for review in reviews] == [
+        "index `email` needs 4000 bytes after the utf8mb4 conversion, over InnoDB's 3072-byte index limit."]
@@ -0,0 +1,126 @@
+# gcp-agentic-migration/tests/test_handlers.py
+import asyncio
+from migration.utils.run_state import DONE
+
+
+def test_load_waits_for_the_converted_schema(handlers, tmp_path):
+    async def scenario():
+        await handlers.start_run()
+        handlers.checkpoint.phase("schema", DONE, {})
+        for result in (await handlers.run_myloader(input_dir=str(tmp_path)),
+                       await handlers.run_pipelined_migration(output_dir=str(tmp_path), storage_uri=str(tmp_path / "bucket"))):
+            assert result["status"] == "error"
+            assert "apply_schema" in result["message"]
+        assert handlers.jobs.jobs == {} and handlers.pipelines == {}
+
+    asyncio.run(scenario())
+
+
+def test_validation_holds_a_running_catchup_and_rechecks_tables_changed_since(handlers, monkeypatch):
+    from conftest import FakePool
+    from migration.mcp_server import handlers as module
+
+    class Catchup:
+        id, database, status, source_pool = "c1", "shop", "running", FakePool()
+        holds, applying = [], True
+
+        async def hold(self, position):
+            self.holds.append(position["log_pos"])
+            self.applying = False
+            return {"status": "running", "error": None}
+
+        def resume(self):
+            self.applying = True
+
+    catchup = Catchup()
+    passes = []
+
+    def validate(self, tables=None):
+        assert not catchup.applying
+        passes.append(tables)
+        # `b` changed on the source after the first position; the second pass sees it caught up.
+        report = {table: {"status": "mismatch" if table == "b" and len(passes) == 1 else "match"} for table in tables or ["a", "b"]}
+        failed = [table for table, result in report.items() if result["status"] != "match"]
+        return {"result": "VALIDATION FAILURE" if failed else "VALIDATION SUCCESS", "tables_checked": len(report),
+                "tables_failed": failed, "elapsed_seconds": 1.0, "tables": report}
+
+    positions = iter([100, 250])
+    monkeypatch.setattr(module, "source_position", lambda pool: {"log_file": "binlog.000001", "log_pos": next(positions)})
+    monkeypatch.setattr(module.ChunkedChecksumValidator, "validate", validate)
+
+    async def target_pool(scope):
+        return FakePool(), None
+
+    handlers._get_target_pool = target_pool
+    handlers.catchups[catchup.id] = catchup
+
+    async def scenario():
+        await handlers.start_run()
+        return await handlers.validate_data()
+
+    report = asyncio.run(scenario())["data"]
+    assert passes == [None, ["b"]] and catchup.holds == [100, 250] and catchup.applying
+    assert report["result"] == "VALIDATION SUCCESS" and report["passes"] == 2 and report["position"]["log_pos"] == 250
+
+
+def test_only_a_full_apply_completes_setup(handlers, monkeypatch):
+    from migration.mcp_server import handlers as module
+    from migration.utils.run_state import PENDING
+
+    class Runner:
+        def __init__(self, tf_dir):
+            pass
+
+        def applied(self, targets):
+            return False
+
+        async def apply(self, targets, parallelism, timeout, plan_only=False):
+            return {"status": "success", "changes": True, "stdout": "", "stderr": "", "returncode": 0}
+
+    monkeypatch.setattr(module, "TerraformRunner", Runner)
+
+    async def scenario():
+        await handlers.start_run()
+        await handlers.provision_infra(targets=["cloud_sql"])
+        run_id = handlers.checkpoint.run_id
+        assert handlers.checkpoint.phase_state("setup")["status"] == PENDING
+        assert handlers.run_state.units(run_id, "setup") == {"cloud_sql": {"status": DONE, "attempts": 1, "detail": None}}
+        await handlers.provision_infra()
+        assert handlers.checkpoint.phase_state("setup")["status"] == DONE
+
+    asyncio.run(scenario())
+
+
+def test_a_resume_with_every_table_dumped_only_completes_the_phase(handlers, tmp_path, fake_bin):
+    from migration.utils.run_state import RUNNING
+    fake_bin("mydumper", f"touch {tmp_path}/mydumper.ran")
+    handlers._source_tables = lambda scope: ["a", "b"]
+
+    async def scenario():
+        await handlers.start_run()
+        handlers.checkpoint.phase("dump", RUNNING, {"output_dir": str(tmp_path), "binlog": {"log_file": "binlog.000002", "log_pos": 4}})
+        handlers.checkpoint.units("dump", ["a", "b"], DONE)
+        return await handlers.run_mydumper(output_dir=str(tmp_path), wait=True)
+
+    result = asyncio.run(scenario())
+    assert result["status"] == "success" and result["skipped"]
+    assert result["data"]["binlog"] == {"log_file": "binlog.000002", "log_pos": 4}
+    assert handlers.checkpoint.phase_state("dump")["status"] == DONE
+    assert not (tmp_path / "mydumper.ran").exists()
+
+
+def test_missing_or_unreadable_secrets_leave_every_credential_unset(handlers, monkeypatch):
+    from migration import config
+    from migration.mcp_server import handlers as module
+    monkeypatch.setattr(module, "get_secrets", lambda ids, ignore_missing=False: {config.LEGACY_DB_HOST_SECRET: "db.internal"})
+    handlers._load_secrets()
+    assert (handlers.legacy_db_host, handlers.legacy_db_user, handlers.legacy_db_password, handlers.legacy_db_name) == (
+        "db.internal", None, None, None)
+
+    def unreachable(ids, ignore_missing=False):
+        raise RuntimeError("secret manager unreachable")
+
+    monkeypatch.setattr(module, "get_secrets", unreachable)
+    handlers._load_secrets()
+    assert (handlers.legacy_db_host, handlers.legacy_db_user, handlers.legacy_db_password, handlers.legacy_db_name) == (
+        None, None, None, None)
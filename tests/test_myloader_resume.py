@@ -0,0 +1,118 @@
+# gcp-agentic-migration/tests/test_myloader_resume.py
+import asyncio
+import re
+from conftest import FakePool
+from migration.utils.run_state import DONE, FAILED, RUNNING
+
+METADATA = """[config]
+quote-character = BACKTICK
+
+[`shop`.`a`]
+real_table_name=a
+rows = 2
+
+[`shop`.`b`]
+real_table_name=b
+rows = 3
+"""
+
+
+def _dump(tmp_path):
+    dump = tmp_path / "dump"
+    dump.mkdir()
+    (dump / "metadata").write_text(METADATA)
+    for name in ("shop.a.00000.sql", "shop.b.00000.sql", "shop.b.00001.sql"):
+        (dump / name).write_text("INSERT INTO t VALUES (1);\n")
+    return dump
+
+
+def test_failed_load_is_checkpointed_per_table_and_resumed_into_emptied_tables(handlers, tmp_path, fake_bin):
+    dump = _dump(tmp_path)
+    exit_code = tmp_path / "exit_code"
+    fake_bin("myloader", f'echo "$@" >> {tmp_path}/myloader.args\nexit $(cat {exit_code})')
+    counts = {"a": 2, "b": 1}  # `b` was only partly loaded when myloader failed
+
+    def respond(sql, args):
+        match = re.match(r"SELECT COUNT\(\*\) AS n FROM `(\w+)`", sql)
+        return {"n": counts[match.group(1)]} if match else None
+
+    pool = FakePool(respond)
+
+    async def target_pool(scope):
+        return pool, None
+
+    handlers._get_target_pool = target_pool
+
+    async def scenario():
+        await handlers.start_run()
+        exit_code.write_text("1")
+        await handlers.run_myloader(input_dir=str(dump), wait=True)
+        units = handlers.run_state.units(handlers.checkpoint.run_id, "load")
+        assert {table: unit["status"] for table, unit in units.items()} == {"a": DONE, "b": FAILED}
+        assert not any(statement.startswith("TRUNCATE") for statement in pool.statements)
+
+        exit_code.write_text("0")
+        pool.statements.clear()
+        await handlers.run_myloader(input_dir=str(dump), wait=True)
+        assert [statement for statement in pool.statements if statement.startswith("TRUNCATE")] == ["TRUNCATE TABLE `b`"]
+        last_args = (tmp_path / "myloader.args").read_text().splitlines()[-1]
+        assert "--tables-list=shop.b" in last_args and "--overwrite-tables" not in last_args
+        units = handlers.run_state.units(handlers.checkpoint.run_id, "load")
+        assert {table: unit["status"] for table, unit in units.items()} == {"a": DONE, "b": DONE}
+        assert handlers.checkpoint.phase_state("load")["status"] == DONE
+
+    asyncio.run(scenario())
+
+
+def test_tables_without_a_recorded_row_count_are_reloaded(handlers, tmp_path, fake_bin):
+    dump = _dump(tmp_path)
+    (dump / "metadata").write_text("Started dump at: 2024-01-01 00:00:00\n")
+    fake_bin("myloader", "exit 1")
+
+    async def target_pool(scope):
+        return FakePool(lambda sql, args: {"n": 0}), None
+
+    handlers._get_target_pool = target_pool
+
+    async def scenario():
+        await handlers.start_run()
+        await handlers.run_myloader(input_dir=str(dump), wait=True)
+        units = handlers.run_state.units(handlers.checkpoint.run_id, "load")
+        assert {unit["status"] for unit in units.values()} == {FAILED}
+
+    asyncio.run(scenario())
+
+
+def test_waiting_on_a_failed_load_reports_the_failure(handlers, tmp_path, fake_bin):
+    dump = _dump(tmp_path)
+    fake_bin("myloader", "exit 3")
+
+    async def target_pool(scope):
+        return FakePool(lambda sql, args: {"n": 0} if sql.startswith("SELECT COUNT") else None), None
+
+    handlers._get_target_pool = target_pool
+
+    async def scenario():
+        await handlers.start_run()
+        return await handlers.run_myloader(input_dir=str(dump), wait=True)
+
+    result = asyncio.run(scenario())
+    assert (result["status"], result["job_status"], result["returncode"]) == ("error", "error", 3)
+    assert "return code 3" in result["message"]
+
+
+def test_a_resume_with_every_table_loaded_only_completes_the_phase(handlers, tmp_path, fake_bin):
+    dump = _dump(tmp_path)
+    fake_bin("myloader", f"touch {tmp_path}/myloader.ran")
+
+    async def scenario():
+        await handlers.start_run()
+        # The run stopped after recording the last table but before closing the phase.
+        handlers.checkpoint.phase("load", RUNNING, {"input_dir": str(dump)})
+        handlers.checkpoint.units("load", ["a", "b"], DONE)
+        return await handlers.run_myloader(input_dir=str(dump), wait=True)
+
+    result = asyncio.run(scenario())
+    assert result["status"] == "success" and result["skipped"]
+    assert handlers.checkpoint.phase_state("load")["status"] == DONE
+    assert not (tmp_path / "myloader.ran").exists()
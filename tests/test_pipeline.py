@@ -0,0 +1,86 @@
+# gcp-agentic-migration/tests/test_pipeline.py
+import asyncio
+import pytest
+from migration.mcp_server.pipeline import DumpImportPipeline, LocalStorage, classify_dump_file
+
+
+@pytest.fixture
+def dump(tmp_path, monkeypatch, fake_bin):
+    from migration import config
+    monkeypatch.setattr(config, "PIPELINE_POLL_INTERVAL", 0.01)
+    imports = tmp_path / "imports.log"
+    monkeypatch.setattr(config, "GCLOUD_BIN", str(fake_bin("gcloud", f'echo "$5" >> {imports}')))
+    # -d -q -f <file> -o <staged>
+    monkeypatch.setattr(config, "ZSTD_BIN", str(fake_bin("zstd", 'cp "$4" "$6"')))
+    directory = tmp_path / "dump"
+    directory.mkdir()
+    for name in ("metadata", "shop-schema-create.sql", "shop.orders-schema.sql.zst", "shop.orders.00000.sql.zst"):
+        (directory / name).write_text("--\n")
+    (tmp_path / "bucket").mkdir()
+
+    def run():
+        pipeline = DumpImportPipeline(str(directory), LocalStorage(f"file://{tmp_path / 'bucket'}"), "shop", instance="target")
+        asyncio.run(pipeline.run())
+        return pipeline, imports.read_text().split() if imports.exists() else []
+
+    return directory, run
+
+
+def test_zstd_dumps_are_recognised():
+    assert classify_dump_file("shop.orders.00001.sql.zst") == ("data", "orders")
+    assert classify_dump_file("shop.orders-schema.sql.zst") == ("schema", "orders")
+
+
+def test_zstd_files_are_imported_decompressed(dump, tmp_path):
+    directory, run = dump
+    pipeline, imports = run()
+    assert pipeline.status == "success", pipeline.error
+    bucket = tmp_path / "bucket" / "shop"
+    assert sorted(path.name for path in bucket.iterdir()) == [
+        "metadata", "shop-schema-create.sql", "shop.orders-schema.sql", "shop.orders.00000.sql"]
+    assert [uri.rsplit("/", 1)[1] for uri in imports] == ["shop-schema-create.sql", "shop.orders-schema.sql", "shop.orders.00000.sql"]
+    assert list((directory / ".staged").iterdir()) == []
+
+
+def test_unrecognised_dump_files_fail_the_run(dump):
+    directory, run = dump
+    (directory / "shop.orders.00000.dat").write_text("1\t2\n")
+    (directory / "metadata.partial").write_text("")
+    pipeline, _ = run()
+    assert pipeline.status == "error"
+    assert "cannot import" in pipeline.error and "['shop.orders.00000.dat']" in pipeline.error
+
+
+@pytest.mark.parametrize("schema_preloaded", [False, True])
+def test_files_that_change_after_their_upload_are_caught_when_the_dump_ends(tmp_path, monkeypatch, fake_bin, schema_preloaded):
+    from types import SimpleNamespace
+    from migration import config
+    monkeypatch.setattr(config, "PIPELINE_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(config, "PIPELINE_FILE_SETTLE_SECONDS", 0)
+    monkeypatch.setattr(config, "GCLOUD_BIN", str(fake_bin("gcloud", "true")))
+    directory, bucket = tmp_path / "dump", tmp_path / "bucket"
+    directory.mkdir()
+    bucket.mkdir()
+    chunk = directory / "shop.orders.00000.sql"
+    chunk.write_text("INSERT INTO orders VALUES (1);\n")
+    dump_job = SimpleNamespace(id="j1", status="running", started_at=0, finished_at=None)
+
+    async def scenario():
+        # Without a preloaded schema, data is only imported once the uploads are done.
+        pipeline = DumpImportPipeline(str(directory), LocalStorage(f"file://{bucket}"), "shop", instance="target",
+                                      schema_preloaded=schema_preloaded, dump_job=dump_job).start()
+        waiting_for = "imported" if schema_preloaded else "uploaded"
+        while pipeline.files.get(chunk.name, {}).get("state") != waiting_for:
+            await asyncio.sleep(0.01)
+        # mydumper resumes writing after a pause longer than the settle time, then finishes.
+        with open(chunk, "a") as f:
+            f.write("INSERT INTO orders VALUES (2);\n")
+        dump_job.status = "success"
+        return await pipeline.wait()
+
+    summary = asyncio.run(scenario())
+    if schema_preloaded:
+        assert summary["status"] == "error" and "imported before mydumper finished" in summary["error"]
+    else:
+        assert summary["status"] == "success", summary["error"]
+        assert (bucket / "shop" / chunk.name).read_text() == chunk.read_text()
@@ -0,0 +1,85 @@
+# gcp-agentic-migration/tests/test_schema_extractor.py
+import pytest
+from conftest import FakePool
+from migration.mcp_server.schema_extractor import SchemaExtractor
+
+TABLE = {"TABLE_NAME": "sessions", "TABLE_TYPE": "BASE TABLE", "ENGINE": "MEMORY", "ROW_FORMAT": "Fixed", "AUTO_INCREMENT": None,
+         "CREATE_TIME": "2026-01-01 00:00:00", "UPDATE_TIME": None, "TABLE_COLLATION": "utf8mb4_0900_ai_ci", "CREATE_OPTIONS": "",
+         "TABLE_COMMENT": "", "CHARACTER_SET_NAME": "utf8mb4"}
+COLUMNS = [
+    {"TABLE_NAME": "sessions", "COLUMN_NAME": name, "COLUMN_TYPE": "int", "DATA_TYPE": "int", "IS_NULLABLE": "NO", "COLUMN_DEFAULT": None,
+     "EXTRA": "", "CHARACTER_SET_NAME": None, "COLLATION_NAME": None, "COLUMN_COMMENT": "", "GENERATION_EXPRESSION": ""}
+    for name in ("id", "user_id", "ttl")
+]
+INDEXES = [
+    {"TABLE_NAME": "sessions", "INDEX_NAME": "PRIMARY", "NON_UNIQUE": 0, "SEQ_IN_INDEX": 1, "COLUMN_NAME": "id", "SUB_PART": None,
+     "COLLATION": None, "INDEX_TYPE": "HASH", "INDEX_COMMENT": "", "IS_VISIBLE": "YES"},
+    {"TABLE_NAME": "sessions", "INDEX_NAME": "by_user", "NON_UNIQUE": 1, "SEQ_IN_INDEX": 1, "COLUMN_NAME": "user_id", "SUB_PART": None,
+     "COLLATION": "A", "INDEX_TYPE": "BTREE", "INDEX_COMMENT": "range scans", "IS_VISIBLE": "NO"},
+]
+CHECKS = [{"TABLE_NAME": "sessions", "CONSTRAINT_NAME": "ttl_positive", "ENFORCED": "NO", "CHECK_CLAUSE": "(`ttl` > 0)"}]
+
+
+def _source(version):
+    def respond(sql, args):
+        if "VERSION()" in sql:
+            return [{"version": version}]
+        if "information_schema.TABLES" in sql:
+            return [TABLE]
+        if "information_schema.COLUMNS" in sql:
+            return COLUMNS
+        if "information_schema.STATISTICS" in sql:
+            return INDEXES
+        if "CHECK_CONSTRAINTS" in sql:
+            return CHECKS
+        if "information_schema.PARAMETERS" in sql:
+            return [{"SPECIFIC_NAME": "total", "ROUTINE_TYPE": "FUNCTION", "ORDINAL_POSITION": 1, "PARAMETER_MODE": None,
+                     "PARAMETER_NAME": "order_id", "DTD_IDENTIFIER": "int"},
+                    {"SPECIFIC_NAME": "total", "ROUTINE_TYPE": "PROCEDURE", "ORDINAL_POSITION": 1, "PARAMETER_MODE": "OUT",
+                     "PARAMETER_NAME": "result", "DTD_IDENTIFIER": "decimal(10,2)"}]
+        if "information_schema.ROUTINES" in sql:
+            routine = {"SPECIFIC_NAME": "total", "ROUTINE_NAME": "total", "DTD_IDENTIFIER": "int", "ROUTINE_DEFINITION": "BEGIN END",
+                       "IS_DETERMINISTIC": "NO", "SQL_DATA_ACCESS": "READS SQL DATA", "SECURITY_TYPE": "DEFINER",
+                       "DEFINER": "app@%", "ROUTINE_COMMENT": ""}
+            return [{**routine, "ROUTINE_TYPE": "FUNCTION"}, {**routine, "ROUTINE_TYPE": "PROCEDURE"}]
+        return []
+
+    return FakePool(respond)
+
+
+def test_checks_index_options_and_invisible_indexes_are_kept(tmp_path):
+    ddl = SchemaExtractor(_source("8.0.36"), "shop", cache_dir=str(tmp_path)).extract(include_objects=False)["tables"]["sessions"]
+    assert "PRIMARY KEY (`id`) USING HASH" in ddl
+    assert "KEY `by_user` (`user_id`) USING BTREE COMMENT 'range scans' /*!80000 INVISIBLE */" in ddl
+    assert "CONSTRAINT `ttl_positive` CHECK ((`ttl` > 0)) /*!80016 NOT ENFORCED */" in ddl
+
+
+@pytest.mark.parametrize("version", ["5.7.44-log", "10.11.6-MariaDB"])
+def test_older_servers_are_not_asked_for_mysql_8_metadata(tmp_path, version):
+    pool = _source(version)
+    SchemaExtractor(pool, "shop", cache_dir=str(tmp_path)).extract(include_objects=False)
+    assert not any("CHECK_CONSTRAINTS" in sql or " IS_VISIBLE AS" in sql for sql in pool.statements)
+
+
+def test_a_procedure_and_a_function_sharing_a_name_keep_their_own_parameters(tmp_path):
+    routines = SchemaExtractor(_source("8.0.36"), "shop", cache_dir=str(tmp_path)).extract()["routines"]
+    assert routines["total"].startswith("CREATE DEFINER=`app`@`%` FUNCTION `total`(`order_id` int) RETURNS int")
+    assert routines["total (PROCEDURE)"].startswith("CREATE DEFINER=`app`@`%` PROCEDURE `total`(OUT `result` decimal(10,2))")
+
+
+@pytest.mark.parametrize("version, default, expected", [
+    ("10.11.6-MariaDB", "'it''s'", "DEFAULT 'it''s'"),
+    ("10.11.6-MariaDB", "0", "DEFAULT 0"),
+    ("10.11.6-MariaDB", "NULL", "DEFAULT NULL"),
+    ("10.11.6-MariaDB", "uuid()", "DEFAULT (uuid())"),
+    ("10.1.48-MariaDB", "it's", "DEFAULT 'it''s'"),
+    ("8.0.36", "NULL", "DEFAULT 'NULL'"),
+])
+def test_mariadb_defaults_are_already_sql_literals(tmp_path, version, default, expected):
+    column = {**COLUMNS[0], "COLUMN_NAME": "note", "COLUMN_TYPE": "varchar(20)", "DATA_TYPE": "varchar", "IS_NULLABLE": "YES",
+              "COLUMN_DEFAULT": default}
+    pool = _source(version)
+    respond = pool.respond
+    pool.respond = lambda sql, args: [column] if "information_schema.COLUMNS" in sql else respond(sql, args)
+    ddl = SchemaExtractor(pool, "shop", cache_dir=str(tmp_path)).extract(include_objects=False)["tables"]["sessions"]
+    assert f"`note` varchar(20) {expected}" in ddl
@@ -0,0 +1,63 @@
+# gcp-agentic-migration/tests/test_script_worker.py
+import pytest
+from migration.mcp_server.script_worker import compare_sql, reusable, split_statements
+
+
+class Connection:
+    def __init__(self, rows, fail=False, read_only=1):
+        self.rows, self.fail, self.read_only, self.statements = rows, fail, read_only, []
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                connection.statements.append(sql)
+
+            def fetchall(self):
+                if connection.statements[-1].startswith("SELECT @@session"):
+                    return [{"read_only": connection.read_only}]
+                return connection.rows
+
+        return Cursor()
+
+    def rollback(self):
+        if self.fail:
+            raise ConnectionError("Command Out of Sync")
+        self.statements.append("ROLLBACK")
+
+
+def test_statements_split_outside_quotes_and_comments():
+    sql = """SELECT 'a;b', "c\\";d", `e;f` FROM t; -- one; two
+    # three;
+    /* four; */ SELECT 2;;"""
+    assert split_statements(sql) == ["SELECT 'a;b', \"c\\\";d\", `e;f` FROM t", "-- one; two\n    # three;\n    /* four; */ SELECT 2"]
+
+
+def test_sql_scripts_run_queries_in_a_read_only_transaction():
+    connections = {"source": Connection([{"n": 1}]), "target": Connection([{"n": 1}])}
+    result = compare_sql("(SELECT COUNT(*) n FROM t); SHOW TABLES", connections, 10)
+    assert result["match"] and len(result["statements"]) == 2
+    assert connections["target"].statements == ["START TRANSACTION READ ONLY", "(SELECT COUNT(*) n FROM t)", "SHOW TABLES", "ROLLBACK"]
+
+
+@pytest.mark.parametrize("statement", ["DELETE FROM t", "/*!50000 DROP TABLE t */", "SET SESSION TRANSACTION READ WRITE"])
+def test_sql_scripts_with_writes_are_refused_before_anything_runs(statement):
+    connections = {"source": Connection([]), "target": Connection([])}
+    with pytest.raises(ValueError, match="only run queries"):
+        compare_sql(f"SELECT 1; {statement}", connections, 10)
+    assert connections["source"].statements == connections["target"].statements == []
+
+
+def test_connections_are_reopened_only_when_unusable():
+    assert reusable(Connection([]), {"status": "error", "returncode": 1})
+    assert not reusable(Connection([], fail=True), {"status": "error", "returncode": 1})
+    assert not reusable(Connection([]), {"status": "timeout", "returncode": -9})
+    # A script that ran SET SESSION TRANSACTION READ WRITE leaves a session the next job must not get.
+    assert not reusable(Connection([], read_only=0), {"status": "success", "returncode": 0})
@@ -0,0 +1,20 @@
+# gcp-agentic-migration/tests/test_source_sizing.py
+from conftest import FakePool
+from migration.mcp_server.source_sizing import SourceSizer
+
+
+def test_partitions_add_up_to_their_table_whatever_the_separator_case():
+    def respond(sql, args):
+        if "innodb_page_size" in sql:
+            return [{"value": 16384}]
+        if "information_schema.TABLES" in sql:
+            return [{"name": "events", "engine": "InnoDB"}]
+        if "innodb_table_stats" in sql:
+            # 5.7 writes #P#, 8.0 writes #p#; subpartitions follow as #sp#.
+            return [{"table_name": name, "n_rows": 10, "clustered_index_size": 2, "sum_of_other_index_sizes": 1}
+                    for name in ("events#P#p2025", "events#p#p2026", "events#p#p2027#sp#s0")]
+        return []
+
+    stats = SourceSizer(FakePool(respond), "shop")._persistent_stats()
+    assert list(stats) == ["events"]
+    assert (stats["events"]["row_estimate"], stats["events"]["data_bytes"]) == (30, 3 * 2 * 16384)
@@ -0,0 +1,72 @@
+# gcp-agentic-migration/tests/test_telemetry.py
+import asyncio
+import os
+import threading
+import pytest
+from migration.mcp_server.executor import run_command
+from migration.mcp_server.telemetry import ProcessGroupSampler
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc"), reason="samples /proc")
+
+
+def test_process_groups_are_scanned_off_the_event_loop_with_a_final_sample(monkeypatch):
+    threads = []
+    sample = ProcessGroupSampler.sample
+
+    def record(self):
+        threads.append(threading.current_thread())
+        sample(self)
+
+    monkeypatch.setattr(ProcessGroupSampler, "sample", record)
+
+    async def scenario():
+        loop_thread = threading.current_thread()
+        result = await run_command("sleep 0.2")
+        return loop_thread, result
+
+    loop_thread, result = asyncio.run(scenario())
+    assert result["status"] == "success" and result["peak_rss_bytes"]
+    # One scan at start, none during the (longer) interval, and the one stop() takes.
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_spans_are_persisted_off_the_event_loop(tmp_path, monkeypatch):
+    import json
+    from migration.mcp_server import telemetry
+    tracer = telemetry.Tracer(root=str(tmp_path))
+    tracer.start_run("r1")
+    threads = []
+    submit = tracer.writer.submit
+    monkeypatch.setattr(tracer.writer, "submit", lambda *args: (threads.append(threading.current_thread()), submit(*args)))
+    writes = []
+    opened = open
+
+    def recording_open(path, *args, **kwargs):
+        writes.append(threading.current_thread())
+        return opened(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", recording_open)
+
+    async def scenario():
+        with tracer.span("run_myloader", table="orders") as span:
+            span.add(bytes=10, rows=2)
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(scenario())
+    tracer.writer.wait()
+    monkeypatch.undo()
+    assert threads == [loop_thread, loop_thread] and writes and loop_thread not in writes
+    spans = (tmp_path / "r1" / "spans.jsonl").read_text().splitlines()
+    assert [json.loads(line)["rows"] for line in spans] == [2]
+    assert json.loads((tmp_path / "r1" / "summary.json").read_text())["phase_totals"]["load"]["bytes"] == 10
+
+
+def test_catchup_metric_labels_are_escaped(handlers):
+    class Catchup:
+        status = "running"
+
+        def summary(self):
+            return {"catchup_id": "c1", "database": 'sh"op\\', "lag_seconds": 1, "bytes_behind": 2, "row_changes": 3}
+
+    handlers.catchups["c1"] = Catchup()
+    assert 'migration_binlog_row_changes_total{catchup="c1",database="sh\\"op\\\\"} 3' in handlers.render_metrics()
@@ -0,0 +1,129 @@
+# gcp-agentic-migration/tests/test_validation.py
+import re
+import sqlite3
+import zlib
+import pytest
+from migration.mcp_server.validation import ChunkedChecksumValidator
+
+
+class BitXor:
+    def __init__(self):
+        self.value = None
+
+    def step(self, value):
+        self.value = value if self.value is None else self.value ^ value
+
+    def finalize(self):
+        return self.value
+
+
+class SqlitePool:
+    """
+    A database for ChunkedChecksumValidator: SQLite with the MySQL functions its checksums use,
+    so key ordering, row-constructor ranges and LIMIT/OFFSET behave as they would on MySQL.
+    """
+
+    def __init__(self, script, collation="utf8mb4_0900_ai_ci"):
+        self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.db.row_factory = lambda cursor, row: {column[0]: value for column, value in zip(cursor.description, row)}
+        self.db.create_function("CRC32", 1, lambda value: zlib.crc32(str(value).encode()))
+        self.db.create_function("CONCAT", -1, lambda *values: None if None in values else "".join(str(value) for value in values))
+        self.db.create_aggregate("BIT_XOR", 1, BitXor)
+        self.db.executescript(script)
+        self.collation = collation
+        self.queries = []
+
+    def connection(self):
+        pool = self
+
+        class Connection:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def cursor(self):
+                return Cursor()
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql, args=None):
+                pool.queries.append(sql)
+                if "information_schema.COLUMNS" in sql or "information_schema.STATISTICS" in sql:
+                    columns = pool.db.execute(f"PRAGMA table_info({args[1]})").fetchall()
+                    if "COLUMNS" in sql:
+                        self.rows = [{"name": column["name"], "type": column["type"].lower() or "text",
+                                      "collation": None if column["type"] == "INTEGER" else pool.collation}
+                                     for column in columns]
+                    else:
+                        self.rows = [{"name": column["name"]} for column in sorted(columns, key=lambda c: c["pk"]) if column["pk"]]
+                    return
+                # SQLite text is already UTF-8, and its BINARY collation orders like utf8mb4_bin.
+                sql = re.sub(r"CONVERT\((`[^`]+`) USING utf8mb4\)", r"\1", sql.replace("%s", "?")).replace("utf8mb4_bin", "BINARY")
+                self.rows = pool.db.execute(sql, list(args or [])).fetchall()
+
+            def fetchall(self):
+                return self.rows
+
+        return Connection()
+
+
+ORDER_LINES = """
+CREATE TABLE order_lines (order_id INTEGER, line INTEGER, sku TEXT, PRIMARY KEY (order_id, line));
+INSERT INTO order_lines VALUES (1, 1, 'a'), (1, 2, 'b'), (1, 3, 'c'), (2, 1, 'd'), (2, 2, 'e'), (3, 1, 'f'), (3, 2, 'g');
+"""
+CODES = """
+CREATE TABLE codes (code TEXT PRIMARY KEY, label TEXT);
+INSERT INTO codes VALUES ('apple', 'x'), ('kiwi', 'x'), ('lime', 'x'), ('mango', 'x'), ('pear', 'x'), ('zucchini', 'x');
+"""
+
+
+def _validate(source, target, table, target_collation="utf8mb4_0900_ai_ci", **options):
+    validator = ChunkedChecksumValidator(SqlitePool(source), SqlitePool(target, target_collation), "shop", workers=2, **options)
+    return validator, validator.validate([table])["tables"][table]
+
+
+def test_composite_keys_are_diffed_on_every_key_column():
+    target = ORDER_LINES + "UPDATE order_lines SET sku = 'B' WHERE order_id = 1 AND line = 2; DELETE FROM order_lines WHERE order_id = 3 AND line = 1;"
+    _, result = _validate(ORDER_LINES, target, "order_lines", chunk_size=3, drilldown_rows=1)
+    assert result["status"] == "mismatch"
+    assert result["changed"] == [[1, 2]] and result["missing_in_target"] == [[3, 1]] and result["extra_in_target"] == []
+    assert (result["source_rows"], result["target_rows"]) == (7, 6)
+
+
+def test_chunks_page_through_non_integer_keys():
+    validator, result = _validate(CODES, CODES, "codes", chunk_size=2)
+    # Three chunks of two keys, then the open-ended one after the source's last key.
+    assert result["status"] == "match" and result["chunks"] == 4 and result["source_rows"] == 6
+    boundaries = [sql for sql in validator.pools["source"].queries if "LIMIT 1 OFFSET" in sql]
+    assert boundaries and all("ORDER BY `code`" in sql for sql in boundaries)
+
+
+@pytest.mark.parametrize("row", ["('aardvark', 'x')", "('zzz', 'x')"])
+def test_target_rows_outside_the_source_key_range_are_found(row):
+    _, result = _validate(CODES, CODES + f"INSERT INTO codes VALUES {row};", "codes", chunk_size=2, drilldown_rows=10)
+    assert result["status"] == "mismatch" and result["extra_in_target"] == [row[2:-7]]
+
+
+def test_values_cannot_shift_between_columns_unnoticed():
+    table = "CREATE TABLE pairs (id INTEGER PRIMARY KEY, a TEXT, b TEXT, c BLOB);"
+    validator, result = _validate(table + "INSERT INTO pairs VALUES (1, 'a#', 'b', NULL);",
+                                  table + "INSERT INTO pairs VALUES (1, 'a', '#b', NULL);", "pairs")
+    assert result["status"] == "mismatch" and result["changed"] == [1]
+    checksum = next(sql for sql in validator.pools["source"].queries if "BIT_XOR" in sql)
+    assert "CONVERT(`a` USING utf8mb4)" in checksum and "CONVERT(`c`" not in checksum
+
+
+def test_string_keys_whose_collation_changed_are_ranged_in_binary_order():
+    rows = "INSERT INTO names VALUES ('apple'), ('Banana'), ('cherry'), ('Date');"
+    source = "CREATE TABLE names (name TEXT PRIMARY KEY);" + rows
+    target = "CREATE TABLE names (name TEXT COLLATE NOCASE PRIMARY KEY);" + rows
+    _, result = _validate(source, target, "names", target_collation="utf8mb4_unicode_ci", chunk_size=1)
+    assert result["status"] == "match" and result["target_rows"] == 4, result
+    assert "utf8mb4_bin" in result["note"]
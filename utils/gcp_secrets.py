@@ -1,12 +1,140 @@
 # gcp-agentic-migration/utils/gcp_secrets.py
-from google.cloud import secretmanager
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from.. import config
 
+
+class GcpSecretBackend:
+    """Reads secrets from Google Cloud Secret Manager through one shared client."""
+
+    def __init__(self, project_id: str = config.GCP_PROJECT_ID):
+        self.project_id = project_id
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # The gRPC channel and credentials are set up once and reused for every call.
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from google.cloud import secretmanager
+                    self._client = secretmanager.SecretManagerServiceClient()
+        return self._client
+
+    def fetch(self, secret_id: str, version_id: str = "latest") -> str:
+        name = f"projects/{self.project_id}/secrets/{secret_id}/versions/{version_id}"
+        response = self.client.access_secret_version(request={"name": name})
+        return response.payload.data.decode("UTF-8")
+
+
+class LocalSecretBackend:
+    """
+    Reads secrets without GCP, for development and benchmarks.
+    Looks up MIGRATION_SECRET_<SECRET_ID> in the environment (dashes become underscores),
+    then the JSON file at config.SECRETS_LOCAL_FILE ({"secret-id": "value"}).
+    """
+
+    def __init__(self, path: str = config.SECRETS_LOCAL_FILE):
+        self.path = path
+
+    def fetch(self, secret_id: str, version_id: str = "latest") -> str:
+        env_name = "MIGRATION_SECRET_" + secret_id.upper().replace("-", "_")
+        if env_name in os.environ:
+            return os.environ[env_name]
+        if self.path and os.path.exists(self.path):
+            with open(self.path) as f:
+                secrets = json.load(f)
+            if secret_id in secrets:
+                return secrets[secret_id]
+        raise KeyError(f"Secret '{secret_id}' not found in environment ({env_name}) or {self.path}")
+
+
+class SecretProvider:
+    """Process-wide secret cache in front of a backend, with TTL expiry and explicit invalidation."""
+
+    def __init__(self, backend, ttl: int = config.SECRETS_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._cache = {}  # (secret_id, version_id) -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, secret_id: str, version_id: str = "latest") -> str:
+        key = (secret_id, version_id)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        value = self.backend.fetch(secret_id, version_id)
+        with self._lock:
+            self._cache[key] = (value, time.monotonic() + self.ttl)
+        return value
+
+    def get_many(self, secret_ids: list, version_id: str = "latest", ignore_missing: bool = False) -> dict:
+        """Fetches several secrets concurrently. Missing secrets raise unless ignore_missing is set."""
+        secret_ids = list(dict.fromkeys(secret_ids))
+        with ThreadPoolExecutor(max_workers=max(1, min(config.SECRETS_FETCH_WORKERS, len(secret_ids)))) as pool:
+            futures = {secret_id: pool.submit(self.get, secret_id, version_id) for secret_id in secret_ids}
+        secrets = {}
+        for secret_id, future in futures.items():
+            try:
+                secrets[secret_id] = future.result()
+            except Exception:
+                if not ignore_missing:
+                    raise
+        return secrets
+
+    def invalidate(self, secret_id: str = None):
+        """Drops one secret (all versions) or the whole cache, e.g. after a rotation."""
+        with self._lock:
+            if secret_id is None:
+                self._cache.clear()
+            else:
+                for key in [key for key in self._cache if key[0] == secret_id]:
+                    del self._cache[key]
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> SecretProvider:
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                if config.SECRETS_BACKEND == "local":
+                    backend = LocalSecretBackend()
+                elif config.SECRETS_BACKEND == "gcp":
+                    backend = GcpSecretBackend()
+                else:
+                    raise ValueError(f"Unsupported secrets backend: {config.SECRETS_BACKEND}")
+                _provider = SecretProvider(backend)
+    return _provider
+
+
+def known_secret_ids() -> list:
+    """Names of all secrets referenced in config.py (settings ending in _SECRET)."""
+    return [value for name, value in vars(config).items() if name.endswith("_SECRET") and isinstance(value, str)]
+
+
 def get_secret(secret_id: str, version_id: str = "latest") -> str:
     """
-    Retrieves a secret from Google Cloud Secret Manager.
+    Retrieves a secret from the configured backend (GCP Secret Manager by default), cached for SECRETS_CACHE_TTL.
     """
-    client = secretmanager.SecretManagerServiceClient()
-    name = f"projects/{config.GCP_PROJECT_ID}/secrets/{secret_id}/versions/{version_id}"
-    response = client.access_secret_version(request={"name": name})
-    return response.payload.data.decode("UTF-8")
\ No newline at end of file
+    return get_provider().get(secret_id, version_id)
+
+
+def get_secrets(secret_ids: list = None, ignore_missing: bool = False) -> dict:
+    """Retrieves several secrets concurrently; defaults to every secret known to config.py."""
+    if secret_ids is None:
+        secret_ids, ignore_missing = known_secret_ids(), True
+    return get_provider().get_many(secret_ids, ignore_missing=ignore_missing)
+
+
+def invalidate_secret(secret_id: str = None):
+    """Forgets a cached secret (or all of them) so the next read goes to the backend."""
+    get_provider().invalidate(secret_id)
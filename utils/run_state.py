@@ -0,0 +1,199 @@
+# gcp-agentic-migration/utils/run_state.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from.. import config
+
+PHASES = ("setup", "schema", "schema_apply", "dump", "upload", "load", "catchup", "validation")
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    params TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phases (
+    run_id TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    status TEXT NOT NULL,
+    detail TEXT,
+    started_at REAL,
+    finished_at REAL,
+    PRIMARY KEY (run_id, phase)
+);
+CREATE TABLE IF NOT EXISTS units (
+    run_id TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    detail TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, phase, unit)
+);
+"""
+
+
+class RunStateStore:
+    """
+    Durable record of a migration run, so a crashed run can be resumed instead of restarted.
+
+    Each run has a status per phase (setup, schema, schema_apply, dump, upload, load, catchup, validation) and, inside
+    the data phases, a status per unit: a table for dump/load/validation, a dump file for the
+    pipelined upload and import. The store is a SQLite file in WAL mode, shared by main.py and
+    the MCP server.
+    """
+
+    def __init__(self, path: str = config.RUN_STATE_DB):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def _execute(self, sql, args=()):
+        with self._lock:
+            return self._connection.execute(sql, args).fetchall()
+
+    # --- Runs ---
+    def create_run(self, params: dict = None) -> str:
+        run_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        now = time.time()
+        self._execute("INSERT INTO runs (run_id, status, params, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                      (run_id, RUNNING, json.dumps(params or {}), now, now))
+        return run_id
+
+    def get_run(self, run_id: str):
+        rows = self._execute("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        if not rows:
+            return None
+        run = dict(rows[0])
+        run["params"] = json.loads(run["params"] or "{}")
+        return run
+
+    def set_run_status(self, run_id: str, status: str):
+        self._execute("UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (status, time.time(), run_id))
+
+    def latest_run_id(self):
+        rows = self._execute("SELECT run_id FROM runs ORDER BY created_at DESC LIMIT 1")
+        return rows[0]["run_id"] if rows else None
+
+    # --- Phases ---
+    def set_phase(self, run_id: str, phase: str, status: str, detail=None):
+        now = time.time()
+        self._execute("""
+            INSERT INTO phases (run_id, phase, status, detail, started_at, finished_at) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (run_id, phase) DO UPDATE SET
+                status = excluded.status,
+                detail = COALESCE(excluded.detail, phases.detail),
+                started_at = CASE WHEN excluded.status = 'running' THEN excluded.started_at ELSE phases.started_at END,
+                finished_at = excluded.finished_at
+        """, (run_id, phase, status, json.dumps(detail) if detail is not None else None,
+              now, now if status in (DONE, FAILED) else None))
+        self._execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+
+    def get_phase(self, run_id: str, phase: str):
+        rows = self._execute("SELECT * FROM phases WHERE run_id = ? AND phase = ?", (run_id, phase))
+        if not rows:
+            return {"status": PENDING, "detail": None}
+        row = dict(rows[0])
+        row["detail"] = json.loads(row["detail"]) if row["detail"] else None
+        return row
+
+    # --- Units ---
+    def set_units(self, run_id: str, phase: str, units, status: str, detail=None):
+        """Sets the status of one or more units; a unit moving to 'running' counts as a new attempt."""
+        now = time.time()
+        encoded = json.dumps(detail) if detail is not None else None
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany("""
+                    INSERT INTO units (run_id, phase, unit, status, attempts, detail, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (run_id, phase, unit) DO UPDATE SET
+                        status = excluded.status,
+                        attempts = units.attempts + excluded.attempts,
+                        detail = COALESCE(excluded.detail, units.detail),
+                        updated_at = excluded.updated_at
+                """, [(run_id, phase, unit, status, 1 if status == RUNNING else 0, encoded, now) for unit in units])
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def set_unit(self, run_id: str, phase: str, unit: str, status: str, detail=None):
+        self.set_units(run_id, phase, [unit], status, detail)
+
+    def units(self, run_id: str, phase: str, status: str = None) -> dict:
+        sql = "SELECT unit, status, attempts, detail FROM units WHERE run_id = ? AND phase = ?"
+        args = [run_id, phase]
+        if status:
+            sql += " AND status = ?"
+            args.append(status)
+        return {row["unit"]: {"status": row["status"], "attempts": row["attempts"],
+                              "detail": json.loads(row["detail"]) if row["detail"] else None}
+                for row in self._execute(sql, args)}
+
+    def completed_units(self, run_id: str, phase: str) -> set:
+        return set(self.units(run_id, phase, DONE))
+
+    def summary(self, run_id: str, max_failed_units: int = 20):
+        """Compact view of a run: phase statuses, unit counts per status and the first failed units."""
+        run = self.get_run(run_id)
+        if run is None:
+            return None
+        phases = {phase: {"status": PENDING} for phase in PHASES}
+        for row in self._execute("SELECT phase, status, started_at, finished_at FROM phases WHERE run_id = ?", (run_id,)):
+            phases[row["phase"]] = {"status": row["status"], "started_at": row["started_at"], "finished_at": row["finished_at"]}
+        for row in self._execute("SELECT phase, status, COUNT(*) AS n FROM units WHERE run_id = ? GROUP BY phase, status", (run_id,)):
+            phases.setdefault(row["phase"], {"status": PENDING}).setdefault("units", {})[row["status"]] = row["n"]
+        failed = {}
+        for row in self._execute("SELECT phase, unit FROM units WHERE run_id = ? AND status IN (?, ?) ORDER BY phase, unit",
+                                 (run_id, FAILED, RUNNING)):
+            failed.setdefault(row["phase"], [])
+            if len(failed[row["phase"]]) < max_failed_units:
+                failed[row["phase"]].append(row["unit"])
+        return {"run_id": run_id, "status": run["status"], "params": run["params"], "phases": phases, "incomplete_units": failed}
+
+    def close(self):
+        self._connection.close()
+
+
+class RunCheckpoint:
+    """Binds a RunStateStore to the active run; every call is a no-op while no run is active."""
+
+    def __init__(self, store: RunStateStore = None, run_id: str = None):
+        self.store = store
+        self.run_id = run_id
+
+    @property
+    def active(self) -> bool:
+        return self.store is not None and self.run_id is not None
+
+    def phase(self, phase: str, status: str, detail=None):
+        if self.active:
+            self.store.set_phase(self.run_id, phase, status, detail)
+
+    def phase_state(self, phase: str) -> dict:
+        if not self.active:
+            return {"status": PENDING, "detail": None}
+        return self.store.get_phase(self.run_id, phase)
+
+    def units(self, phase: str, units, status: str, detail=None):
+        if self.active and units:
+            self.store.set_units(self.run_id, phase, units, status, detail)
+
+    def completed(self, phase: str) -> set:
+        if not self.active:
+            return set()
+        return self.store.completed_units(self.run_id, phase)